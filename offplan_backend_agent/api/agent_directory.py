@@ -0,0 +1,87 @@
+"""
+Cached, versioned snapshot of the public agent directory.
+
+The frontend loads the agent list on most pages, so the serialized list is
+built once, stored in the AGENTS cache namespace together with an ETag, and
+rebuilt whenever an agent is created, updated or deleted (see api/signals.py).
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags
+
+from api.cache import AGENTS
+from api.models import AgentDetails
+from api.serializers import AgentDetailsFrontendSerializer
+
+DIRECTORY_KEY = "directory"
+
+DIRECTORY_FIELDS = tuple(AgentDetailsFrontendSerializer.Meta.fields)
+
+# Named field sets the frontend can request with ?fields=<name>
+FIELD_PRESETS = {
+    "card": ("id", "name", "username", "avatar", "rating", "badge", "color"),
+}
+
+
+def _compute_etag(results):
+    body = json.dumps(results, cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+def build_agent_directory():
+    """Serialize every agent into {"version", "etag", "results"}."""
+    agents = AgentDetails.objects.order_by("id").only(
+        "id", "name", "username", "profile_image_url", "nationality", "languages", "rating",
+        "specialties", "total_business_deals", "responseTime", "badge", "color_gradient",
+    )
+    results = json.loads(json.dumps(AgentDetailsFrontendSerializer(agents, many=True).data, cls=DjangoJSONEncoder))
+    return {"version": AGENTS.version(), "etag": _compute_etag(results), "results": results}
+
+
+def rebuild_agent_directory():
+    """Invalidate the agent namespace and store a fresh snapshot under the new version."""
+    AGENTS.bump()
+    return get_agent_directory()
+
+
+def get_agent_directory():
+    return AGENTS.get_or_set(DIRECTORY_KEY, build_agent_directory)
+
+
+def resolve_fields(raw_fields):
+    """
+    Turn the ?fields= query value into a tuple of directory fields.
+
+    Accepts a preset name ("card") or a comma separated list. Returns
+    (fields, invalid) where invalid lists the unknown names.
+    """
+    if not raw_fields:
+        return DIRECTORY_FIELDS, []
+    if raw_fields in FIELD_PRESETS:
+        return FIELD_PRESETS[raw_fields], []
+
+    requested = [f.strip() for f in raw_fields.split(",") if f.strip()]
+    invalid = [f for f in requested if f not in DIRECTORY_FIELDS]
+    return tuple(requested), invalid
+
+
+def project(results, fields):
+    if fields == DIRECTORY_FIELDS:
+        return results
+    return [{field: row.get(field) for field in fields} for row in results]
+
+
+def etag_for(directory, fields):
+    """ETag for a directory version as seen through a given field selection."""
+    key = f"{directory['etag']}:{','.join(fields)}"
+    return '"%s"' % hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header lists etag ("*" or weak comparison, as GET requires)."""
+    tags = parse_etags(if_none_match or "")
+    if tags == ["*"]:
+        return True
+    return etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
@@ -0,0 +1,15 @@
+from api.cache import BLOGS
+
+FIRST_PAGE_KEY = "list:first_page:{lang}:{page_size}"
+
+
+def get_list_version():
+    return BLOGS.version()
+
+
+def bump_list_version():
+    BLOGS.bump()
+
+
+def first_page_key(lang, page_size):
+    return FIRST_PAGE_KEY.format(lang=lang, page_size=page_size)
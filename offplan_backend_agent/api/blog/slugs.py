@@ -0,0 +1,81 @@
+import re
+from collections import defaultdict
+
+from django.utils.text import slugify
+
+SLUG_MAX_LENGTH = 300
+# Leave room for a "-<n>" suffix inside the column length
+BASE_SLUG_MAX_LENGTH = SLUG_MAX_LENGTH - 10
+SUFFIXED_SLUG_RE = re.compile(r"^(.+)-(\d+)$")
+
+
+def base_slug_for(title):
+    return slugify(title)[:BASE_SLUG_MAX_LENGTH].strip("-") or "post"
+
+
+def next_free_slug(base_slug, taken_slugs):
+    """
+    Return base_slug if free, else base_slug-<n> with the smallest free n >= 1.
+
+    taken_slugs may contain unrelated slugs; only base_slug and its numeric
+    suffixes are considered.
+    """
+    suffix_re = re.compile(rf"^{re.escape(base_slug)}-(\d+)$")
+    used = set()
+    for slug in taken_slugs:
+        if slug == base_slug:
+            used.add(0)
+        elif match := suffix_re.match(slug):
+            used.add(int(match.group(1)))
+
+    if 0 not in used:
+        return base_slug
+    counter = 1
+    while counter in used:
+        counter += 1
+    return f"{base_slug}-{counter}"
+
+
+def allocate_slug(queryset, title):
+    """Pick a free slug for title with a single query against queryset."""
+    base_slug = base_slug_for(title)
+    existing = queryset.filter(slug__startswith=base_slug).values_list("slug", flat=True)
+    return next_free_slug(base_slug, existing)
+
+
+class SlugAllocator:
+    """
+    In-memory allocator for bulk imports.
+
+    Loads the existing slugs once and hands out unique slugs for any number
+    of titles without further queries.
+    """
+
+    def __init__(self, existing_slugs):
+        # base slug -> numeric suffixes in use (0 stands for the bare base)
+        self.used = defaultdict(set)
+        for slug in existing_slugs:
+            self._register(slug)
+
+    def _register(self, slug):
+        self.used[slug].add(0)
+        if match := SUFFIXED_SLUG_RE.match(slug):
+            self.used[match.group(1)].add(int(match.group(2)))
+
+    def allocate(self, title, preferred=None):
+        # The imported post's own slug gets the same normalization as a title, so it always fits the column
+        preferred = slugify(preferred or "")[:BASE_SLUG_MAX_LENGTH].strip("-")
+        if preferred and 0 not in self.used.get(preferred, ()):
+            slug = preferred
+        else:
+            base_slug = base_slug_for(title)
+            used = self.used.get(base_slug, ())
+            if 0 not in used:
+                slug = base_slug
+            else:
+                counter = 1
+                while counter in used:
+                    counter += 1
+                slug = f"{base_slug}-{counter}"
+        self._register(slug)
+        return slug
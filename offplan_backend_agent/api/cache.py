@@ -0,0 +1,218 @@
+"""
+Two-level cache for public endpoints.
+
+L1 is a small LRU inside each worker process; L2 is the shared Django cache
+(Redis when REDIS_URL is set, otherwise files under CACHE_DIR, see settings).
+Values are grouped in namespaces that are invalidated as a whole by bumping
+their version, so nothing has to know which keys exist:
+
+    PROPERTIES = Namespace("properties", ttl=300, stale=600)
+    data = PROPERTIES.get_or_set(f"detail:{id}", lambda: serialize(id))
+    PROPERTIES.bump()   # after properties change; see changefeed.record_changes
+
+On a miss only one caller computes the value: other threads of the same
+process wait for it, and other processes wait for it to land in L2 (a lock
+key taken with cache.add). Within `stale` seconds after `ttl` the old value is
+still returned while a background thread refreshes it.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.db import connection
+
+log = logging.getLogger(__name__)
+
+L1_SIZE = 512
+L1_TTL = 5           # seconds a worker trusts its own copy before asking L2 again
+VERSION_TTL = 2      # seconds a worker trusts its copy of a namespace version
+LOCK_TIMEOUT = 30    # longest a compute may hold the cross-process lock
+WAIT_TIMEOUT = 5     # longest a caller waits for someone else's compute
+WAIT_INTERVAL = 0.05
+
+_MISSING = object()
+
+
+class LRU:
+    """Thread-safe LRU of key -> (value, expires_at)."""
+
+    def __init__(self, size=L1_SIZE):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return _MISSING
+            if item[1] <= time.monotonic():
+                del self.items[key]
+                return _MISSING
+            self.items.move_to_end(key)
+            return item[0]
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.items[key] = (value, time.monotonic() + ttl)
+            self.items.move_to_end(key)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = _MISSING
+        self.error = None
+
+
+class Namespace:
+    """A versioned group of cached values; see the module docstring."""
+
+    def __init__(self, name, ttl=300, stale=0, alias="default", l1=None):
+        self.name = name
+        self.ttl = ttl
+        self.stale = stale
+        self.alias = alias
+        self.l1 = l1 if l1 is not None else LRU()
+        self.flights = {}
+        self.flights_lock = threading.Lock()
+
+    @property
+    def l2(self):
+        return caches[self.alias]
+
+    # --- versions -----------------------------------------------------------------
+
+    def version_key(self):
+        return f"ns:{self.name}:version"
+
+    def version(self):
+        key = self.version_key()
+        version = self.l1.get(key)
+        if version is _MISSING:
+            # Seeded from the clock rather than 1: a version key lost to culling must not
+            # restart below versions whose entries may still be in L2
+            version = self.l2.get_or_set(key, time.time_ns(), timeout=None)
+            self.l1.set(key, version, VERSION_TTL)
+        return version
+
+    def bump(self):
+        """Invalidate every value in the namespace, in all processes (within VERSION_TTL for their L1)."""
+        key = self.version_key()
+        try:
+            version = self.l2.incr(key)
+        except ValueError:
+            version = time.time_ns()  # missing or culled; see version()
+            self.l2.set(key, version, timeout=None)
+        self.l1.set(key, version, VERSION_TTL)
+        log.debug(f"🧹 Cache namespace {self.name} is now v{version}")
+        return version
+
+    def full_key(self, key):
+        return f"ns:{self.name}:v{self.version()}:{key}"
+
+    # --- reads ----------------------------------------------------------------------
+
+    def get_or_set(self, key, compute):
+        full_key = self.full_key(key)
+        entry = self.l1.get(full_key)
+        if entry is _MISSING:
+            entry = self.l2.get(full_key)
+            if entry is None:
+                return self.compute(full_key, compute)
+            self.l1.set(full_key, entry, min(L1_TTL, self.ttl))
+
+        if entry["fresh_until"] <= time.time():
+            self.refresh_in_background(full_key, compute)
+        return entry["value"]
+
+    def compute(self, full_key, compute):
+        """Compute full_key once per process (and, lock permitting, once across processes)."""
+        with self.flights_lock:
+            flight = self.flights.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[full_key] = _Flight()
+        if not leader:
+            flight.done.wait(WAIT_TIMEOUT)
+            if flight.error is not None:
+                raise flight.error
+            if flight.value is not _MISSING:
+                return flight.value
+            return compute()
+
+        try:
+            flight.value = self.lead(full_key, compute)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            flight.done.set()
+            with self.flights_lock:
+                self.flights.pop(full_key, None)
+
+    def lead(self, full_key, compute):
+        lock_key = f"{full_key}:lock"
+        acquired = self.l2.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+        if not acquired:
+            # Another process is computing it; its result is usually in L2 well before WAIT_TIMEOUT
+            deadline = time.monotonic() + WAIT_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(WAIT_INTERVAL)
+                entry = self.l2.get(full_key)
+                if entry is not None:
+                    self.l1.set(full_key, entry, min(L1_TTL, self.ttl))
+                    return entry["value"]
+        try:
+            value = compute()
+            self.store(full_key, value)
+            return value
+        finally:
+            # After a timed-out wait the lock is still the other process's
+            if acquired:
+                self.l2.delete(lock_key)
+
+    def store(self, full_key, value):
+        entry = {"value": value, "fresh_until": time.time() + self.ttl}
+        self.l2.set(full_key, entry, timeout=self.ttl + self.stale)
+        self.l1.set(full_key, entry, min(L1_TTL, self.ttl))
+
+    def refresh_in_background(self, full_key, compute):
+        """Recompute a stale value off the request thread, if nobody else is already doing it."""
+        with self.flights_lock:
+            if full_key in self.flights:
+                return
+            self.flights[full_key] = flight = _Flight()
+
+        def refresh():
+            try:
+                if self.l2.add(f"{full_key}:lock", 1, timeout=LOCK_TIMEOUT):
+                    try:
+                        flight.value = compute()
+                        self.store(full_key, flight.value)
+                    finally:
+                        self.l2.delete(f"{full_key}:lock")
+            except Exception:
+                log.exception(f"❌ Background refresh of {full_key} failed")
+            finally:
+                flight.done.set()
+                with self.flights_lock:
+                    self.flights.pop(full_key, None)
+                connection.close()
+
+        threading.Thread(target=refresh, name=f"cache-refresh:{self.name}", daemon=True).start()
+
+
+PROPERTIES = Namespace("properties", ttl=60 * 5, stale=60 * 10)
+AGENTS = Namespace("agents", ttl=60 * 10, stale=60 * 30)
+# S3 image URLs in blog payloads are presigned, so stale blog pages are kept well under their expiry
+BLOGS = Namespace("blogs", ttl=60 * 5, stale=60 * 5)
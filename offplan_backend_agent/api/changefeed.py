@@ -0,0 +1,150 @@
+"""
+Property change feed (transactional outbox).
+
+Everything that changes a property appends a PropertyChange row in the same
+transaction: the sync writer, tombstoning, and admin saves via api/signals.py.
+Recording a change also invalidates the PROPERTIES cache namespace once the
+transaction commits.
+Consumers read the feed in id order and keep their position in
+ChangeFeedCursor, so cache purges, snapshots or translations can process only
+the properties that changed since their last run:
+
+    @consumer("search_index", sections={DETAILS, STATUS, REMOVED})
+    def reindex(changes):  # {property_id: {"details", ...}}
+        ...
+
+and `manage.py consume_property_changes search_index` (or GET /property-changes/)
+to drain it.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from api.cache import PROPERTIES
+from api.image_derivatives import generate_derivatives
+from api.models import ChangeFeedCursor, ImageDerivative, Property, PropertyChange, PropertyImage
+from api.rails import refresh_rails
+from api.scheduler import advisory_lock
+
+log = logging.getLogger(__name__)
+
+DETAILS = "details"   # the property row itself: text, prices, lookups, facilities
+UNITS = "units"
+IMAGES = "images"     # cover or gallery
+PLANS = "plans"       # payment plans and their values
+STATUS = "status"     # property/sales status, or back in the feed after a tombstone
+REMOVED = "removed"   # tombstoned; purge_removed_properties deletes it later
+TRANSLATIONS = "translations"  # Arabic/Farsi text refreshed by translate_properties
+SECTIONS = (DETAILS, UNITS, IMAGES, PLANS, STATUS, REMOVED, TRANSLATIONS)
+
+# Ids come from a sequence, so a slow transaction can commit a lower id after a
+# consumer has moved past it. Rows younger than this are left for the next read.
+SETTLE_SECONDS = 30
+DEFAULT_BATCH_SIZE = 500
+
+
+def record_changes(changes, source=""):
+    """Append one outbox row per property; changes is {property_id: sections}. Call inside the writing transaction."""
+    rows = [
+        PropertyChange(property_id=prop_id, sections=sorted(sections), source=source)
+        for prop_id, sections in changes.items() if sections
+    ]
+    PropertyChange.objects.bulk_create(rows)
+    if rows:
+        transaction.on_commit(PROPERTIES.bump)
+    return len(rows)
+
+
+def read_changes(after=0, limit=DEFAULT_BATCH_SIZE, sections=None, settle=SETTLE_SECONDS):
+    """Settled changes with id > after, oldest first."""
+    queryset = PropertyChange.objects.filter(
+        id__gt=after, created_at__lte=timezone.now() - timedelta(seconds=settle)
+    )
+    if sections:
+        queryset = queryset.filter(sections__overlap=list(sections))
+    return list(queryset.order_by("id")[:limit])
+
+
+def coalesce(rows, sections=None):
+    """Merge rows into {property_id: sections}, keeping only the given sections."""
+    changes = {}
+    for row in rows:
+        wanted = set(row.sections) & sections if sections else set(row.sections)
+        if wanted:
+            changes.setdefault(row.property_id, set()).update(wanted)
+    return changes
+
+
+@dataclass(frozen=True)
+class Consumer:
+    name: str
+    handler: object  # handler({property_id: sections})
+    sections: frozenset = frozenset()  # empty means every section
+
+
+CONSUMERS = {}
+
+
+def consumer(name, sections=()):
+    """Register a handler under a cursor name."""
+    def register(handler):
+        CONSUMERS[name] = Consumer(name, handler, frozenset(sections))
+        return handler
+    return register
+
+
+def consume(consumer, batch_size=DEFAULT_BATCH_SIZE, max_batches=None):
+    """
+    Feed new changes to consumer.handler batch by batch and advance its cursor.
+
+    A Postgres advisory lock named after the consumer keeps two processes from
+    working it at once; when another holds it this returns 0 straight away. The
+    handler runs outside any transaction (image rendering can take minutes) and
+    the cursor only moves once it returns, so a failing batch is retried on the
+    next run. Returns the number of rows read.
+    """
+    processed = batches = 0
+    with advisory_lock(f"changefeed:{consumer.name}") as acquired:
+        if not acquired:
+            log.info(f"⏭️ {consumer.name}: another process is consuming, skipping")
+            return 0
+        cursor, _ = ChangeFeedCursor.objects.get_or_create(consumer=consumer.name)
+        while max_batches is None or batches < max_batches:
+            rows = read_changes(after=cursor.position, limit=batch_size)
+            if not rows:
+                break
+            changes = coalesce(rows, consumer.sections)
+            if changes:
+                consumer.handler(changes)
+            cursor.position = rows[-1].id
+            cursor.save(update_fields=["position", "updated_at"])
+            processed += len(rows)
+            batches += 1
+            log.info(f"📬 {consumer.name}: {len(changes)} properties from {len(rows)} changes (cursor {cursor.position})")
+    return processed
+
+
+# Built-in consumers
+
+@consumer("image_derivatives", sections={DETAILS, IMAGES})
+def render_changed_images(changes):
+    """Render derivatives for the new images of changed properties only."""
+    ids = list(changes)
+    urls = set(
+        Property.objects.filter(id__in=ids).exclude(cover__isnull=True).exclude(cover="").values_list("cover", flat=True)
+    )
+    urls.update(PropertyImage.objects.filter(property_id__in=ids).exclude(image="").values_list("image", flat=True))
+    urls -= set(ImageDerivative.objects.filter(source_url__in=urls).values_list("source_url", flat=True))
+    if urls:
+        generate_derivatives(sorted(urls))
+
+
+@consumer("property_rails", sections={DETAILS, STATUS, REMOVED})
+def refresh_property_rails(changes):
+    """Re-rank the rails of the changed properties' old and new groups."""
+    refresh_rails(changes)
+    # The rails endpoint may have been cached from the old rails since the change itself bumped PROPERTIES
+    transaction.on_commit(PROPERTIES.bump)
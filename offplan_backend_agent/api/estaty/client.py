@@ -0,0 +1,153 @@
+import json
+import logging
+import time
+
+import requests
+from django.conf import settings
+
+from api.estaty.fixtures import RECORD, fixture_session
+from api.estaty.http_cache import ResponseCache, body_hash, cache_key
+from api.estaty.streaming import iter_json_array
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_RETRIES = 2
+RETRY_BACKOFF = 1.0  # seconds, doubled per attempt
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class EstatyClient:
+    """
+    Thin wrapper over the Estaty REST API.
+
+    One requests.Session is reused for every call so keep-alive connections
+    are shared across the hundreds of detail requests a sync makes. Methods
+    raise requests.RequestException; callers decide whether a failure is fatal.
+    Connection errors, timeouts and gateway errors are retried with backoff.
+
+    When given PipelineMetrics, every request reports its time ("http"),
+    bytes and retries into it. The default session records or replays
+    responses when settings.ESTATY_FIXTURES asks for it (see fixtures.py).
+
+    With a ResponseCache, non-streamed requests are made conditional and
+    fetch() reports whether the body is the same as last time (see http_cache.py).
+    """
+
+    def __init__(self, api_key=None, base_url=None, session=None, timeout=DEFAULT_TIMEOUT,
+                 metrics=None, max_retries=MAX_RETRIES, cache=None):
+        self.api_key = api_key or settings.ESTATY_API_KEY
+        if not self.api_key:
+            raise RuntimeError("❌ Missing ESTATY_API_KEY in Django settings.")
+        self.base_url = (base_url or settings.ESTATY_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.metrics = metrics
+        self.max_retries = max_retries
+        self.cache = cache
+        self.session = session or fixture_session()
+        self.session.headers.update({
+            "App-key": self.api_key,
+            "Content-Type": "application/json",
+        })
+
+    def _record(self, seconds, size=0):
+        if self.metrics:
+            self.metrics.add_time("http", seconds)
+            self.metrics.incr("http.requests")
+            self.metrics.incr("http.bytes", size)
+
+    def _incr(self, name, value=1):
+        if self.metrics:
+            self.metrics.incr(name, value)
+
+    def _send(self, endpoint, payload=None, params=None, stream=False, headers=None):
+        url = f"{self.base_url}/{endpoint}"
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.post(
+                    url, json=payload or {}, params=params, timeout=self.timeout, stream=stream,
+                    headers=headers,
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(time.perf_counter() - start)
+                if attempt == self.max_retries:
+                    raise
+            else:
+                self._record(time.perf_counter() - start, 0 if stream else len(response.content))
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response
+                response.close()
+
+            if self.metrics:
+                self.metrics.incr("http.retries")
+            log.warning(f"⚠️ Retrying {endpoint} (attempt {attempt + 2}/{self.max_retries + 1})")
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    def fetch(self, endpoint, payload=None, params=None):
+        """(parsed body, unchanged): unchanged is True when the body matches the cached one."""
+        if self.cache is None:
+            return self._send(endpoint, payload, params).json(), False
+
+        key = cache_key(endpoint, payload, params)
+        entry = self.cache.get(key)
+        # Fixtures are keyed without headers, so a recording must hold full bodies, never a bodiless 304
+        validators = {} if settings.ESTATY_FIXTURES == RECORD else ResponseCache.validators(entry)
+        response = self._send(endpoint, payload, params, headers=validators)
+        if response.status_code == 304:
+            if entry:
+                self._incr("http.not_modified")
+                return json.loads(entry["body"]), True
+            # Nothing cached to reuse (a proxy answered, or the entry was lost): ask for the body outright
+            log.warning(f"⚠️ {endpoint} answered 304 without a cached entry, refetching")
+            response = self._send(endpoint, payload, params, headers={"Cache-Control": "no-cache"})
+            if response.status_code == 304:
+                raise requests.HTTPError(f"{endpoint} answered 304 to an unconditional request", response=response)
+
+        content = response.content
+        unchanged = entry is not None and entry["hash"] == body_hash(content)
+        if unchanged:
+            self._incr("http.unchanged")
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if not unchanged or (etag, last_modified) != (entry.get("etag"), entry.get("last_modified")):
+            self.cache.put(key, content, etag=etag, last_modified=last_modified)
+        return response.json(), unchanged
+
+    def post(self, endpoint, payload=None, params=None):
+        return self.fetch(endpoint, payload, params)[0]
+
+    def get_filters(self):
+        return self.post("getFilters")
+
+    def get_properties_page(self, page=1):
+        """One page of property summaries: {"data": [...], "last_page": n, "next_page_url": ...}."""
+        params = {"page": page} if page > 1 else None
+        return self.post("getProperties", params=params).get("properties") or {}
+
+    def get_property(self, property_id):
+        return self.fetch_property(property_id)[0]
+
+    def fetch_property(self, property_id):
+        """(property document, unchanged since the cached response)."""
+        data, unchanged = self.fetch("getProperty", {"id": property_id})
+        return data.get("property"), unchanged
+
+    def filter_properties(self, payload=None):
+        return self.post("filter", payload).get("properties") or []
+
+    def iter_filter_properties(self, payload=None, chunk_size=STREAM_CHUNK_SIZE):
+        """Like filter_properties, but parses the response incrementally and yields one property at a time."""
+        with self._send("filter", payload, stream=True) as response:
+            yield from iter_json_array(self._counted(response.iter_content(chunk_size=chunk_size)), "properties")
+
+    def _counted(self, chunks):
+        for chunk in chunks:
+            if self.metrics:
+                self.metrics.incr("http.bytes", len(chunk))
+            yield chunk
+
+    def find_property_by_name(self, property_name):
+        matches = self.filter_properties({"property_name": property_name})
+        return matches[0] if matches else None
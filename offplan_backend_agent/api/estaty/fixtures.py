@@ -0,0 +1,171 @@
+"""
+Record/replay of Estaty responses, for running the sync commands offline.
+
+ESTATY_FIXTURES = "record" passes requests through to Estaty and stores every
+response as a gzipped JSON fixture under ESTATY_FIXTURES_DIR. "replay" serves
+the stored responses instead, never touching the network, after
+ESTATY_REPLAY_LATENCY_MS (± ESTATY_REPLAY_JITTER_MS) to mimic the real API.
+Both are requests transport adapters mounted on the session that
+EstatyClient uses, so every command built on the client records and replays
+without changes; see `manage.py estaty_fixtures`.
+
+Fixtures are keyed on method, endpoint, query and canonical JSON body. Headers
+are not part of the key and are not stored, so the API key never reaches disk.
+"""
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class FixtureMissing(requests.RequestException):
+    """Replay found no recording for a request."""
+
+
+class FixtureStore:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    @staticmethod
+    def key(request):
+        parts = urlsplit(request.url)
+        endpoint = parts.path.rstrip("/").rsplit("/", 1)[-1] or "root"
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode("utf-8")
+        except ValueError:
+            pass
+        query = "&".join(f"{k}={v}" for k, v in sorted(parse_qsl(parts.query)))
+        digest = hashlib.sha1(b"\n".join([request.method.encode(), query.encode(), body])).hexdigest()
+        return endpoint, digest[:20]
+
+    def path(self, request):
+        endpoint, digest = self.key(request)
+        return self.root / endpoint / f"{digest}.json.gz"
+
+    def save(self, request, response):
+        path = self.path(request)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fixture = {
+            "request": {"method": request.method, "url": request.url, "body": _text(request.body)},
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "application/json"),
+            "body": response.content.decode(response.encoding or "utf-8", errors="replace"),
+        }
+        # Write-then-rename, so concurrent fetch threads never leave a torn fixture
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f, gzip.GzipFile(fileobj=f, mode="wb") as gz:
+            gz.write(json.dumps(fixture, ensure_ascii=False).encode("utf-8"))
+        os.replace(tmp, path)
+
+    def load(self, request):
+        path = self.path(request)
+        try:
+            with gzip.open(path, "rb") as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            raise FixtureMissing(f"No recorded response for {request.method} {request.url} ({path})", request=request)
+
+    def stats(self):
+        """{endpoint: (fixtures, compressed bytes)}."""
+        stats = {}
+        for path in self.root.glob("*/*.json.gz"):
+            count, size = stats.get(path.parent.name, (0, 0))
+            stats[path.parent.name] = (count + 1, size + path.stat().st_size)
+        return stats
+
+
+def _text(body):
+    if isinstance(body, bytes):
+        return body.decode("utf-8", errors="replace")
+    return body
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Sends requests for real and stores each response before returning it."""
+
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        response.content  # read the whole body, even for streamed responses, so it can be stored
+        if response.status_code == 304:
+            # Headers are not part of the key; storing this would replace the full response it validated
+            log.warning(f"⚠️ Not recording 304 for {request.method} {request.url}")
+        else:
+            self.store.save(request, response)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Serves stored responses after a simulated round trip; never opens a connection."""
+
+    def __init__(self, store, latency=0.0, jitter=0.0):
+        super().__init__()
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+
+    def send(self, request, stream=False, **kwargs):
+        fixture = self.store.load(request)
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        body = fixture["body"].encode("utf-8")
+        response = requests.Response()
+        response.status_code = fixture["status"]
+        response.headers["Content-Type"] = fixture["content_type"]
+        response.headers["Content-Length"] = str(len(body))
+        response.encoding = "utf-8"
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.reason = "Replayed"
+        return response
+
+    def close(self):
+        pass
+
+
+def fixture_session(mode=None):
+    """A requests.Session with the configured fixture adapter mounted, or a plain one."""
+    mode = mode if mode is not None else getattr(settings, "ESTATY_FIXTURES", "")
+    session = requests.Session()
+    if not mode:
+        return session
+    store = FixtureStore(settings.ESTATY_FIXTURES_DIR)
+    if mode == RECORD:
+        adapter = RecordingAdapter(store)
+    elif mode == REPLAY:
+        adapter = ReplayAdapter(
+            store,
+            latency=settings.ESTATY_REPLAY_LATENCY_MS / 1000,
+            jitter=settings.ESTATY_REPLAY_JITTER_MS / 1000,
+        )
+    else:
+        raise ValueError(f"ESTATY_FIXTURES must be '{RECORD}', '{REPLAY}' or empty, not {mode!r}")
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    log.info(f"📼 Estaty fixtures: {mode} ({store.root})")
+    return session
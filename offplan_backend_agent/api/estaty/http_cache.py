@@ -0,0 +1,79 @@
+"""
+Persistent response cache for the Estaty client.
+
+Each cached response is stored on disk with its validators (ETag,
+Last-Modified) and a hash of its body, keyed by endpoint, query and JSON
+payload. The client sends the validators back as If-None-Match /
+If-Modified-Since; on 304 the stored body is used. Estaty often ignores them, so
+a 200 whose body hashes the same as last time is reported as unchanged too.
+Either way the pipeline can skip normalizing a property it already has.
+
+The sync commands use response_cache(), which follows ESTATY_HTTP_CACHE and
+ESTATY_HTTP_CACHE_DIR; a client built without a cache behaves as before.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+
+def cache_key(endpoint, payload=None, params=None):
+    body = json.dumps(payload or {}, sort_keys=True, separators=(",", ":"))
+    query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+    return endpoint, hashlib.sha1(f"{query}\n{body}".encode("utf-8")).hexdigest()[:20]
+
+
+def body_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path(self, key):
+        endpoint, digest = key
+        return self.root / endpoint / f"{digest}.json.gz"
+
+    def get(self, key):
+        """{"etag", "last_modified", "hash", "body"} or None."""
+        try:
+            with gzip.open(self.path(key), "rb") as f:
+                return json.loads(f.read())
+        except (FileNotFoundError, EOFError, ValueError):
+            return None
+
+    def put(self, key, content, etag=None, last_modified=None):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "hash": body_hash(content),
+            "body": content.decode("utf-8"),
+        }
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f, gzip.GzipFile(fileobj=f, mode="wb") as gz:
+            gz.write(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def validators(entry):
+        """Conditional request headers for a cached entry."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
+def response_cache():
+    """The configured ResponseCache, or None when ESTATY_HTTP_CACHE is off."""
+    if not settings.ESTATY_HTTP_CACHE:
+        return None
+    return ResponseCache(settings.ESTATY_HTTP_CACHE_DIR)
@@ -0,0 +1,100 @@
+import logging
+
+from api.models import City, District, DeveloperCompany, PropertyType, PropertyStatus, SalesStatus, Facility
+
+log = logging.getLogger(__name__)
+
+# Flush order matters: districts reference cities
+LOOKUP_TABLES = [City, District, DeveloperCompany, PropertyType, PropertyStatus, SalesStatus, Facility]
+
+
+class LookupCache:
+    """
+    Run-scoped identity map for the small lookup tables.
+
+    Each table is loaded once per run. resolve() answers from memory and
+    queues only ids that are new or renamed; flush() writes the queue with
+    one bulk upsert per table. A sync of a few thousand properties touches
+    a few hundred distinct lookup values, so almost every resolve is a hit.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self.rows = {}      # model -> {id: (name, city_id)}
+        self.pending = {}   # model -> {id: (name, city_id)}
+
+    def _incr(self, key, amount=1):
+        if self.metrics:
+            self.metrics.incr(key, amount)
+
+    def table(self, model):
+        if model not in self.rows:
+            fields = ("id", "name", "city_id") if model is District else ("id", "name")
+            self.rows[model] = {
+                row[0]: (row[1], row[2] if model is District else None)
+                for row in model.objects.values_list(*fields)
+            }
+            self._incr("lookups.loaded_rows", len(self.rows[model]))
+        return self.rows[model]
+
+    def resolve(self, model, ref):
+        """
+        Return the id to store for ref ({"id", "name"[, "city_id"]}), or None if it cannot exist.
+
+        Refs without a name only resolve against rows that already exist, as
+        the feed sometimes sends bare ids.
+        """
+        if not ref:
+            return None
+        known = self.table(model)
+        queued = self.pending.setdefault(model, {})
+        ref_id, name = ref["id"], ref.get("name")
+        city_id = ref.get("city_id") if model is District else None
+
+        current = queued.get(ref_id) or known.get(ref_id)
+        if current is not None:
+            self._incr("lookups.hit")
+            if name and (name, city_id or current[1]) != current:
+                queued[ref_id] = (name, city_id or current[1])
+            return ref_id
+
+        self._incr("lookups.miss")
+        if not name:
+            log.warning(f"⚠️ {model.__name__} ID={ref_id} received without name. Skipping creation.")
+            return None
+        queued[ref_id] = (name, city_id)
+        return ref_id
+
+    def flush(self):
+        """Write queued inserts and renames, one bulk upsert per table."""
+        for model in LOOKUP_TABLES:
+            queued = self.pending.pop(model, None)
+            if not queued:
+                continue
+            objs = []
+            for ref_id, (name, city_id) in queued.items():
+                obj = model(id=ref_id, name=name)
+                if model is District:
+                    # Drop dangling city references rather than failing the batch
+                    obj.city_id = city_id if city_id in self.table(City) else None
+                objs.append(obj)
+            update_fields = ["name", "city"] if model is District else ["name"]
+            model.objects.bulk_create(objs, update_conflicts=True, unique_fields=["id"], update_fields=update_fields)
+
+            known = self.table(model)
+            created = sum(1 for obj in objs if obj.id not in known)
+            for obj in objs:
+                known[obj.id] = (obj.name, getattr(obj, "city_id", None) if model is District else None)
+            self._incr(f"lookups.created.{model.__name__}", created)
+            self._incr(f"lookups.renamed.{model.__name__}", len(objs) - created)
+
+    def reset(self):
+        """Forget everything, e.g. after a rolled-back batch left the maps ahead of the database."""
+        self.rows.clear()
+        self.pending.clear()
+
+    def hit_rate(self):
+        if not self.metrics:
+            return None
+        hits, misses = self.metrics.counts["lookups.hit"], self.metrics.counts["lookups.miss"]
+        return hits / (hits + misses) if hits + misses else None
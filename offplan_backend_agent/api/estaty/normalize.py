@@ -0,0 +1,247 @@
+"""
+One normalized schema for Estaty property documents.
+
+Every importer used to map the feed onto the models itself, and they
+disagreed (delivery_date as YYYYMM vs UNIX timestamp, "Unit_Type" vs
+"unit_type", floor_plan_image as a JSON string vs a URL). Everything that
+writes Estaty data now goes through normalize_property().
+"""
+import json
+import logging
+from datetime import datetime
+
+from dateutil import parser as date_parser
+from django.utils import timezone
+
+log = logging.getLogger(__name__)
+
+EMPTY_VALUES = (None, "", [])
+
+# Property columns owned by the feed. Translations (arabic_title, ...) are not listed so syncs never clobber them.
+PROPERTY_FIELDS = [
+    "title", "description", "cover", "address", "address_text", "delivery_date",
+    "completion_rate", "residential_units", "commercial_units", "payment_plan",
+    "post_delivery", "payment_minimum_down_payment", "guarantee_rental_guarantee",
+    "guarantee_rental_guarantee_value", "downPayment", "low_price", "min_area", "updated_at",
+]
+
+# Property FK -> key in the Estaty document
+LOOKUP_SOURCE_KEYS = {
+    "city": "city",
+    "district": "district",
+    "developer": "developer_company",
+    "property_type": "property_type",
+    "property_status": "property_status",
+    "sales_status": "sales_status",
+}
+
+UNIT_FIELDS = [
+    "property_id", "apartment_id", "apartment_type_id", "no_of_baths", "status", "area", "area_type",
+    "start_area", "end_area", "price", "price_type", "start_price", "end_price", "floor_no", "apt_no",
+    "floor_plan_image", "unit_image", "unit_count", "is_demand", "created_at", "updated_at",
+]
+
+
+def parse_unix_date(raw_date):
+    """Delivery dates arrive as "MM/YYYY", ISO strings or timestamps; always return a UNIX timestamp."""
+    if raw_date in EMPTY_VALUES:
+        return None
+    if isinstance(raw_date, (int, float)):
+        return int(raw_date)
+    if not isinstance(raw_date, str):
+        return None
+    try:
+        if "/" in raw_date:
+            dt = datetime.strptime(raw_date.strip(), "%m/%Y")
+        else:
+            dt = date_parser.parse(raw_date)
+        return int(dt.timestamp())
+    except (ValueError, OverflowError):
+        return None
+
+
+def legacy_delivery_date(value):
+    """
+    UNIX timestamp for a delivery_date stored as YYYYMM by the old importers, or
+    None when value is not in that form (timestamps that large are from 1970).
+    """
+    if value is None or not 190001 <= value <= 299912 or not 1 <= value % 100 <= 12:
+        return None
+    return parse_unix_date(f"{value % 100:02d}/{value // 100}")
+
+
+def parse_datetime(raw, default=None):
+    if not raw:
+        return default
+    try:
+        dt = date_parser.parse(raw)
+    except (ValueError, OverflowError, TypeError):
+        return default
+    return timezone.make_aware(dt) if timezone.is_naive(dt) else dt
+
+
+def as_bool(value):
+    return value in (True, 1, "1", "true", "True")
+
+
+def first_floor_plan(raw):
+    """floor_plan_image is a JSON-encoded list of URLs; keep the first one."""
+    if raw in EMPTY_VALUES:
+        return None
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError:
+            return raw.replace("\\/", "/")
+    if isinstance(raw, list):
+        return raw[0].replace("\\/", "/") if raw and isinstance(raw[0], str) else None
+    return None
+
+
+def lookup_ref(value):
+    """{"id": .., "name": ..} for embedded objects, {"id": ..} for bare ids, else None."""
+    if isinstance(value, dict):
+        if not value.get("id"):
+            return None
+        return {"id": value["id"], "name": value.get("name")}
+    if isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+        return {"id": int(value)}
+    return None
+
+
+def normalize_unit(raw, property_id):
+    now = timezone.now()
+    return {
+        "id": raw["id"],
+        "property_id": property_id,
+        "apartment_id": raw.get("apartment_id"),
+        "apartment_type_id": raw.get("apartment_type_id"),
+        "no_of_baths": raw.get("no_of_baths"),
+        "status": raw.get("status") or "Unknown",
+        "area": raw.get("area") or 0,
+        "area_type": raw.get("area_type"),
+        "start_area": raw.get("start_area"),
+        "end_area": raw.get("end_area"),
+        "price": raw.get("price") or 0,
+        "price_type": raw.get("price_type"),
+        "start_price": raw.get("start_price"),
+        "end_price": raw.get("end_price"),
+        "floor_no": raw.get("floor_no"),
+        "apt_no": raw.get("apt_no"),
+        "floor_plan_image": first_floor_plan(raw.get("floor_plan_image")),
+        "unit_image": raw.get("unit_image"),
+        "unit_count": raw.get("unit_count") or 1,
+        "is_demand": as_bool(raw.get("is_demand")),
+        "created_at": parse_datetime(raw.get("created_at"), now),
+        "updated_at": parse_datetime(raw.get("updated_at"), now),
+    }
+
+
+def normalize_units(raw_units, property_id):
+    units = []
+    for raw in raw_units or []:
+        if not raw.get("id"):
+            log.debug(f"⚠️ Skipping unit with no ID for Property {property_id}")
+            continue
+        units.append(normalize_unit(raw, property_id))
+    return units
+
+
+def normalize_property(raw):
+    """
+    Map one Estaty property document onto the model layout.
+
+    "units" is None when the document has no apartment list at all, which
+    writers treat as "leave the stored units alone".
+    """
+    prop_id = raw["id"]
+
+    lookups = {field: lookup_ref(raw.get(key)) for field, key in LOOKUP_SOURCE_KEYS.items()}
+    if lookups["district"]:
+        district = raw.get("district")
+        city_id = district.get("city_id") if isinstance(district, dict) else None
+        lookups["district"]["city_id"] = city_id or (lookups["city"] or {}).get("id")
+
+    facilities = []
+    for entry in raw.get("property_facilities") or []:
+        ref = lookup_ref(entry.get("facility") or entry) if isinstance(entry, dict) else lookup_ref(entry)
+        if ref:
+            facilities.append(ref)
+
+    grouped_apartments = []
+    for group in raw.get("grouped_apartments") or []:
+        group = {k.lower(): v for k, v in group.items()}
+        grouped_apartments.append({
+            "unit_type": group.get("unit_type") or "Unknown",
+            "rooms": group.get("rooms") or "Unknown",
+            "min_price": group.get("min_price"),
+            "min_area": group.get("min_area"),
+        })
+
+    images = [
+        {
+            "image": image["image"],
+            "type": image.get("type") or 2,
+            "created_at": parse_datetime(image.get("created_at")),
+            "updated_at": parse_datetime(image.get("updated_at")),
+        }
+        for image in raw.get("property_images") or []
+        if image.get("image")
+    ]
+
+    payment_plans = [
+        {
+            "name": plan.get("name") or "Unnamed Plan",
+            "description": plan.get("description") or "",
+            "values": [
+                {"name": value.get("name") or "", "value": str(value.get("value") or "")}
+                for value in plan.get("values") or []
+            ],
+        }
+        for plan in raw.get("payment_plans") or []
+    ]
+
+    raw_units = raw.get("apartment")
+    return {
+        "id": prop_id,
+        "fields": {
+            "title": raw.get("title") or f"Untitled Property {prop_id}",
+            "description": raw.get("description") or "",
+            "cover": raw.get("cover"),
+            "address": raw.get("address"),
+            "address_text": raw.get("address_text"),
+            "delivery_date": parse_unix_date(raw.get("delivery_date")),
+            "completion_rate": raw.get("completion_rate") or 0,
+            "residential_units": raw.get("residential_units") or 0,
+            "commercial_units": raw.get("commercial_units") or 0,
+            "payment_plan": raw.get("payment_plan") or 0,
+            "post_delivery": as_bool(raw.get("post_delivery")),
+            "payment_minimum_down_payment": raw.get("payment_minimum_down_payment") or 0,
+            "guarantee_rental_guarantee": as_bool(raw.get("guarantee_rental_guarantee")),
+            "guarantee_rental_guarantee_value": raw.get("guarantee_rental_guarantee_value") or 0,
+            "downPayment": raw.get("downPayment") or 0,
+            "low_price": raw.get("low_price") or 0,
+            "min_area": raw.get("min_area") or 0,
+            "updated_at": parse_datetime(raw.get("updated_at"), timezone.now()),
+        },
+        "lookups": lookups,
+        "facilities": facilities,
+        "grouped_apartments": grouped_apartments,
+        "images": images,
+        "payment_plans": payment_plans,
+        "units": None if raw_units is None else normalize_units(raw_units, prop_id),
+    }
+
+
+def fill_missing(primary, fallback):
+    """Copy fields that are empty in primary from fallback (e.g. /getProperty filled in from /filter)."""
+    merged = dict(primary)
+    for key, value in fallback.items():
+        if merged.get(key) in EMPTY_VALUES and value not in EMPTY_VALUES:
+            merged[key] = value
+    return merged
+
+
+def merge_units(primary_units, fallback_units):
+    fallback_by_id = {unit["id"]: unit for unit in fallback_units or [] if unit.get("id")}
+    return [fill_missing(unit, fallback_by_id.get(unit.get("id"), {})) for unit in primary_units or []]
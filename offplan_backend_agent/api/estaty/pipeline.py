@@ -0,0 +1,428 @@
+"""
+Estaty sync pipeline: listing source -> fetch -> normalize -> diff -> bulk write.
+
+Stages are plain callables taking (batch, pipeline) and returning the next
+batch, so a command can drop, swap or add stages (e.g. a units-only import)
+without re-implementing the rest. Every stage is timed into PipelineMetrics.
+
+With prefetch, the source and the network stages run on a producer thread
+that stays up to `prefetch` batches ahead of the stages that use the
+database, which run on the calling thread, the only one that writes.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from api.estaty.lookups import LookupCache
+from api.estaty.normalize import fill_missing, merge_units, normalize_property, parse_datetime
+from api.estaty.telemetry import PipelineMetrics
+from api.estaty.writer import BulkWriter
+from api.models import Property, PropertyUnit
+
+log = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+UNCHANGED = "_unchanged"
+
+
+class ListingSource:
+    """
+    Pages through /getProperties and yields one batch of summaries per page.
+
+    complete is only True when the crawl reached the last page without an
+    error, which is the precondition for deleting properties we did not see.
+    """
+    name = "listing"
+
+    def __init__(self, client, max_pages=None):
+        self.client = client
+        self.max_pages = max_pages
+        self.seen_ids = set()
+        self.complete = False
+
+    def __call__(self, pipeline):
+        page = 1
+        while self.max_pages is None or page <= self.max_pages:
+            try:
+                with pipeline.metrics.stage(self.name):
+                    listing = self.client.get_properties_page(page)
+            except requests.RequestException as e:
+                log.error(f"❌ Failed to fetch page {page}: {e}")
+                return
+
+            summaries = [s for s in listing.get("data") or [] if s.get("id")]
+            if not summaries:
+                self.complete = True
+                return
+            self.seen_ids.update(s["id"] for s in summaries)
+            pipeline.metrics.incr("listing.pages")
+            yield summaries
+
+            if "next_page_url" in listing and not listing["next_page_url"]:
+                self.complete = True
+                return
+            page += 1
+
+
+class IdSource:
+    """Yields fixed batches of property ids, for re-syncing a known set."""
+    name = "ids"
+
+    def __init__(self, property_ids, batch_size=50):
+        self.property_ids = list(property_ids)
+        self.batch_size = batch_size
+        self.seen_ids = set(self.property_ids)
+        self.complete = False  # never authoritative for deletions
+
+    def __call__(self, pipeline):
+        for start in range(0, len(self.property_ids), self.batch_size):
+            yield [{"id": prop_id} for prop_id in self.property_ids[start:start + self.batch_size]]
+
+
+def iter_filter_apartments(client):
+    """(property_id, apartments) for every property in the /filter catalogue, parsed as it streams in."""
+    for prop in client.iter_filter_properties({}):
+        if prop.get("id"):
+            yield prop["id"], prop.get("apartment") or []
+
+
+def load_filter_apartments(client):
+    """Apartments for every property from one empty /filter call, keyed by property id."""
+    try:
+        apartments = dict(iter_filter_apartments(client))
+    except (requests.RequestException, ValueError) as e:
+        log.error(f"❌ Failed to fetch properties from /filter: {e}")
+        return {}
+    log.info(f"✅ Cached apartments for {len(apartments)} properties")
+    return apartments
+
+
+class FilterApartmentsSource:
+    """
+    Streams /filter and yields batches of {"id", "apartment"} documents.
+
+    Used with unit_stages() so units are synced straight from the bulk
+    payload without ever holding the whole catalogue in memory.
+    """
+    name = "filter"
+
+    def __init__(self, client, batch_size=50):
+        self.client = client
+        self.batch_size = batch_size
+        self.seen_ids = set()
+        self.complete = False
+
+    def __call__(self, pipeline):
+        batch = []
+        stream = iter_filter_apartments(self.client)
+        try:
+            while True:
+                with pipeline.metrics.stage(self.name):
+                    pair = next(stream, None)
+                if pair is None:
+                    break
+                prop_id, apartments = pair
+                self.seen_ids.add(prop_id)
+                batch.append({"id": prop_id, "apartment": apartments})
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        except (requests.RequestException, ValueError) as e:
+            log.error(f"❌ Failed to stream properties from /filter: {e}")
+            return
+        if batch:
+            yield batch
+        self.complete = True
+
+
+class FetchDetails:
+    """
+    Fetches /getProperty for every summary in the batch on a thread pool.
+
+    unit_fallback supplies apartments for documents that come back without
+    them; merge_filter_by_name fills empty fields from a /filter lookup by
+    title, requested alongside /getProperty rather than after it.
+
+    A document whose /getProperty body matches the client's cached response,
+    and that took nothing from the other sources, is marked UNCHANGED so
+    Normalize can pass it through untouched.
+    """
+    name = "fetch"
+
+    def __init__(self, client, workers=DEFAULT_WORKERS, unit_fallback=None, merge_filter_by_name=False):
+        self.client = client
+        self.workers = workers
+        self.unit_fallback = unit_fallback or {}
+        self.merge_filter_by_name = merge_filter_by_name
+
+    def merge(self, summary, detail, by_name):
+        prop_id = summary["id"]
+        try:
+            document, unchanged = detail.result()
+        except requests.RequestException as e:
+            log.error(f"❌ Failed to fetch property ID {prop_id}: {e}")
+            return None
+        if document and unchanged and not by_name:
+            document[UNCHANGED] = True
+        if document and by_name:
+            try:
+                fallback = by_name.result()
+            except requests.RequestException as e:
+                log.error(f"❌ Failed to look up property ID {prop_id} in /filter: {e}")
+                fallback = None
+            if fallback:
+                units = merge_units(document.get("apartment"), fallback.get("apartment"))
+                document = fill_missing(document, fallback)
+                document["apartment"] = units
+        if document and not document.get("apartment") and prop_id in self.unit_fallback:
+            document["apartment"] = self.unit_fallback[prop_id]
+            document.pop(UNCHANGED, None)
+        return document
+
+    def __call__(self, summaries, pipeline):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Every request of the batch is queued up front, so both lookups of a property run concurrently
+            details = [pool.submit(self.client.fetch_property, summary["id"]) for summary in summaries]
+            by_name = [
+                pool.submit(self.client.find_property_by_name, summary["title"])
+                if self.merge_filter_by_name and summary.get("title") else None
+                for summary in summaries
+            ]
+            documents = [self.merge(*args) for args in zip(summaries, details, by_name)]
+        documents = [doc for doc in documents if doc and doc.get("id")]
+        pipeline.metrics.incr("fetched", len(documents))
+        pipeline.metrics.incr("fetch.failed", len(summaries) - len(documents))
+        pipeline.metrics.incr("fetch.unchanged", sum(1 for doc in documents if doc.get(UNCHANGED)))
+        return documents
+
+
+class Normalize:
+    """
+    Turns documents into records. Documents FetchDetails marked UNCHANGED are
+    passed on as {"id", "unchanged": document}; Diff normalizes them only if
+    the stored row turns out to need rewriting after all.
+    """
+    name = "normalize"
+
+    def __call__(self, documents, pipeline):
+        records = []
+        for document in documents:
+            if document.pop(UNCHANGED, False):
+                records.append({"id": document["id"], "unchanged": document})
+                continue
+            record = self.normalize(document, pipeline)
+            if record:
+                records.append(record)
+        return records
+
+    @staticmethod
+    def normalize(document, pipeline):
+        try:
+            return normalize_property(document)
+        except (KeyError, TypeError, ValueError) as e:
+            log.error(f"❌ Could not normalize property ID {document.get('id')}: {e}")
+            pipeline.metrics.incr("normalize.failed")
+            return None
+
+
+class Diff:
+    """
+    Decides what each record needs written.
+
+    A property is rewritten when it is new, tombstoned or its updated_at moved forward;
+    its units are rewritten when the property changed, the unit count differs
+    or any unit's updated_at moved forward. force skips the comparison.
+    A record whose Estaty response is unchanged is skipped if its row is live
+    and up to date, and normalized here otherwise.
+    """
+    name = "diff"
+    uses_db = True
+
+    def __init__(self, sections=("property", "units"), force=False):
+        self.sections = set(sections)
+        self.force = force
+
+    def __call__(self, records, pipeline):
+        ids = [record["id"] for record in records]
+        stored, tombstoned = {}, set()
+        for prop_id, updated_at, removed_at in Property.objects.filter(id__in=ids).values_list(
+            "id", "updated_at", "removed_at"
+        ):
+            stored[prop_id] = updated_at
+            if removed_at:
+                tombstoned.add(prop_id)
+        stored_units = defaultdict(dict)
+        for unit_id, prop_id, updated_at in PropertyUnit.objects.filter(property_id__in=ids).values_list(
+            "id", "property_id", "updated_at"
+        ):
+            stored_units[prop_id][unit_id] = updated_at
+
+        changed = []
+        for record in records:
+            if "unchanged" in record:
+                if not self.force and self.still_current(record, stored, tombstoned):
+                    for section in self.sections:
+                        pipeline.metrics.incr(f"{section}.unchanged")
+                    continue
+                record = Normalize.normalize(record["unchanged"], pipeline)
+                if not record:
+                    continue
+            exists = record["id"] in stored
+            updated_at = record["fields"]["updated_at"]
+            # A tombstoned property that is back in the feed is rewritten, which clears removed_at
+            property_changed = (
+                self.force or not exists or record["id"] in tombstoned
+                or not stored[record["id"]] or updated_at > stored[record["id"]]
+            )
+
+            sections = set()
+            if "property" in self.sections and property_changed:
+                sections.add("property")
+                pipeline.metrics.incr("property.updated" if exists else "property.created")
+                log.debug(f"{'✅ Updating' if exists else '➕ Creating'} Property ID {record['id']}")
+            elif "property" in self.sections:
+                pipeline.metrics.incr("property.unchanged")
+
+            if "units" in self.sections and record["units"]:
+                if not exists and "property" not in sections:
+                    # Units for a property we have not imported; the FK would fail
+                    pipeline.metrics.incr("units.unknown_property")
+                elif self.force or "property" in sections or self.units_changed(record["units"], stored_units[record["id"]]):
+                    sections.add("units")
+                    pipeline.metrics.incr("units.changed")
+                    log.debug(f"📦 Syncing {len(record['units'])} units for Property ID {record['id']}")
+                else:
+                    pipeline.metrics.incr("units.unchanged")
+
+            if sections:
+                record["sections"] = sections
+                changed.append(record)
+        return changed
+
+    @staticmethod
+    def still_current(record, stored, tombstoned):
+        """The live row is at least as new as the unchanged document, so an earlier write went through."""
+        updated_at = parse_datetime(record["unchanged"].get("updated_at"))
+        stored_at = stored.get(record["id"])
+        return (
+            record["id"] not in tombstoned and updated_at is not None
+            and stored_at is not None and stored_at >= updated_at
+        )
+
+    @staticmethod
+    def units_changed(units, stored):
+        if len(units) != len(stored):
+            return True
+        return any(
+            unit["id"] not in stored or unit["updated_at"] > stored[unit["id"]]
+            for unit in units
+        )
+
+
+def default_stages(client, workers=DEFAULT_WORKERS, unit_fallback=None, merge_filter_by_name=False,
+                   sections=("property", "units"), force=False):
+    return [
+        FetchDetails(client, workers=workers, unit_fallback=unit_fallback, merge_filter_by_name=merge_filter_by_name),
+        Normalize(),
+        Diff(sections=sections, force=force),
+        BulkWriter(),
+    ]
+
+
+def unit_stages():
+    """Stages for documents that already carry their apartments (e.g. FilterApartmentsSource)."""
+    return [Normalize(), Diff(sections=("units",)), BulkWriter()]
+
+
+class EstatyPipeline:
+    def __init__(self, source, stages, metrics=None, lookups=None, prefetch=0):
+        self.source = source
+        self.stages = stages
+        self.metrics = metrics or PipelineMetrics()
+        self.lookups = lookups or LookupCache(self.metrics)
+        self.prefetch = prefetch
+
+    def apply(self, stages, batch):
+        for stage in stages:
+            with self.metrics.stage(stage.name):
+                batch = stage(batch, self)
+            if not batch:
+                return None
+        return batch
+
+    def run(self):
+        if self.prefetch:
+            self.run_prefetching()
+        else:
+            for batch in self.source(self):
+                self.apply(self.stages, batch)
+                log.debug(self.metrics.summary())
+        log.info(self.metrics.summary())
+        if (hit_rate := self.lookups.hit_rate()) is not None:
+            log.info(f"📇 Lookup cache hit rate: {hit_rate:.1%}")
+        return self.metrics
+
+    def run_prefetching(self):
+        """
+        Run source and network stages on a producer thread, the database stages here.
+
+        The queue holds at most `prefetch` batches, so a slow writer holds the
+        producer back instead of letting fetched documents pile up in memory.
+        Time the producer spends blocked is counted as "wait.backpressure",
+        time the writer waits for input as "wait.starved".
+        """
+        split = next((i for i, stage in enumerate(self.stages) if getattr(stage, "uses_db", False)), len(self.stages))
+        fetch_stages, write_stages = self.stages[:split], self.stages[split:]
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        done = object()
+        failure = []
+
+        def produce():
+            try:
+                for batch in self.source(self):
+                    batch = self.apply(fetch_stages, batch)
+                    if batch is None:
+                        continue
+                    start = time.perf_counter()
+                    while not stop.is_set():
+                        try:
+                            batches.put(batch, timeout=0.5)
+                            break
+                        except queue.Full:
+                            continue
+                    self.metrics.add_time("wait.backpressure", time.perf_counter() - start)
+                    if stop.is_set():
+                        return
+            except Exception as e:
+                failure.append(e)
+            finally:
+                batches.put(done)
+
+        producer = threading.Thread(target=produce, name="estaty-fetch", daemon=True)
+        producer.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                batch = batches.get()
+                self.metrics.add_time("wait.starved", time.perf_counter() - start)
+                if batch is done:
+                    break
+                self.apply(write_stages, batch)
+                log.debug(self.metrics.summary())
+        finally:
+            stop.set()
+            # Unblock a producer waiting on a full queue so it can see stop and exit
+            while producer.is_alive():
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            producer.join()
+        if failure:
+            raise failure[0]
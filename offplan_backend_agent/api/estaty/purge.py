@@ -0,0 +1,85 @@
+"""
+Set-based deletion of tombstoned properties.
+
+Property.delete() makes Django's collector load every unit, image, plan and
+plan value into memory and delete them row by row. Here each child table is
+cleared with one statement per batch of property ids, children first, so the
+database never has to cascade.
+"""
+import logging
+
+from django.db import connection, transaction
+
+from api.models import (
+    Property, PropertyUnit, PropertyImage, PropertyFacility, PaymentPlan, PaymentPlanValue,
+    GroupedApartment, ReserveNow,
+)
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _column(model, field_name):
+    return connection.ops.quote_name(model._meta.get_field(field_name).column)
+
+
+def purge_statements():
+    """(label, sql) pairs; every statement takes the batch of property ids as its only parameter."""
+    units_of_batch = f"SELECT id FROM {_table(PropertyUnit)} WHERE {_column(PropertyUnit, 'property')} = ANY(%s)"
+    plans_of_batch = f"SELECT id FROM {_table(PaymentPlan)} WHERE {_column(PaymentPlan, 'property')} = ANY(%s)"
+    facility_links = Property.facilities.through
+
+    def by_property(model, field="property"):
+        return f"DELETE FROM {_table(model)} WHERE {_column(model, field)} = ANY(%s)"
+
+    return [
+        # ReserveNow cascades from PropertyUnit, exactly as Property.delete() would have done
+        ("ReserveNow", f"DELETE FROM {_table(ReserveNow)} WHERE {_column(ReserveNow, 'unit_id')} IN ({units_of_batch})"),
+        ("PropertyImage.property_unit", (
+            f"UPDATE {_table(PropertyImage)} SET {_column(PropertyImage, 'property_unit')} = NULL "
+            f"WHERE {_column(PropertyImage, 'property_unit')} IN ({units_of_batch})"
+        )),
+        ("PropertyImage", by_property(PropertyImage)),
+        ("PropertyUnit", by_property(PropertyUnit)),
+        ("PaymentPlanValue", (
+            f"DELETE FROM {_table(PaymentPlanValue)} "
+            f"WHERE {_column(PaymentPlanValue, 'property_payment_plan')} IN ({plans_of_batch})"
+        )),
+        ("PaymentPlan", by_property(PaymentPlan)),
+        ("GroupedApartment", by_property(GroupedApartment)),
+        ("PropertyFacility", by_property(PropertyFacility)),
+        ("Property.facilities", by_property(facility_links)),
+        ("Property", f"DELETE FROM {_table(Property)} WHERE id = ANY(%s)"),
+    ]
+
+
+def purge_removed_properties(removed_before=None, batch_size=DEFAULT_BATCH_SIZE, max_batches=None):
+    """
+    Delete tombstoned properties and all their child rows.
+
+    Each batch runs in its own transaction, so a long purge never holds locks
+    on more than batch_size properties at a time. Returns rows deleted per table.
+    """
+    statements = purge_statements()
+    totals = {label: 0 for label, _ in statements}
+    queryset = Property.objects.removed()
+    if removed_before:
+        queryset = queryset.filter(removed_at__lt=removed_before)
+
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(queryset.order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            for label, sql in statements:
+                cursor.execute(sql, [ids])
+                totals[label] += cursor.rowcount
+        batches += 1
+        log.info(f"🗑 Purged batch {batches}: {len(ids)} properties")
+    return totals
@@ -0,0 +1,113 @@
+"""
+Property status reconciliation without a /getProperty call per property.
+
+Statuses are read from the paginated listing or one streamed /filter
+response; only properties those leave without a status are fetched
+individually, on a thread pool. The comparison against the database happens
+in memory and the differences are written with a single bulk_update.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.db import transaction
+
+from api import changefeed
+from api.estaty.lookups import LookupCache
+from api.estaty.normalize import lookup_ref
+from api.estaty.pipeline import DEFAULT_WORKERS
+from api.models import Property, PropertyStatus
+
+log = logging.getLogger(__name__)
+
+LISTING = "listing"
+FILTER = "filter"
+DETAILS = "details"
+SOURCES = (LISTING, FILTER, DETAILS)
+
+
+def status_ref(document):
+    """{"id", "name"} of the document's property status, or None when it carries none."""
+    return lookup_ref(document.get("property_status")) or lookup_ref(document.get("property_status_id"))
+
+
+def listing_statuses(client, metrics, max_pages=None):
+    """({property_id: ref}, complete) from /getProperties, one request per page."""
+    statuses, page = {}, 1
+    while max_pages is None or page <= max_pages:
+        try:
+            with metrics.stage(LISTING):
+                listing = client.get_properties_page(page)
+        except requests.RequestException as e:
+            log.error(f"❌ Failed to fetch page {page}: {e}")
+            return statuses, False
+        summaries = [s for s in listing.get("data") or [] if s.get("id")]
+        if not summaries:
+            return statuses, True
+        for summary in summaries:
+            statuses[summary["id"]] = status_ref(summary)
+        metrics.incr("listing.pages")
+        if "next_page_url" in listing and not listing["next_page_url"]:
+            return statuses, True
+        page += 1
+    return statuses, False
+
+
+def filter_statuses(client, metrics):
+    """({property_id: ref}, complete) from one streamed /filter response."""
+    statuses = {}
+    try:
+        with metrics.stage(FILTER):
+            for document in client.iter_filter_properties():
+                if document.get("id"):
+                    statuses[document["id"]] = status_ref(document)
+    except (requests.RequestException, ValueError) as e:
+        log.error(f"❌ Failed to read /filter: {e}")
+        return statuses, False
+    return statuses, True
+
+
+def detail_statuses(client, metrics, property_ids, workers=DEFAULT_WORKERS):
+    """{property_id: ref} from /getProperty, fetched concurrently; failed ids are left out."""
+    def fetch(prop_id):
+        try:
+            return prop_id, status_ref(client.get_property(prop_id) or {})
+        except requests.RequestException as e:
+            log.error(f"❌ Failed to fetch property ID {prop_id}: {e}")
+            metrics.incr("fetch.failed")
+            return prop_id, None
+
+    with metrics.stage(DETAILS), ThreadPoolExecutor(max_workers=workers) as pool:
+        return {prop_id: ref for prop_id, ref in pool.map(fetch, property_ids) if ref}
+
+
+def reconcile_statuses(statuses, metrics, dry_run=False):
+    """
+    Apply {property_id: status ref} to the stored properties it names.
+
+    Unknown status ids are created through LookupCache; properties without a
+    ref are left alone. Returns the ids whose status changed.
+    """
+    lookups = LookupCache(metrics)
+    stored = dict(Property.objects.filter(id__in=list(statuses)).values_list("id", "property_status_id"))
+    changed = []
+    for prop_id, current in stored.items():
+        status_id = lookups.resolve(PropertyStatus, statuses[prop_id])
+        if status_id is None:
+            metrics.incr("status.missing")
+        elif status_id == current:
+            metrics.incr("status.unchanged")
+        else:
+            log.debug(f"✅ Property ID {prop_id}: status {current} → {status_id}")
+            changed.append(Property(id=prop_id, property_status_id=status_id))
+    metrics.incr("status.updated", len(changed))
+    if dry_run or not changed:
+        return [prop.id for prop in changed]
+
+    with metrics.stage("write"), transaction.atomic():
+        lookups.flush()
+        Property.objects.bulk_update(changed, ["property_status"], batch_size=1000)
+        metrics.incr("changes.recorded", changefeed.record_changes(
+            {prop.id: {changefeed.STATUS} for prop in changed}, source="reconcile_status"
+        ))
+    return [prop.id for prop in changed]
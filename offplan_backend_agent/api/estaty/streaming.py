@@ -0,0 +1,77 @@
+"""
+Incremental parsing of large JSON responses.
+
+/filter with an empty payload returns every property with every apartment
+in one document. iter_json_array() walks the array under a top-level key
+and yields one element at a time, so only the element being decoded (plus
+one network chunk) is ever held in memory.
+"""
+import codecs
+import json
+import re
+
+WHITESPACE = " \t\r\n"
+
+
+def iter_json_array(chunks, key):
+    """
+    Yield the elements of the array stored under `key` from an iterable of byte chunks.
+
+    The key is located by pattern, so it should be a top-level key that does
+    not also appear as a string earlier in the document.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    chunks = iter(chunks)
+    buffer = ""
+    exhausted = False
+
+    def read_more():
+        nonlocal buffer, exhausted
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer += utf8.decode(b"", final=True)
+        else:
+            buffer += utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+    # Find the opening bracket, keeping a short tail in case the key straddles two chunks
+    while True:
+        match = key_pattern.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        if exhausted:
+            return
+        buffer = buffer[-(len(key) + 16):]
+        read_more()
+
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in WHITESPACE + ",":
+            pos += 1
+        if pos >= len(buffer):
+            if exhausted:
+                raise ValueError(f"Unterminated JSON array under '{key}'")
+            buffer, pos = buffer[pos:], 0
+            read_more()
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Element continues in the next chunk
+            if exhausted:
+                raise
+            buffer, pos = buffer[pos:], 0
+            read_more()
+            continue
+        if end == len(buffer) and not exhausted and not isinstance(item, (dict, list, str)):
+            # A bare number at the end of the buffer may have more digits coming
+            buffer, pos = buffer[pos:], 0
+            read_more()
+            continue
+        yield item
+        pos = end
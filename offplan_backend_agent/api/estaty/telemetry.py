@@ -0,0 +1,98 @@
+"""
+Sync telemetry: in-memory counters for one run, persisted as a SyncRun row.
+
+Stages, the HTTP client and the DB execute wrapper all report into one
+PipelineMetrics; recorded_run() stores the result so `manage.py sync_report`
+can show where each run spent its time.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import connection
+from django.utils import timezone
+
+from api.models import SyncRun
+
+log = logging.getLogger(__name__)
+
+# -v 0 / 1 / 2+ of the sync commands
+VERBOSITY_LEVELS = {0: logging.WARNING, 1: logging.INFO}
+
+
+class PipelineMetrics:
+    """Counters and cumulative timings for one run. Safe to update from fetch threads."""
+
+    def __init__(self):
+        self.timings = defaultdict(float)
+        self.counts = Counter()
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.timings[name] += seconds
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            self.counts[key] += amount
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def summary(self):
+        stages = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in self.timings.items())
+        counts = ", ".join(f"{key}={value}" for key, value in sorted(self.counts.items()))
+        return f"⏱ {self.elapsed:.1f}s total ({stages}) | {counts}"
+
+
+@contextmanager
+def track_db(metrics):
+    """Time every query issued on this thread's connection into metrics ("db" / "db.queries")."""
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.add_time("db", time.perf_counter() - start)
+            metrics.incr("db.queries")
+
+    with connection.execute_wrapper(wrapper):
+        yield
+
+
+def configure_verbosity(verbosity):
+    """Per-item sync logs are DEBUG; they only show with -v 2 or higher."""
+    logging.getLogger("api.estaty").setLevel(VERBOSITY_LEVELS.get(verbosity, logging.DEBUG))
+
+
+@contextmanager
+def recorded_run(command, metrics):
+    """Store the run's outcome, timings and counters in SyncRun, whether it succeeds or fails."""
+    run = SyncRun.objects.create(command=command, started_at=timezone.now())
+    try:
+        with track_db(metrics):
+            yield run
+        run.status = "success"
+    except BaseException as e:
+        run.status = "failed"
+        run.error = repr(e)
+        raise
+    finally:
+        run.finished_at = timezone.now()
+        run.duration_seconds = metrics.elapsed
+        run.timings = {name: round(seconds, 3) for name, seconds in metrics.timings.items()}
+        run.counts = dict(metrics.counts)
+        run.save()
+        log.info(f"📊 {command}: {run.status} in {run.duration_seconds:.1f}s")
@@ -0,0 +1,210 @@
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from api.changefeed import DETAILS, IMAGES, PLANS, REMOVED, STATUS, UNITS, record_changes
+from api.estaty.normalize import PROPERTY_FIELDS, UNIT_FIELDS, LOOKUP_SOURCE_KEYS
+from api.models import (
+    City, District, DeveloperCompany, PropertyType, PropertyStatus, SalesStatus,
+    Facility, Property, PropertyUnit, GroupedApartment, PropertyImage, PaymentPlan, PaymentPlanValue,
+)
+
+log = logging.getLogger(__name__)
+
+LOOKUP_MODELS = {
+    "city": City,
+    "district": District,
+    "developer": DeveloperCompany,
+    "property_type": PropertyType,
+    "property_status": PropertyStatus,
+    "sales_status": SalesStatus,
+}
+
+# /getFilters key -> model
+FILTER_MODELS = [
+    ("cities", City),
+    ("districts", District),
+    ("developer_companies", DeveloperCompany),
+    ("property_types", PropertyType),
+    ("property_statuses", PropertyStatus),
+    ("sales_statuses", SalesStatus),
+    ("facilities", Facility),
+]
+
+TOMBSTONE_BATCH_SIZE = 1000
+
+
+def sync_filters(client, lookups):
+    """Refresh every lookup table from /getFilters; only new or renamed rows are written."""
+    filters = client.get_filters()
+    for key, model in FILTER_MODELS:
+        rows = filters.get(key) or (filters.get("cites") if key == "cities" else None) or []
+        for row in rows:
+            if row.get("id"):
+                lookups.resolve(model, {"id": row["id"], "name": row.get("name"), "city_id": row.get("city_id")})
+    lookups.flush()
+    log.info("✅ Filters synced successfully.")
+
+
+def tombstone_missing_properties(seen_ids):
+    """
+    Mark local properties the feed no longer lists as removed. Only call after a complete listing crawl.
+
+    Public querysets drop them immediately via Property.objects.live();
+    purge_removed_properties deletes the rows later in bulk.
+    """
+    to_remove = sorted(set(Property.objects.live().values_list("id", flat=True)) - set(seen_ids))
+    removed_at = timezone.now()
+    for start in range(0, len(to_remove), TOMBSTONE_BATCH_SIZE):
+        batch = to_remove[start:start + TOMBSTONE_BATCH_SIZE]
+        with transaction.atomic():
+            Property.objects.filter(id__in=batch).update(removed_at=removed_at)
+            record_changes({prop_id: {REMOVED} for prop_id in batch}, source="tombstone")
+    if to_remove:
+        log.info(f"🪦 Marked {len(to_remove)} properties no longer present in API as removed.")
+    return len(to_remove)
+
+
+class BulkWriter:
+    """
+    Final pipeline stage: applies a batch of diffed records with set-based writes.
+
+    Each record carries "sections": "property" rewrites the property row and
+    its images, grouped apartments, payment plans and facilities; "units"
+    upserts the unit list and drops units the feed no longer has.
+
+    What actually changed per property (details, images, plans, status, units)
+    is appended to the change feed in the same transaction.
+    """
+    name = "write"
+    uses_db = True
+
+    def __call__(self, records, pipeline):
+        metrics = pipeline.metrics
+        property_records = [r for r in records if "property" in r["sections"]]
+        unit_records = [r for r in records if "units" in r["sections"] and r["units"]]
+
+        changes = defaultdict(set)
+        try:
+            with transaction.atomic():
+                if property_records:
+                    for prop_id, sections in self.changed_sections(property_records).items():
+                        changes[prop_id].update(sections)
+                    self.write_properties(property_records, pipeline.lookups, metrics)
+                if unit_records:
+                    self.write_units(unit_records, metrics)
+                    for record in unit_records:
+                        changes[record["id"]].add(UNITS)
+                metrics.incr("changes.recorded", record_changes(changes, source="estaty"))
+        except Exception:
+            pipeline.lookups.reset()  # the rolled-back batch may have queued or "written" lookups
+            raise
+        return records
+
+    @staticmethod
+    def changed_sections(records):
+        """Compare records with the stored rows they are about to replace; call before writing."""
+        ids = [record["id"] for record in records]
+        stored = {
+            row[0]: row[1:] for row in Property.objects.filter(id__in=ids).values_list(
+                "id", "property_status_id", "sales_status_id", "removed_at", "cover"
+            )
+        }
+        stored_images = defaultdict(set)
+        for prop_id, image in PropertyImage.objects.filter(property_id__in=ids).values_list("property_id", "image"):
+            stored_images[prop_id].add(image)
+        stored_plans = defaultdict(set)
+        for prop_id, *plan in PaymentPlan.objects.filter(property_id__in=ids).values_list(
+            "property_id", "name", "description", "values__name", "values__value"
+        ):
+            stored_plans[prop_id].add(tuple(plan))
+
+        changes = {}
+        for record in records:
+            prop_id = record["id"]
+            if prop_id not in stored:
+                changes[prop_id] = {DETAILS, IMAGES, PLANS, STATUS}
+                continue
+            property_status_id, sales_status_id, removed_at, cover = stored[prop_id]
+            sections = {DETAILS}
+            status = tuple((record["lookups"][key] or {}).get("id") for key in ("property_status", "sales_status"))
+            if removed_at or status != (property_status_id, sales_status_id):
+                sections.add(STATUS)
+            images = {image["image"] for image in record["images"]}
+            if images != stored_images[prop_id] or record["fields"].get("cover") != cover:
+                sections.add(IMAGES)
+            plans = {
+                (plan["name"], plan["description"], value["name"], value["value"])
+                for plan in record["payment_plans"] for value in plan["values"] or [{"name": None, "value": None}]
+            }
+            if plans != stored_plans[prop_id]:
+                sections.add(PLANS)
+            changes[prop_id] = sections
+        return changes
+
+    def write_properties(self, records, lookups, metrics):
+        properties = []
+        links = set()
+        for record in records:
+            prop = Property(id=record["id"], removed_at=None, **record["fields"])
+            for field, model in LOOKUP_MODELS.items():
+                setattr(prop, f"{field}_id", lookups.resolve(model, record["lookups"][field]))
+            properties.append(prop)
+            for facility in record["facilities"]:
+                facility_id = lookups.resolve(Facility, facility)
+                if facility_id:
+                    links.add((record["id"], facility_id))
+        lookups.flush()
+
+        Property.objects.bulk_create(
+            properties, update_conflicts=True, unique_fields=["id"],
+            update_fields=PROPERTY_FIELDS + list(LOOKUP_SOURCE_KEYS) + ["removed_at"],
+        )
+        metrics.incr("rows.Property", len(properties))
+
+        ids = [record["id"] for record in records]
+        GroupedApartment.objects.filter(property_id__in=ids).delete()
+        PropertyImage.objects.filter(property_id__in=ids).delete()
+        PaymentPlan.objects.filter(property_id__in=ids).delete()
+        FacilityLink = Property.facilities.through
+        FacilityLink.objects.filter(property_id__in=ids).delete()
+
+        grouped = [GroupedApartment(property_id=r["id"], **g) for r in records for g in r["grouped_apartments"]]
+        images = [PropertyImage(property_id=r["id"], **i) for r in records for i in r["images"]]
+        GroupedApartment.objects.bulk_create(grouped)
+        PropertyImage.objects.bulk_create(images)
+        FacilityLink.objects.bulk_create([FacilityLink(property_id=p, facility_id=f) for p, f in links])
+
+        plan_specs = [(r["id"], plan) for r in records for plan in r["payment_plans"]]
+        plans = PaymentPlan.objects.bulk_create([
+            PaymentPlan(property_id=prop_id, name=plan["name"], description=plan["description"])
+            for prop_id, plan in plan_specs
+        ])
+        values = [
+            PaymentPlanValue(property_payment_plan=plan_obj, **value)
+            for plan_obj, (_, plan) in zip(plans, plan_specs)
+            for value in plan["values"]
+        ]
+        PaymentPlanValue.objects.bulk_create(values)
+
+        metrics.incr("rows.GroupedApartment", len(grouped))
+        metrics.incr("rows.PropertyImage", len(images))
+        metrics.incr("rows.PaymentPlan", len(plans))
+        metrics.incr("rows.PaymentPlanValue", len(values))
+        metrics.incr("rows.PropertyFacility", len(links))
+
+    def write_units(self, records, metrics):
+        # A unit id can show up under two projects in the feed; the last one wins
+        units = {unit["id"]: unit for record in records for unit in record["units"]}
+        PropertyUnit.objects.bulk_create(
+            [PropertyUnit(**unit) for unit in units.values()],
+            update_conflicts=True, unique_fields=["id"], update_fields=UNIT_FIELDS,
+        )
+        stale, _ = PropertyUnit.objects.filter(
+            property_id__in=[record["id"] for record in records]
+        ).exclude(id__in=list(units)).delete()
+
+        metrics.incr("rows.PropertyUnit", len(units))
+        metrics.incr("rows.PropertyUnit.deleted", stale)
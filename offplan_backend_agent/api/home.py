@@ -0,0 +1,95 @@
+"""
+Landing page bundle.
+
+The home page used to call the status counts, city counts (once per status),
+cities, developers, agent directory and property list endpoints separately.
+Each section is now built once, stored as a JSON blob in the cache namespace
+it depends on, and spliced into the /api/home/ response without being
+re-serialized. Bumping PROPERTIES or AGENTS therefore retires the sections
+built from them, and warm_home() rebuilds them right after a sync or an
+agent change so visitors never pay for the build.
+"""
+import json
+from dataclasses import dataclass
+from typing import Callable
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.agent_directory import get_agent_directory
+from api.cache import AGENTS, PROPERTIES, Namespace
+from api.models import City, DeveloperCompany, Property, PropertyStatus
+from api.serializers import CitySerializerWithDistricts, DeveloperCompanySerializer, PropertySerializer
+from api.views.properties_list import CustomPagination
+from api.views.property_city_count import city_counts
+from api.views.property_status_counts import PropertyStatusCountView
+
+
+@dataclass(frozen=True)
+class Section:
+    namespace: Namespace
+    build: Callable[[], object]
+
+
+def build_city_counts():
+    counts = {"Total": city_counts()}
+    for property_status in PropertyStatus.objects.order_by("id"):
+        counts[property_status.name] = city_counts(property_status)
+    return counts
+
+
+def build_cities():
+    cities = City.objects.all().order_by("name").prefetch_related("districts")
+    return CitySerializerWithDistricts(cities, many=True).data
+
+
+def build_developers():
+    return DeveloperCompanySerializer(DeveloperCompany.objects.all().order_by("name"), many=True).data
+
+
+def build_latest_properties():
+    """First page of PropertyListView, without the page links."""
+    properties = Property.objects.live().with_subunit_count()
+    return {
+        "count": properties.count(),
+        "results": PropertySerializer(properties[:CustomPagination.page_size], many=True).data,
+    }
+
+
+SECTIONS = {
+    "status_counts": Section(PROPERTIES, PropertyStatusCountView.counts),
+    "city_counts": Section(PROPERTIES, build_city_counts),
+    "cities": Section(PROPERTIES, build_cities),
+    "developers": Section(PROPERTIES, build_developers),
+    "properties": Section(PROPERTIES, build_latest_properties),
+    "agents": Section(AGENTS, lambda: get_agent_directory()["results"]),
+}
+
+
+def section_blob(name):
+    """The section serialized to JSON, from the cache or built now."""
+    section = SECTIONS[name]
+    return section.namespace.get_or_set(
+        f"home:{name}", lambda: json.dumps(section.build(), cls=DjangoJSONEncoder, ensure_ascii=False)
+    )
+
+
+def home_bundle(names=None):
+    """JSON object text {"<section>": ..., ...} for names (all sections by default)."""
+    names = names or list(SECTIONS)
+    return "{" + ",".join(f"{json.dumps(name)}:{section_blob(name)}" for name in names) + "}"
+
+
+def resolve_sections(raw_sections):
+    """Turn ?sections= into (names, invalid), like agent_directory.resolve_fields."""
+    if not raw_sections:
+        return list(SECTIONS), []
+    # Deduplicated in request order: a repeated name would repeat its key in the bundle
+    requested = list(dict.fromkeys(name.strip() for name in raw_sections.split(",") if name.strip()))
+    return requested, [name for name in requested if name not in SECTIONS]
+
+
+def warm_home(namespace=None):
+    """Build the sections that depend on namespace (all of them by default) ahead of the next visitor."""
+    for name, section in SECTIONS.items():
+        if namespace is None or section.namespace is namespace:
+            section_blob(name)
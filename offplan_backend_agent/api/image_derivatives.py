@@ -0,0 +1,208 @@
+"""
+Resized WebP/JPEG derivatives of Estaty property images.
+
+Property.cover and PropertyImage.image hold raw Estaty URLs. After a sync,
+`manage.py generate_image_derivatives` fetches each new image once, renders
+the variants below in a process pool, uploads them to S3 and records the
+URLs in ImageDerivative. Serializers then swap in the right size through
+ImageVariantMixin, falling back to the original URL until a derivative exists.
+"""
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from django.core.files.base import ContentFile
+from django.db.models import Manager
+from PIL import Image, ImageOps
+from rest_framework import serializers
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from api.models import ImageDerivative
+
+log = logging.getLogger(__name__)
+
+# name -> (width, height, crop). Uncropped variants keep the aspect ratio and never upscale.
+VARIANTS = {
+    "card": (640, None, False),
+    "gallery": (1600, None, False),
+    "og": (1200, 630, True),  # Open Graph / Twitter large card
+}
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+FETCH_TIMEOUT = 20
+CHUNK_SIZE = 50
+
+
+def derivative_storage():
+    # Names are content-addressed, so derivatives can be cached forever
+    return S3Boto3Storage(
+        location="derivatives",
+        querystring_auth=False,
+        object_parameters={"CacheControl": "public, max-age=31536000, immutable"},
+    )
+
+
+def fetch_image(url):
+    response = requests.get(url, timeout=FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+
+def render_variants(image_bytes):
+    """Return {variant: {"webp": bytes, "jpeg": bytes, "width": w, "height": h}}. Runs in a worker process."""
+    rendered = {}
+    with Image.open(BytesIO(image_bytes)) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+
+    for name, (width, height, crop) in VARIANTS.items():
+        if crop:
+            resized = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, width * 4), Image.LANCZOS)
+
+        variant = {"width": resized.width, "height": resized.height}
+        for fmt, (pil_format, options) in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            variant[fmt] = buffer.getvalue()
+        rendered[name] = variant
+    return rendered
+
+
+def _fetch_safely(fetch, url):
+    try:
+        return url, fetch(url), None
+    except Exception as e:
+        return url, None, str(e)
+
+
+def _store_variants(storage, source_url, rendered):
+    digest = hashlib.sha1(source_url.encode("utf-8")).hexdigest()
+    stored = {}
+    for name, variant in rendered.items():
+        stored[name] = {"width": variant["width"], "height": variant["height"]}
+        for fmt in FORMATS:
+            # The encoded bytes reflect both the source image and the variant spec, so a
+            # re-rendered image never reuses an object that browsers cached as immutable
+            content = hashlib.sha256(variant[fmt]).hexdigest()[:16]
+            path = f"{digest[:2]}/{digest}/{name}-{content}.{fmt}"
+            saved_name = storage.save(path, ContentFile(variant[fmt]))
+            stored[name][fmt] = storage.url(saved_name)
+    return stored
+
+
+def generate_derivatives(source_urls, fetch=fetch_image, storage=None, workers=4):
+    """
+    Build and record derivatives for source_urls.
+
+    fetch is injectable so tests can serve images locally; workers=0 renders
+    in-process instead of in a process pool.
+    """
+    storage = storage or derivative_storage()
+    stats = {"generated": 0, "failed": 0}
+    source_urls = list(dict.fromkeys(url for url in source_urls if url))
+
+    render_pool = ProcessPoolExecutor(max_workers=workers) if workers else None
+    try:
+        with ThreadPoolExecutor(max_workers=max(workers, 1) * 2) as fetch_pool:
+            for start in range(0, len(source_urls), CHUNK_SIZE):
+                chunk = source_urls[start:start + CHUNK_SIZE]
+                rows = []
+
+                pending = []
+                for url, content, error in fetch_pool.map(lambda u: _fetch_safely(fetch, u), chunk):
+                    if error:
+                        rows.append(ImageDerivative(source_url=url, failed=True, error=error))
+                    elif render_pool:
+                        pending.append((url, render_pool.submit(render_variants, content)))
+                    else:
+                        pending.append((url, content))
+
+                for url, job in pending:
+                    try:
+                        rendered = job.result() if render_pool else render_variants(job)
+                        variants = _store_variants(storage, url, rendered)
+                        rows.append(ImageDerivative(source_url=url, variants=variants, failed=False, error=None))
+                    except Exception as e:
+                        rows.append(ImageDerivative(source_url=url, failed=True, error=str(e)))
+
+                ImageDerivative.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=["source_url"],
+                    update_fields=["variants", "failed", "error", "updated_at"],
+                )
+                generated = sum(1 for row in rows if not row.failed)
+                stats["generated"] += generated
+                stats["failed"] += len(rows) - generated
+                log.info(f"🖼 Derivatives: {stats['generated']} generated, {stats['failed']} failed")
+    finally:
+        if render_pool:
+            render_pool.shutdown()
+
+    return stats
+
+
+def load_variants(source_urls):
+    """Map source URL -> variants for every URL that has a derivative (one query)."""
+    urls = {url for url in source_urls if url}
+    if not urls:
+        return {}
+    return dict(
+        ImageDerivative.objects.filter(source_url__in=urls, failed=False)
+        .values_list("source_url", "variants")
+    )
+
+
+def variant_url(variants_by_url, source_url, name, fmt="jpeg"):
+    """URL of the requested variant, or the original URL when none exists yet."""
+    variant = (variants_by_url.get(source_url) or {}).get(name) or {}
+    return variant.get(fmt) or source_url
+
+
+class ImageVariantListSerializer(serializers.ListSerializer):
+    """Preloads derivatives for every item with one query before serializing."""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, Manager) else data)
+        urls = [url for item in items for url in self.child.image_source_urls(item)]
+        self.child.preload_variants(urls)
+        return super().to_representation(items)
+
+
+class ImageVariantMixin:
+    """
+    Serializer mixin giving access to image derivatives.
+
+    Subclasses implement image_source_urls(obj) and set
+    Meta.list_serializer_class = ImageVariantListSerializer.
+    """
+
+    def image_source_urls(self, obj):
+        return []
+
+    def _variants_cache(self):
+        # self.context is the root serializer's dict, so nested serializers share it
+        return self.context.setdefault("image_variants", {})
+
+    def preload_variants(self, urls):
+        cache = self._variants_cache()
+        missing = [url for url in urls if url and url not in cache]
+        found = load_variants(missing)
+        for url in missing:
+            cache[url] = found.get(url)
+
+    def variant(self, source_url, name, fmt="jpeg"):
+        if not source_url:
+            return source_url
+        cache = self._variants_cache()
+        if source_url not in cache:
+            self.preload_variants([source_url])
+        return variant_url(cache, source_url, name, fmt)
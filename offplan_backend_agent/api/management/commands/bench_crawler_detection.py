@@ -0,0 +1,66 @@
+import re
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from api.middleware.crawler_detection import is_crawler_user_agent
+
+# The case-insensitive alternation that meta_view.py used to run per request.
+LEGACY_CRAWLER_USER_AGENTS = re.compile(
+    r"googlebot|bingbot|yandex|duckduckbot|baiduspider|facebook|twitterbot|linkedinbot|whatsapp|telegrambot|slackbot|redditbot|quora link preview|pinterest|tumblr|vkbot",
+    re.I
+)
+
+SAMPLE_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+    "WhatsApp/2.23.20.0",
+    "TelegramBot (like TwitterBot)",
+    "Mozilla/5.0 (compatible; YandexBot/3.0; +http://yandex.com/bots)",
+]
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark the crawler user-agent classifier against the legacy regex"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=100000)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+
+        for ua in SAMPLE_USER_AGENTS:
+            legacy = LEGACY_CRAWLER_USER_AGENTS.search(ua) is not None
+            if legacy != is_crawler_user_agent(ua):
+                self.stderr.write(self.style.ERROR(f"❌ Classifier disagrees with legacy regex for: {ua}"))
+                return
+
+        def legacy_scan():
+            for ua in SAMPLE_USER_AGENTS:
+                LEGACY_CRAWLER_USER_AGENTS.search(ua)
+
+        def uncached_scan():
+            for ua in SAMPLE_USER_AGENTS:
+                is_crawler_user_agent.__wrapped__(ua)
+
+        def cached_scan():
+            for ua in SAMPLE_USER_AGENTS:
+                is_crawler_user_agent(ua)
+
+        lookups = iterations * len(SAMPLE_USER_AGENTS)
+        results = [
+            ("legacy re.I regex", timeit.timeit(legacy_scan, number=iterations)),
+            ("lower-cased token scan", timeit.timeit(uncached_scan, number=iterations)),
+            ("token scan + LRU cache", timeit.timeit(cached_scan, number=iterations)),
+        ]
+
+        baseline = results[0][1]
+        for label, seconds in results:
+            per_lookup_ns = seconds / lookups * 1e9
+            self.stdout.write(f"{label:<24} {per_lookup_ns:8.0f} ns/lookup  ({baseline / seconds:5.1f}x)")
+
+        info = is_crawler_user_agent.cache_info()
+        self.stdout.write(self.style.SUCCESS(f"✅ Cache hits: {info.hits}, misses: {info.misses}"))
@@ -0,0 +1,126 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from api.models import GroupedApartment, Property, PropertyUnit
+
+SEED_ID_OFFSET = 900_000_000  # far above Estaty ids, so seeding never touches real rows
+PAGE_SIZE = 12
+
+UNIT_MIXES = [
+    [("Apartment", "1"), ("Apartment", "2"), ("Apartment", "3")],
+    [("Apartment", "Studio"), ("Apartment", "1"), ("Penthouse", "4")],
+    [("Villa", "3"), ("Villa", "4"), ("Villa", "5"), ("Townhouse", "3")],
+    [("Apartment", "2")],
+]
+
+PAYLOADS = [
+    ("no filter", {}),
+    ("rooms=2", {"rooms": "2"}),
+    ("unit_type=Apartment", {"unit_type": "Apartment"}),
+    ("unit_type=Villa rooms=3", {"unit_type": "Villa", "rooms": "3"}),
+]
+
+
+def legacy_queryset(payload):
+    """FilterPropertiesView before with_subunit_count(): Sum over a join, one join per filter, DISTINCT."""
+    queryset = Property.objects.live().annotate(subunit_count=Sum("property_units__unit_count")).order_by("-updated_at")
+    if unit_type := payload.get("unit_type"):
+        queryset = queryset.filter(grouped_apartments__unit_type__icontains=unit_type)
+    if rooms := payload.get("rooms"):
+        queryset = queryset.filter(grouped_apartments__rooms=rooms)
+    return queryset.distinct()
+
+
+def subquery_queryset(payload):
+    queryset = Property.objects.live().with_subunit_count().order_by("-updated_at")
+    if payload.get("unit_type") or payload.get("rooms"):
+        queryset = queryset.matching_rooms(unit_type=payload.get("unit_type"), rooms=payload.get("rooms"))
+    return queryset
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed N throwaway properties and compare the filter endpoint's old Sum/join/DISTINCT query "
+        "with the correlated-subquery version: plan, timing and subunit counts. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--properties", type=int, default=10000)
+        parser.add_argument("--units", type=int, default=8, help="Units per property")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--explain", action="store_true", help="Print the full EXPLAIN ANALYZE plans")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options["properties"], options["units"])
+                for label, payload in PAYLOADS:
+                    self.compare(label, payload, options["repeat"], options["explain"])
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS("✅ Seed data rolled back"))
+
+    def seed(self, count, units_per_property):
+        rng = random.Random(42)
+        now = timezone.now()
+        ids = range(SEED_ID_OFFSET, SEED_ID_OFFSET + count)
+        Property.objects.bulk_create(
+            [Property(id=i, title=f"Bench {i}", updated_at=now - timedelta(minutes=i - SEED_ID_OFFSET))
+             for i in ids],
+            batch_size=2000,
+        )
+        GroupedApartment.objects.bulk_create(
+            [GroupedApartment(property_id=i, unit_type=unit_type, rooms=rooms)
+             for i in ids for unit_type, rooms in rng.choice(UNIT_MIXES)],
+            batch_size=5000,
+        )
+        PropertyUnit.objects.bulk_create(
+            [PropertyUnit(id=i * 100 + n, property_id=i, unit_count=rng.randint(1, 5), created_at=now, updated_at=now)
+             for i in ids for n in range(units_per_property)],
+            batch_size=5000,
+        )
+        with connection.cursor() as cursor:
+            for model in (Property, GroupedApartment, PropertyUnit):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+        self.stdout.write(f"🌱 Seeded {count} properties, {count * units_per_property} units")
+
+    def time_page(self, queryset, repeat):
+        """Best of repeat for what the paginator does: COUNT(*) plus the first page."""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            total = queryset.count()
+            page = list(queryset[:PAGE_SIZE])
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, total, {prop.id: prop.subunit_count for prop in page}
+
+    def compare(self, label, payload, repeat, explain):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{label}"))
+        results = {}
+        for name, build in (("join + DISTINCT", legacy_queryset), ("subquery/EXISTS", subquery_queryset)):
+            queryset = build(payload)
+            seconds, total, counts = self.time_page(queryset, repeat)
+            results[name] = counts
+            plan = queryset.explain(analyze=True)
+            self.stdout.write(f"  {name:16} {seconds * 1000:8.1f} ms  {total} rows  plan: {plan.splitlines()[0].strip()[:90]}")
+            if explain:
+                self.stdout.write(plan)
+
+        legacy, current = results.values()
+        inflated = [prop_id for prop_id in current if legacy.get(prop_id) not in (None, current[prop_id])]
+        if inflated:
+            self.stdout.write(self.style.WARNING(
+                f"  ⚠️ join inflated subunit_count on {len(inflated)}/{len(current)} rows of the first page, "
+                f"e.g. {inflated[0]}: {legacy[inflated[0]]} vs {current[inflated[0]]}"
+            ))
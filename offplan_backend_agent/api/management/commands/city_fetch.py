@@ -3,6 +3,7 @@ import logging
 from datetime import datetime
 from django.utils.timezone import make_aware, now, is_naive
 from django.utils.dateparse import parse_datetime
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from dateutil import parser as date_parser
 from django.core.management import call_command
@@ -16,7 +17,7 @@ from api.models import (
     PaymentPlan, PaymentPlanValue
 )
 
-API_KEY = "27b84afeeef929815ab080ae22b29383"
+API_KEY = settings.ESTATY_API_KEY
 LISTING_URL = "https://panel.estaty.app/api/v1/getProperties"
 DETAIL_URL = "https://panel.estaty.app/api/v1/getProperty"
 FILTER_URL = "https://estaty.app/api/v1/filter"
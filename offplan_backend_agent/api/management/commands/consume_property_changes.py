@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from api.changefeed import CONSUMERS, DEFAULT_BATCH_SIZE, consume
+from api.models import ChangeFeedCursor, PropertyChange
+
+
+class Command(BaseCommand):
+    help = "Feed new property changes to a registered consumer and advance its cursor"
+
+    def add_arguments(self, parser):
+        parser.add_argument("consumers", nargs="*", help=f"Consumers to run (default: all of {', '.join(CONSUMERS)})")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=None)
+        parser.add_argument("--reset", action="store_true", help="Move the cursors to the end of the feed without processing")
+        parser.add_argument("--status", action="store_true", help="Print each cursor and how far behind it is")
+        parser.add_argument(
+            "--prune-days", type=int, default=None,
+            help="Delete changes older than this that every consumer has already processed",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["consumers"]) - set(CONSUMERS)
+        if unknown:
+            raise CommandError(f"Unknown consumers: {', '.join(sorted(unknown))}. Known: {', '.join(CONSUMERS)}")
+        names = options["consumers"] or list(CONSUMERS)
+
+        if options["status"]:
+            return self.print_status(names)
+
+        if options["reset"]:
+            last = PropertyChange.objects.order_by("-id").values_list("id", flat=True).first() or 0
+            for name in names:
+                ChangeFeedCursor.objects.update_or_create(consumer=name, defaults={"position": last})
+            self.stdout.write(self.style.WARNING(f"⏩ Moved {', '.join(names)} to change #{last}"))
+            return
+
+        for name in names:
+            processed = consume(CONSUMERS[name], batch_size=options["batch_size"], max_batches=options["max_batches"])
+            self.stdout.write(self.style.SUCCESS(f"✅ {name}: processed {processed} changes"))
+
+        if options["prune_days"] is not None:
+            self.prune(options["prune_days"])
+
+    def print_status(self, names):
+        cursors = dict(ChangeFeedCursor.objects.filter(consumer__in=names).values_list("consumer", "position"))
+        for name in names:
+            position = cursors.get(name, 0)
+            behind = PropertyChange.objects.filter(id__gt=position).count()
+            self.stdout.write(f"{name:24} cursor {position:>10}  {behind} changes behind")
+
+    def prune(self, days):
+        # Consumers that never ran have no cursor yet and would start from the oldest row
+        registered = ChangeFeedCursor.objects.filter(consumer__in=list(CONSUMERS))
+        if registered.count() < len(CONSUMERS):
+            self.stdout.write(self.style.WARNING("⚠️ Some consumers have never run; not pruning"))
+            return
+        safe_position = registered.aggregate(position=Min("position"))["position"]
+        deleted, _ = PropertyChange.objects.filter(
+            id__lte=safe_position, created_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f"🗑 Pruned {deleted} processed changes"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import changefeed
+from api.estaty.normalize import legacy_delivery_date
+from api.models import Property
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert delivery dates the old importers stored as YYYYMM to UNIX timestamps. "
+        "The sync skips unchanged properties, so it never rewrites them itself."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would change")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        legacy = Property.objects.filter(delivery_date__gte=190001, delivery_date__lte=299912)
+        changed = []
+        for prop_id, delivery_date in legacy.values_list("id", "delivery_date").iterator():
+            converted = legacy_delivery_date(delivery_date)
+            if converted is not None:
+                changed.append(Property(id=prop_id, delivery_date=converted))
+
+        if not changed:
+            self.stdout.write(self.style.SUCCESS("✅ No YYYYMM delivery dates left."))
+            return
+        if options["dry_run"]:
+            self.stdout.write(f"🔍 {len(changed)} delivery dates would be converted")
+            return
+
+        with transaction.atomic():
+            Property.objects.bulk_update(changed, ["delivery_date"], batch_size=options["batch_size"])
+            changefeed.record_changes({prop.id: {changefeed.DETAILS} for prop in changed}, source="convert_delivery_dates")
+        self.stdout.write(self.style.SUCCESS(f"📅 Converted {len(changed)} delivery dates to UNIX timestamps"))
@@ -0,0 +1,54 @@
+import argparse
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from api.estaty.fixtures import RECORD, REPLAY, FixtureStore
+
+
+class Command(BaseCommand):
+    help = (
+        "Record Estaty responses while running a sync command, replay them offline, or list what is recorded. "
+        "e.g. estaty_fixtures record import_estaty_properties --max-pages 5, "
+        "estaty_fixtures replay import_estaty_properties --latency-ms 120 -- --workers 16"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("mode", choices=[RECORD, REPLAY, "stats"])
+        parser.add_argument("sync_command", nargs="?", help="Command to run, e.g. sync_properties")
+        parser.add_argument("--dir", default=None, help=f"Fixture directory (default {settings.ESTATY_FIXTURES_DIR})")
+        parser.add_argument("--latency-ms", type=int, default=None, help="Simulated round trip per replayed request")
+        parser.add_argument("--jitter-ms", type=int, default=None)
+        parser.add_argument("command_args", nargs=argparse.REMAINDER, help="Arguments passed on to the command")
+
+    def handle(self, *args, **options):
+        root = options["dir"] or settings.ESTATY_FIXTURES_DIR
+        if options["mode"] == "stats":
+            return self.print_stats(FixtureStore(root))
+        if not options["sync_command"]:
+            raise CommandError(f"Name the command to {options['mode']}, e.g. sync_properties")
+
+        overrides = {"ESTATY_FIXTURES": options["mode"], "ESTATY_FIXTURES_DIR": root}
+        if options["latency_ms"] is not None:
+            overrides["ESTATY_REPLAY_LATENCY_MS"] = options["latency_ms"]
+        if options["jitter_ms"] is not None:
+            overrides["ESTATY_REPLAY_JITTER_MS"] = options["jitter_ms"]
+
+        command_args = [arg for arg in options["command_args"] if arg != "--"]
+        start = time.monotonic()
+        with override_settings(**overrides):
+            call_command(options["sync_command"], *command_args, verbosity=options["verbosity"])
+        self.stdout.write(self.style.SUCCESS(
+            f"📼 {options['mode']} of {options['sync_command']} finished in {time.monotonic() - start:.1f}s ({root})"
+        ))
+
+    def print_stats(self, store):
+        stats = store.stats()
+        if not stats:
+            self.stdout.write(f"No fixtures in {store.root}")
+            return
+        for endpoint, (count, size) in sorted(stats.items()):
+            self.stdout.write(f"{endpoint:24} {count:6} responses  {size / 1024:10.1f} KB")
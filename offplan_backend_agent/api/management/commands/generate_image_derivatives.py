@@ -0,0 +1,44 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from api.image_derivatives import generate_derivatives
+from api.models import ImageDerivative, Property, PropertyImage
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Render card/gallery/og WebP and JPEG derivatives for property images "
+        "that do not have one yet, and upload them to S3."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Render processes (0 renders inline)")
+        parser.add_argument("--retry-failed", action="store_true", help="Retry images that failed previously")
+        parser.add_argument("--all", action="store_true", help="Regenerate every image, e.g. after changing VARIANTS")
+        parser.add_argument("--limit", type=int, default=None)
+
+    def handle(self, *args, **options):
+        source_urls = set(Property.objects.exclude(cover__isnull=True).exclude(cover="").values_list("cover", flat=True))
+        source_urls.update(
+            PropertyImage.objects.exclude(image__isnull=True).exclude(image="").values_list("image", flat=True)
+        )
+
+        if not options["all"]:
+            done = ImageDerivative.objects.all()
+            if options["retry_failed"]:
+                done = done.filter(failed=False)
+            source_urls -= set(done.values_list("source_url", flat=True))
+
+        source_urls = sorted(source_urls)[:options["limit"]]
+        if not source_urls:
+            self.stdout.write(self.style.SUCCESS("✅ All property images already have derivatives"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"🖼 Generating derivatives for {len(source_urls)} images..."))
+        stats = generate_derivatives(source_urls, workers=options["workers"])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Derivatives done → Generated: {stats['generated']}, Failed: {stats['failed']}"
+        ))
@@ -0,0 +1,104 @@
+import json
+import logging
+
+from dateutil import parser as date_parser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+from django.utils.timezone import is_naive, make_aware
+
+from api.blog.cache import bump_list_version
+from api.blog.slugs import SlugAllocator
+from api.models import BlogPost
+
+log = logging.getLogger(__name__)
+
+IMPORTABLE_FIELDS = {
+    field.name for field in BlogPost._meta.concrete_fields
+    if field.name not in ("id", "slug", "created_at")
+}
+
+
+def load_records(path):
+    """Read a JSON array or JSON Lines export from the old CMS."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import blog posts exported from the old CMS (JSON array or JSON Lines). "
+        "Slugs are allocated in memory against the existing posts; post_save signals "
+        "do not run, so include title_ar/title_fa etc. in the export if translations are needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the export file")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Allocate slugs and validate without writing")
+
+    def handle(self, *args, **options):
+        try:
+            records = load_records(options["path"])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        batch_size = options["batch_size"]
+        total_created = 0
+
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            for attempt in range(2):
+                try:
+                    total_created += self.import_batch(batch, dry_run=options["dry_run"])
+                    break
+                except IntegrityError:
+                    # Another writer took one of our slugs; reload and reallocate once
+                    if attempt == 1:
+                        raise
+                    log.warning(f"⚠️ Slug collision in batch starting at {start}, retrying")
+
+        if not options["dry_run"]:
+            bump_list_version()  # bulk_create skips the post_save hook that does this
+
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(f"✅ {verb} {total_created} blog posts"))
+
+    def import_batch(self, batch, dry_run=False):
+        allocator = SlugAllocator(BlogPost.objects.values_list("slug", flat=True))
+        posts = []
+        created_at_by_slug = {}
+
+        for record in batch:
+            title = record.get("title")
+            if not title or not record.get("content"):
+                log.warning(f"⚠️ Skipping record without title or content: {str(record)[:80]}")
+                continue
+
+            post = BlogPost(**{k: v for k, v in record.items() if k in IMPORTABLE_FIELDS})
+            post.author = post.author or "Offplan Market"
+            post.slug = allocator.allocate(title, preferred=slugify(record.get("slug") or ""))
+
+            if raw_created := record.get("created_at"):
+                created_at = date_parser.parse(raw_created)
+                created_at_by_slug[post.slug] = make_aware(created_at) if is_naive(created_at) else created_at
+            posts.append(post)
+
+        if dry_run:
+            return len(posts)
+
+        with transaction.atomic():
+            created = BlogPost.objects.bulk_create(posts)
+
+            # auto_now_add overwrites created_at on insert; restore the CMS dates
+            to_restore = []
+            for post in created:
+                if post.slug in created_at_by_slug:
+                    post.created_at = created_at_by_slug[post.slug]
+                    to_restore.append(post)
+            BlogPost.objects.bulk_update(to_restore, ["created_at"])
+
+        return len(created)
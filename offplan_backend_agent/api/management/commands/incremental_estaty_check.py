@@ -1,13 +1,17 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils.dateparse import parse_datetime
-from django.utils.timezone import make_aware, is_naive
+from django.utils.timezone import make_aware, is_naive, now
+from django.db import transaction
+from api.changefeed import REMOVED, record_changes
+from api.estaty.fixtures import fixture_session
 from api.models import Property
 import requests
 from dateutil import parser as date_parser
 from django.core.management import call_command
 import logging
 
-API_KEY = "27b84afeeef929815ab080ae22b29383"
+API_KEY = settings.ESTATY_API_KEY
 DETAIL_URL = "https://panel.estaty.app/api/v1/getProperty"
 HEADERS = {
     "App-key": API_KEY,
@@ -21,12 +25,13 @@ class Command(BaseCommand):
 
     def handle(self, *args, **kwargs):
         print("🔍 Checking last 60 DB properties for changes...")
-        recent_props = Property.objects.order_by("-updated_at")[:60]
+        session = fixture_session()  # records or replays when ESTATY_FIXTURES is set
+        recent_props = Property.objects.live().order_by("-updated_at")[:60]
         any_changed = False
 
         for prop in recent_props:
             try:
-                res = requests.post(DETAIL_URL, headers=HEADERS, json={"id": prop.id})
+                res = session.post(DETAIL_URL, headers=HEADERS, json={"id": prop.id})
                 res.raise_for_status()
                 api_data = res.json().get("property")
             except Exception as e:
@@ -34,8 +39,10 @@ class Command(BaseCommand):
                 continue
 
             if not api_data:
-                print(f"❌ Property ID {prop.id} no longer in Estaty — deleting")
-                prop.delete()
+                print(f"❌ Property ID {prop.id} no longer in Estaty — marking as removed")
+                with transaction.atomic():
+                    Property.objects.filter(id=prop.id).update(removed_at=now())
+                    record_changes({prop.id: {REMOVED}}, source="incremental_estaty_check")
                 any_changed = True
                 continue
 
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.estaty.purge import purge_removed_properties, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Permanently delete properties tombstoned by the Estaty sync, with set-based deletes per child table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-hours", type=float, default=24,
+            help="Only purge properties removed at least this long ago, so a feed glitch can still be undone",
+        )
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=None)
+
+    def handle(self, *args, **options):
+        removed_before = timezone.now() - timedelta(hours=options["older_than_hours"])
+        totals = purge_removed_properties(
+            removed_before=removed_before,
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+        )
+        if not totals["Property"]:
+            self.stdout.write(self.style.SUCCESS("✅ Nothing to purge."))
+            return
+        for label, count in totals.items():
+            if count:
+                self.stdout.write(f"  {label}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"🗑 Purged {totals['Property']} removed properties"))
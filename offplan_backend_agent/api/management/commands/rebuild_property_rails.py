@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import PROPERTIES
+from api.rails import KINDS, RAIL_SIZE, rebuild_rails
+
+
+class Command(BaseCommand):
+    help = (
+        f"Re-rank every property rail (top {RAIL_SIZE} per status, city and developer, cheapest per district). "
+        "The property_rails change feed consumer keeps them current in between."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kinds", nargs="+", choices=list(KINDS), help="Only these rail kinds")
+
+    def handle(self, *args, **options):
+        written = rebuild_rails(options["kinds"])
+        PROPERTIES.bump()
+        for kind, count in written.items():
+            self.stdout.write(self.style.SUCCESS(f"✅ {kind}: {count} rails"))
@@ -0,0 +1,68 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from api.cache import PROPERTIES
+from api.estaty.client import EstatyClient
+from api.estaty.http_cache import response_cache
+from api.estaty.pipeline import DEFAULT_WORKERS
+from api.estaty.statuses import (
+    DETAILS, FILTER, LISTING, SOURCES, detail_statuses, filter_statuses, listing_statuses, reconcile_statuses,
+)
+from api.estaty.telemetry import PipelineMetrics, configure_verbosity, recorded_run
+from api.home import warm_home
+from api.models import Property
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring every property's status in line with Estaty. Statuses are read from the listing pages "
+        "(or one /filter response); only properties those do not cover are fetched from /getProperty, "
+        "and all changes are written with one bulk update."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", choices=SOURCES, default=LISTING,
+                            help="Where statuses are read from; 'details' fetches every property by id")
+        parser.add_argument("--max-pages", type=int, default=None, help="Stop the listing after this many pages")
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent /getProperty requests")
+        parser.add_argument("--no-fallback", action="store_true",
+                            help="Do not fetch properties the listing or /filter left without a status")
+        parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f"🚀 Reconciling property statuses from {options['source']}..."))
+        configure_verbosity(options["verbosity"])
+        metrics = PipelineMetrics()
+        client = EstatyClient(metrics=metrics, cache=response_cache())
+        with recorded_run("reconcile_property_status", metrics):
+            changed = self.run(client, metrics, options)
+        warm_home(PROPERTIES)  # the run bumped PROPERTIES; rebuild the landing page now
+
+        verb = "Would update" if options["dry_run"] else "Updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"🏁 {verb} {len(changed)} statuses, {metrics.counts['status.unchanged']} unchanged, "
+            f"{metrics.counts['status.missing']} without a status."
+        ))
+        self.stdout.write(metrics.summary())
+
+    def run(self, client, metrics, options):
+        stored_ids = set(Property.objects.values_list("id", flat=True))
+        if options["source"] == LISTING:
+            statuses, _ = listing_statuses(client, metrics, max_pages=options["max_pages"])
+        elif options["source"] == FILTER:
+            statuses, _ = filter_statuses(client, metrics)
+        else:
+            statuses = {}
+
+        statuses = {prop_id: ref for prop_id, ref in statuses.items() if ref and prop_id in stored_ids}
+        missing = sorted(stored_ids - set(statuses))
+        if missing and (options["source"] == DETAILS or not options["no_fallback"]):
+            if options["source"] != DETAILS:
+                self.stdout.write(self.style.WARNING(f"⚠️ {len(missing)} properties without a status, fetching by id"))
+            statuses.update(detail_statuses(client, metrics, missing, workers=options["workers"]))
+        metrics.incr("status.missing", len(stored_ids) - len(statuses))
+
+        return reconcile_statuses(statuses, metrics, dry_run=options["dry_run"])
@@ -0,0 +1,98 @@
+import logging
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.db.models import Avg, Count, Max, Q
+
+from api.models import JobRun
+from api.scheduler import configured_jobs, due_jobs, run_job
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run scheduled jobs (Estaty sync, translation, snapshots, purge) as a daemon. "
+        "Each job holds a Postgres advisory lock while it runs, so overlapping runs are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=2, help="Jobs allowed to run at the same time")
+        parser.add_argument("--tick", type=float, default=15, help="Seconds between schedule checks")
+        parser.add_argument("--only", nargs="+", metavar="JOB", help="Schedule only these jobs")
+        parser.add_argument("--run", metavar="JOB", help="Run one job now (under its lock) and exit")
+        parser.add_argument("--once", action="store_true", help="Run whatever is due, wait for it, and exit")
+        parser.add_argument("--status", action="store_true", help="Print run history per job and exit")
+
+    def handle(self, *args, **options):
+        jobs = configured_jobs()
+        if options["only"]:
+            unknown = set(options["only"]) - set(jobs)
+            if unknown:
+                raise CommandError(f"Unknown jobs: {', '.join(sorted(unknown))}")
+            jobs = {name: jobs[name] for name in options["only"]}
+
+        if options["status"]:
+            return self.print_status(jobs)
+
+        if options["run"]:
+            if options["run"] not in jobs:
+                raise CommandError(f"Unknown job '{options['run']}'. Known: {', '.join(jobs)}")
+            run = run_job(jobs[options["run"]])
+            self.stdout.write(f"{run.job}: {run.status} ({run.duration_seconds or 0:.1f}s)")
+            return
+
+        stopping = threading.Event()
+        if not options["once"]:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: stopping.set())
+
+        self.stdout.write(self.style.SUCCESS(
+            f"🗓 Scheduler started: {', '.join(f'{j.name} every {j.every}s' for j in jobs.values())}"
+        ))
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            while not stopping.is_set():
+                in_flight = {name: f for name, f in in_flight.items() if not f.done()}
+                free = options["concurrency"] - len(in_flight)
+                close_old_connections()
+                for job in due_jobs(jobs):
+                    if free <= 0:
+                        break
+                    if job.name in in_flight:
+                        continue
+                    in_flight[job.name] = pool.submit(run_job, job)
+                    free -= 1
+
+                if options["once"]:
+                    break
+                stopping.wait(options["tick"])
+
+            if stopping.is_set():
+                self.stdout.write("🛑 Stopping: waiting for running jobs to finish...")
+        self.stdout.write(self.style.SUCCESS("✅ Scheduler stopped"))
+
+    def print_status(self, jobs):
+        stats = {
+            row["job"]: row for row in
+            JobRun.objects.filter(job__in=list(jobs)).values("job").annotate(
+                runs=Count("id"),
+                failures=Count("id", filter=Q(status="failed")),
+                skipped=Count("id", filter=Q(status="skipped")),
+                avg_seconds=Avg("duration_seconds", filter=Q(status="success")),
+                max_seconds=Max("duration_seconds"),
+                last=Max("started_at"),
+            )
+        }
+        for name, job in jobs.items():
+            row = stats.get(name)
+            if not row:
+                self.stdout.write(f"{name:28} never run")
+                continue
+            self.stdout.write(
+                f"{name:28} runs={row['runs']} failed={row['failures']} skipped={row['skipped']} "
+                f"avg={row['avg_seconds'] or 0:.1f}s max={row['max_seconds'] or 0:.1f}s last={row['last']:%Y-%m-%d %H:%M}"
+            )
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from api.models import SyncRun
+
+MB = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = "Show recent Estaty sync runs: duration, rows written, HTTP and DB cost, throughput per stage"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--command", dest="sync_command", help="Only runs of this command, e.g. sync_properties")
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--stages", action="store_true", help="Also print the time spent in each stage")
+
+    def handle(self, *args, **options):
+        runs = SyncRun.objects.all()
+        if options["sync_command"]:
+            runs = runs.filter(command=options["sync_command"])
+        runs = list(runs[:options["limit"]])
+        if not runs:
+            self.stdout.write("No sync runs recorded yet.")
+            return
+
+        for run in runs:
+            self.print_run(run, options["stages"])
+
+    def print_run(self, run, show_stages):
+        counts, timings = run.counts, run.timings
+        duration = run.duration_seconds or 0
+        style = {"success": self.style.SUCCESS, "failed": self.style.ERROR}.get(run.status, self.style.WARNING)
+        self.stdout.write(style(f"{run.started_at:%Y-%m-%d %H:%M} {run.command:26} {run.status:8} {duration:8.1f}s"))
+
+        rows = {key[len("rows."):]: value for key, value in counts.items() if key.startswith("rows.")}
+        written = sum(value for key, value in rows.items() if not key.endswith(".deleted"))
+        properties = counts.get("rows.Property", 0) + counts.get("property.unchanged", 0)
+        self.stdout.write(
+            f"    rows    {written} written"
+            + (f" ({', '.join(f'{k} {v}' for k, v in sorted(rows.items()))})" if rows else "")
+        )
+        self.stdout.write(
+            f"    http    {counts.get('http.requests', 0)} requests, {timings.get('http', 0):.1f}s, "
+            f"{counts.get('http.bytes', 0) / MB:.1f} MB, {counts.get('http.retries', 0)} retries"
+        )
+        self.stdout.write(f"    db      {counts.get('db.queries', 0)} queries, {timings.get('db', 0):.1f}s")
+        if duration:
+            self.stdout.write(
+                f"    rate    {properties / duration:.1f} properties/s, {written / duration:.0f} rows/s"
+            )
+        if show_stages:
+            for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+                if name not in ("http", "db"):
+                    self.stdout.write(f"    stage   {name:12} {seconds:8.1f}s")
+        if run.error:
+            self.stdout.write(self.style.ERROR(f"    error   {run.error}"))
@@ -1,10 +1,12 @@
-from django.db import models
-from django.utils.text import slugify
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
 from storages.backends.s3boto3 import S3Boto3Storage
 from tinymce.models import HTMLField 
 from django.contrib import admin
 from django.utils.html import format_html
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from api.blog.slugs import allocate_slug
 
 class City(models.Model):
     name = models.CharField(max_length=100)
@@ -67,6 +69,40 @@ class Facility(models.Model):
         return self.name
 
 
+class PropertyQuerySet(models.QuerySet):
+    def live(self):
+        """Properties Estaty still lists. Public endpoints should start from this."""
+        return self.filter(removed_at__isnull=True)
+
+    def removed(self):
+        return self.filter(removed_at__isnull=False)
+
+    def with_subunit_count(self):
+        """
+        Annotate subunit_count, the sum of unit_count over the property's units (0 without units).
+
+        A correlated subquery rather than Sum() over a join: other joins can't
+        multiply the units, and the queryset needs no GROUP BY, so its COUNT(*)
+        stays cheap.
+        """
+        units = (
+            PropertyUnit.objects.filter(property=models.OuterRef("pk")).order_by()
+            .values("property").annotate(total=models.Sum("unit_count")).values("total")
+        )
+        return self.annotate(
+            subunit_count=Coalesce(models.Subquery(units, output_field=models.IntegerField()), 0)
+        )
+
+    def matching_rooms(self, unit_type=None, rooms=None):
+        """Properties with a grouped apartment of this unit type (contains) and rooms (exact), as one EXISTS."""
+        apartments = GroupedApartment.objects.filter(property=models.OuterRef("pk"))
+        if unit_type:
+            apartments = apartments.filter(unit_type__icontains=unit_type)
+        if rooms:
+            apartments = apartments.filter(rooms=rooms)
+        return self.filter(models.Exists(apartments))
+
+
 class Property(models.Model):
     title = models.CharField(max_length=255)
     arabic_title = models.CharField(max_length=255,null=True,blank=True)
@@ -102,6 +138,10 @@ class Property(models.Model):
     min_area = models.IntegerField(blank=True, null=True)
 
     updated_at = models.DateTimeField(blank=True, null=True)
+    # Set when the property drops out of the feed; purge_removed_properties deletes the rows later
+    removed_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    objects = PropertyQuerySet.as_manager()
 
     def __str__(self):
         return self.title
@@ -149,6 +189,20 @@ class PropertyImage(models.Model):
         return f"Image for {self.property_id}"
 
 
+class ImageDerivative(models.Model):
+    """Resized WebP/JPEG copies of an Estaty image, keyed by the original URL."""
+    source_url = models.CharField(max_length=1000, unique=True)
+    # {"card": {"webp": url, "jpeg": url, "width": 640, "height": 427}, "gallery": {...}, "og": {...}}
+    variants = models.JSONField(default=dict, blank=True)
+    failed = models.BooleanField(default=False)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.source_url
+
+
 class PropertyFacility(models.Model):
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='property_facilities')
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
@@ -273,6 +327,12 @@ class AgentDetails(models.Model):
         unique_together = ('id', 'username')
         managed = True  # Ensure True only if Django manages the table
         verbose_name_plural = "Agent Details"
+        indexes = [
+            # Containment filters (languages @> ARRAY['ar']) used by AgentSearchView
+            GinIndex(fields=['languages'], name='agent_languages_gin'),
+            GinIndex(fields=['specialties'], name='agent_specialties_gin'),
+            models.Index(fields=['rating'], name='agent_rating_idx'),
+        ]
 
     def __str__(self):
         return self.username
@@ -404,21 +464,24 @@ class BlogPost(models.Model):
     slug = models.SlugField(unique=True, blank=True, max_length=300)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    SLUG_SAVE_ATTEMPTS = 3
+
     def save(self, *args, **kwargs):
-        # Auto-generate slug from title if not provided
-        if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            
-            # Ensure uniqueness by appending numbers if needed
-            while BlogPost.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            
-            self.slug = slug
-        
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        # Auto-generate slug from title: one query picks the next free suffix,
+        # and the unique constraint settles races with concurrent saves
+        for attempt in range(self.SLUG_SAVE_ATTEMPTS):
+            self.slug = allocate_slug(BlogPost.objects.exclude(pk=self.pk), self.title)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                slug_taken = BlogPost.objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                self.slug = ""
+                if not slug_taken or attempt == self.SLUG_SAVE_ATTEMPTS - 1:
+                    raise
 
     def __str__(self):
         return self.title
@@ -429,4 +492,133 @@ class BlogPost(models.Model):
         verbose_name_plural = "Blog Posts"
 
 
-    
\ No newline at end of file
+class JobRun(models.Model):
+    """One execution of a scheduled job (see api/scheduler.py)."""
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('success', 'Success'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),  # lock held by another run
+    ]
+
+    job = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(blank=True, null=True)
+    duration_seconds = models.FloatField(blank=True, null=True)
+    host = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.job} @ {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [models.Index(fields=['job', '-started_at'], name='jobrun_job_started_idx')]
+
+
+class SyncRun(models.Model):
+    """One run of an Estaty sync command, with its stage timings and counters (see api/estaty/telemetry.py)."""
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('success', 'Success'),
+        ('failed', 'Failed'),
+    ]
+
+    command = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(blank=True, null=True)
+    duration_seconds = models.FloatField(blank=True, null=True)
+    timings = models.JSONField(default=dict, blank=True)  # stage -> seconds
+    counts = models.JSONField(default=dict, blank=True)   # counter -> value
+    error = models.TextField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.command} @ {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [models.Index(fields=['command', '-started_at'], name='syncrun_command_started_idx')]
+
+
+class PropertyChange(models.Model):
+    """
+    Outbox row: one property changed in these sections (see api/changefeed.py).
+
+    Written in the same transaction as the change itself. property_id is a
+    plain integer so entries outlive purged properties.
+    """
+    id = models.BigAutoField(primary_key=True)
+    property_id = models.IntegerField()
+    sections = ArrayField(models.CharField(max_length=20))
+    source = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.id} Property {self.property_id}: {', '.join(self.sections)}"
+
+    class Meta:
+        ordering = ['id']
+
+
+class ChangeFeedCursor(models.Model):
+    """Last PropertyChange id a consumer has processed."""
+    consumer = models.CharField(max_length=100, primary_key=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.consumer} @ {self.position}"
+
+
+class TranslationSource(models.Model):
+    """Hash of the source text a translated field was produced from (see api/translation.py)."""
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    field = models.CharField(max_length=50)  # the translated field, e.g. arabic_title
+    source_hash = models.CharField(max_length=64)
+    translated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id}.{self.field}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['model', 'object_id', 'field'], name='translationsource_unique_field'),
+        ]
+
+
+class TranslationMemory(models.Model):
+    """One translated text segment, shared by every field and post it occurs in (see api/segment_translator.py)."""
+    language = models.CharField(max_length=10)
+    source_hash = models.CharField(max_length=64)
+    source = models.TextField()
+    translation = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"[{self.language}] {self.source[:50]}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['language', 'source_hash'], name='translationmemory_unique_segment'),
+        ]
+
+
+class PropertyRail(models.Model):
+    """Ranked property ids for one rail, e.g. the latest off-plan projects (see api/rails.py)."""
+    key = models.CharField(max_length=50, primary_key=True)  # "<kind>:<group_id>", e.g. "status:2"
+    kind = models.CharField(max_length=20)
+    group_id = models.IntegerField()
+    property_ids = ArrayField(models.BigIntegerField(), default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} ({len(self.property_ids)})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'group_id'], name='propertyrail_kind_group_idx'),
+            GinIndex(fields=['property_ids'], name='propertyrail_ids_gin'),
+        ]
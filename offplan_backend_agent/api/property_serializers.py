@@ -5,6 +5,7 @@ from . import models  # adjust imports as per your structure
 from django.db.models import Sum
 from django.db.models import Sum
 from django.utils.translation import gettext as _
+from api.image_derivatives import ImageVariantMixin, ImageVariantListSerializer
 
 class PropertyUnitSerializer(serializers.ModelSerializer):
     class Meta:
@@ -77,10 +78,23 @@ class SalesStatusSerializer(serializers.ModelSerializer):
         }
 
 
-class PropertyImageSerializer(serializers.ModelSerializer):
+class PropertyImageSerializer(ImageVariantMixin, serializers.ModelSerializer):
+    image = serializers.SerializerMethodField()
+    image_webp = serializers.SerializerMethodField()
+
     class Meta:
         model = PropertyImage
-        fields = ["image", "property_id", "type"]
+        list_serializer_class = ImageVariantListSerializer
+        fields = ["image", "image_webp", "property_id", "type"]
+
+    def image_source_urls(self, obj):
+        return [obj.image]
+
+    def get_image(self, obj):
+        return self.variant(obj.image, "gallery")
+
+    def get_image_webp(self, obj):
+        return self.variant(obj.image, "gallery", "webp")
 
 # class FacilityNameSerializer(serializers.ModelSerializer):
 #     facilities = serializers.SerializerMethodField()
@@ -196,7 +210,7 @@ class GroupedApartmentSerializer(serializers.ModelSerializer):
         return 0
 
 
-class PropertyDetailSerializer(serializers.ModelSerializer):
+class PropertyDetailSerializer(ImageVariantMixin, serializers.ModelSerializer):
     city = CitySerializer()
     district = DistrictSerializer()
     developer = DeveloperCompanySerializer()
@@ -208,11 +222,13 @@ class PropertyDetailSerializer(serializers.ModelSerializer):
     title = serializers.SerializerMethodField()
     description = serializers.SerializerMethodField()
     sales_status = SalesStatusSerializer()
+    cover = serializers.SerializerMethodField()
+    cover_webp = serializers.SerializerMethodField()
 
     class Meta:
         model = Property
         fields = [
-            'id', 'title', 'description', 'cover', 'address', 'address_text',
+            'id', 'title', 'description', 'cover', 'cover_webp', 'address', 'address_text',
             'delivery_date', 'low_price', 'min_area', 'downPayment',
             'completion_rate', 'residential_units', 'commercial_units',
             'payment_plan', 'payment_minimum_down_payment', 'post_delivery',
@@ -233,6 +249,12 @@ class PropertyDetailSerializer(serializers.ModelSerializer):
         )
         # Filter out apartments with 0 units
         return [apt for apt in serializer.data if apt.get('unit_count', 0) > 0]
+
+    def get_cover(self, obj):
+        return self.variant(obj.cover, "gallery")
+
+    def get_cover_webp(self, obj):
+        return self.variant(obj.cover, "gallery", "webp")
     
     def get_title(self, obj):
         return {
@@ -0,0 +1,136 @@
+"""
+Precomputed property rails.
+
+A rail is the top RAIL_SIZE live properties of one group, stored as an id
+array in PropertyRail:
+
+    status:<id>      latest per property status (the "latest off-plan" rail)
+    city:<id>        latest per city
+    developer:<id>   latest per developer
+    district:<id>    cheapest per district (by low_price)
+
+Each kind is ranked with one ROW_NUMBER() window query. rebuild_rails()
+ranks every group; refresh_rails() only re-ranks the groups a set of changed
+properties belongs to now or was listed in before, and runs from the
+"property_rails" change feed consumer. hydrate() turns rails back into
+properties with a single in_bulk query.
+"""
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from api.models import Property, PropertyRail
+
+RAIL_SIZE = 50
+
+
+@dataclass(frozen=True)
+class RailKind:
+    name: str
+    group: str          # Property column the rail is partitioned by
+    order: tuple        # ranking, best first
+    filters: tuple = ()  # extra (lookup, value) pairs a property must match
+
+
+LATEST = (F("updated_at").desc(nulls_last=True), F("id").desc())
+
+KINDS = {
+    kind.name: kind for kind in (
+        RailKind("status", "property_status_id", LATEST),
+        RailKind("city", "city_id", LATEST),
+        RailKind("developer", "developer_id", LATEST),
+        RailKind("district", "district_id", (F("low_price").asc(), *LATEST), (("low_price__gt", 0),)),
+    )
+}
+
+
+def rail_key(kind, group_id):
+    return f"{kind}:{group_id}"
+
+
+def ranked(kind, group_ids=None, size=RAIL_SIZE):
+    """(group_id, property id) rows of the top `size` per group, in rail order."""
+    queryset = Property.objects.live().filter(**{f"{kind.group}__isnull": False}, **dict(kind.filters))
+    if group_ids is not None:
+        queryset = queryset.filter(**{f"{kind.group}__in": list(group_ids)})
+    return (
+        queryset.annotate(rank=Window(RowNumber(), partition_by=[F(kind.group)], order_by=list(kind.order)))
+        .filter(rank__lte=size)
+        .order_by(kind.group, "rank")
+        .values_list(kind.group, "id")
+    )
+
+
+def rank(kind, group_ids=None, size=RAIL_SIZE):
+    """{group_id: [property ids, best first]} for every group of kind (or only group_ids)."""
+    rails = {}
+    for group_id, prop_id in ranked(kind, group_ids, size):
+        rails.setdefault(group_id, []).append(prop_id)
+    return rails
+
+
+def store(kind, rails, group_ids=None):
+    """Upsert the ranked rails and drop those of kind (within group_ids) that came back empty."""
+    with transaction.atomic():
+        PropertyRail.objects.bulk_create(
+            [
+                PropertyRail(key=rail_key(kind.name, group_id), kind=kind.name, group_id=group_id, property_ids=ids)
+                for group_id, ids in rails.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["key"],
+            update_fields=["property_ids", "updated_at"],
+        )
+        empty = PropertyRail.objects.filter(kind=kind.name).exclude(group_id__in=list(rails))
+        if group_ids is not None:
+            empty = empty.filter(group_id__in=list(group_ids))
+        empty.delete()
+
+
+def rebuild_rails(kinds=None):
+    """Re-rank every group of the given kinds (default all). Returns {kind: rails written}."""
+    written = {}
+    for name in kinds or KINDS:
+        rails = rank(KINDS[name])
+        store(KINDS[name], rails)
+        written[name] = len(rails)
+    return written
+
+
+def refresh_rails(property_ids):
+    """Re-rank only the groups the given properties belong to now or were listed in."""
+    property_ids = list(property_ids)
+    affected = {name: set() for name in KINDS}
+    current = Property.objects.filter(id__in=property_ids).values_list(*(kind.group for kind in KINDS.values()))
+    for row in current:
+        for name, group_id in zip(KINDS, row):
+            if group_id is not None:
+                affected[name].add(group_id)
+    for name, group_id in PropertyRail.objects.filter(property_ids__overlap=property_ids).values_list("kind", "group_id"):
+        if name in affected:
+            affected[name].add(group_id)
+
+    for name, group_ids in affected.items():
+        if group_ids:
+            store(KINDS[name], rank(KINDS[name], group_ids), group_ids)
+    return sum(len(group_ids) for group_ids in affected.values())
+
+
+def load_rails(keys):
+    """{key: ids} for the requested rail keys; unknown keys are left out."""
+    return dict(PropertyRail.objects.filter(key__in=list(keys)).values_list("key", "property_ids"))
+
+
+def hydrate(rails, limit, serializer_class):
+    """{key: [serialized property, ...]} with every property of every rail loaded in one in_bulk query."""
+    rails = {key: ids[:limit] for key, ids in rails.items()}
+    wanted = {prop_id for ids in rails.values() for prop_id in ids}
+    properties = (
+        Property.objects.live().with_subunit_count().select_related("city", "district", "developer").in_bulk(wanted)
+    )
+    # Serialized together so image variants are looked up once for the whole response
+    ordered = list(properties.values())
+    serialized = dict(zip((prop.id for prop in ordered), serializer_class(ordered, many=True).data))
+    return {key: [serialized[prop_id] for prop_id in ids if prop_id in serialized] for key, ids in rails.items()}
@@ -0,0 +1,166 @@
+"""
+In-project job scheduler, driven by `manage.py run_scheduler`.
+
+Each job is a management command with an interval. Before running, a job
+takes a Postgres advisory lock named after its lock group, so two runs of
+the same group never overlap. That holds across scheduler processes, hosts,
+and manual runs started through `run_scheduler --run <job>`. Every attempt,
+including skipped ones, is recorded in JobRun with its duration.
+
+Schedules can be overridden per deployment through settings.SCHEDULER_JOBS,
+e.g. {"translate_properties": {"every": 7200}} or {"prerender_snapshots": None}
+to disable a job.
+"""
+import hashlib
+import logging
+import socket
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from api.models import JobRun
+
+log = logging.getLogger(__name__)
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+# A job that found its lock taken tries again after this, not on every tick
+SKIP_BACKOFF = 5 * MINUTE
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str
+    command: str
+    every: int  # seconds between starts
+    args: tuple = ()
+    options: dict = field(default_factory=dict)
+    lock: str = ""  # jobs sharing a lock never run concurrently; defaults to the job name
+
+    @property
+    def lock_name(self):
+        return self.lock or self.name
+
+
+# Both Estaty crawls share one lock so a slow full import can't overlap the incremental check
+DEFAULT_JOBS = [
+    Job("estaty_incremental", "incremental_estaty_check", every=10 * MINUTE, lock="estaty-sync"),
+    Job("estaty_full_import", "import_estaty_properties", every=DAY, lock="estaty-sync"),
+    Job("purge_removed_properties", "purge_removed_properties", every=DAY, lock="estaty-sync"),
+    Job("image_derivatives_feed", "consume_property_changes", every=10 * MINUTE, args=("image_derivatives",)),
+    Job("property_rails_feed", "consume_property_changes", every=10 * MINUTE, args=("property_rails",)),
+    Job("property_rails_rebuild", "rebuild_property_rails", every=DAY),
+    Job("translate_properties", "translate_properties", every=HOUR),
+    Job("prerender_snapshots", "generate_prerender_snapshots", every=6 * HOUR),
+]
+
+
+def configured_jobs():
+    overrides = getattr(settings, "SCHEDULER_JOBS", {})
+    jobs = {}
+    for job in DEFAULT_JOBS:
+        if job.name in overrides and overrides[job.name] is None:
+            continue
+        jobs[job.name] = replace(job, **overrides.get(job.name, {}))
+    for name, spec in overrides.items():
+        if spec and name not in jobs:
+            jobs[name] = Job(name=name, **spec)
+    return jobs
+
+
+def lock_key(name):
+    """Stable signed 64-bit key for pg_try_advisory_lock."""
+    return int.from_bytes(hashlib.sha1(name.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+@contextmanager
+def advisory_lock(name):
+    """
+    Session-level Postgres advisory lock; yields False when another session holds it.
+
+    The lock belongs to this thread's DB connection and is released when the
+    block exits or, should the process die, when its connection closes.
+    """
+    key = lock_key(name)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [key])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
+
+
+def run_job(job):
+    """Run one job under its lock and record the attempt. Returns the JobRun."""
+    close_old_connections()
+    host = socket.gethostname()
+    try:
+        with advisory_lock(job.lock_name) as acquired:
+            started_at = timezone.now()
+            if not acquired:
+                log.info(f"⏭ {job.name}: lock '{job.lock_name}' is held by another run, skipping")
+                return JobRun.objects.create(
+                    job=job.name, status="skipped", started_at=started_at, finished_at=started_at,
+                    duration_seconds=0, host=host,
+                )
+
+            run = JobRun.objects.create(job=job.name, status="running", started_at=started_at, host=host)
+            log.info(f"▶️ {job.name}: running {job.command}")
+            start = time.monotonic()
+            try:
+                call_command(job.command, *job.args, **job.options)
+                run.status = "success"
+            except Exception as e:
+                run.status = "failed"
+                run.error = repr(e)
+                log.exception(f"❌ {job.name} failed")
+            run.finished_at = timezone.now()
+            run.duration_seconds = time.monotonic() - start
+            run.save(update_fields=["status", "error", "finished_at", "duration_seconds"])
+            log.info(f"⏹ {job.name}: {run.status} in {run.duration_seconds:.1f}s")
+            return run
+    finally:
+        # Worker threads each hold their own connection
+        connection.close()
+
+
+def last_started(jobs):
+    """
+    Most recent attempt per job from the run history, so restarts keep the schedule:
+    {job: (started_at, skipped)}, where skipped says whether that attempt found its lock taken.
+    """
+    rows = (
+        JobRun.objects.filter(job__in=list(jobs)).values("job")
+        .annotate(last=Max("started_at"), last_run=Max("started_at", filter=~Q(status="skipped")))
+    )
+    return {row["job"]: (row["last"], row["last_run"] != row["last"]) for row in rows}
+
+
+def due_jobs(jobs, now=None):
+    """
+    Jobs whose interval has passed since their last attempt. A skipped attempt
+    counts as a start too, but is retried after SKIP_BACKOFF rather than a full
+    interval, so a daily job blocked by a long import still runs the same day.
+    """
+    now = now or timezone.now()
+    history = last_started(jobs)
+    due = []
+    for name, job in jobs.items():
+        if name not in history:
+            due.append(job)
+            continue
+        started_at, skipped = history[name]
+        interval = min(job.every, SKIP_BACKOFF) if skipped else job.every
+        if (now - started_at).total_seconds() >= interval:
+            due.append(job)
+    return due
@@ -0,0 +1,196 @@
+"""
+HTML-aware translation through a sentence-level translation memory.
+
+Documents are split into sentences; for HTML, only the text nodes are split,
+and the tags stay where they are. Every distinct sentence is translated once
+per language: it is looked up in TranslationMemory first, and the rest are
+packed into as few requests as the provider's size limit allows. The
+translations are then put back into the original text nodes. Boilerplate
+that repeats across the catalogue ("Payment plan available.", developer blurbs)
+costs one request ever, and long descriptions keep their formatting and never
+exceed the provider's size limit.
+"""
+import hashlib
+import logging
+import re
+import time
+
+from bs4 import BeautifulSoup, NavigableString
+
+from api.models import TranslationMemory
+
+log = logging.getLogger(__name__)
+
+MAX_REQUEST_CHARS = 4500  # GoogleTranslator rejects more than 5000 characters per request
+SEPARATOR = "\n"
+SKIP_TAGS = {"script", "style", "code", "pre"}
+SENTENCE_END = re.compile(r"((?<=[.!?؟])\s+)")
+HAS_LETTERS = re.compile(r"[^\W\d_]")
+LOOKUP_CHUNK = 1000
+
+
+def segment_key(text):
+    """Sentences are keyed with whitespace collapsed, as HTML renders them."""
+    return " ".join(text.split())
+
+
+def segment_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_pieces(text):
+    """
+    Split text into [(is_sentence, text), ...] whose texts join back to the input.
+
+    Leading/trailing whitespace and pieces without letters (prices, dates,
+    bullets) are kept verbatim.
+    """
+    core = text.strip()
+    if not core:
+        return [(False, text)]
+    start = text.index(core[0])
+    pieces = [(False, text[:start])] if start else []
+    for i, part in enumerate(SENTENCE_END.split(core)):
+        if part:
+            pieces.append((i % 2 == 0 and bool(HAS_LETTERS.search(part)), part))
+    if len(text) > start + len(core):
+        pieces.append((False, text[start + len(core):]))
+    return pieces
+
+
+class _Document:
+    """A parsed document: its text pieces plus how to write the translated pieces back."""
+
+    def __init__(self, source, html):
+        self.html = html
+        if html:
+            self.soup = BeautifulSoup(source, "html.parser")
+            self.nodes = [
+                node for node in self.soup.find_all(string=True)
+                if type(node) is NavigableString and node.parent.name not in SKIP_TAGS and node.strip()
+            ]
+            self.pieces = [split_pieces(str(node)) for node in self.nodes]
+        else:
+            self.pieces = [split_pieces(source)]
+
+    def segments(self):
+        return {segment_key(text) for pieces in self.pieces for is_sentence, text in pieces if is_sentence}
+
+    def render(self, translations):
+        rendered = [
+            "".join(translations[segment_key(text)] if is_sentence else text for is_sentence, text in pieces)
+            for pieces in self.pieces
+        ]
+        if not self.html:
+            return rendered[0]
+        for node, text in zip(self.nodes, rendered):
+            node.replace_with(NavigableString(text))
+        return str(self.soup)
+
+
+class SegmentTranslator:
+    """
+    Translate many documents at once through the translation memory.
+
+    translators maps a language code to an object with translate(text), e.g.
+    deep_translator.GoogleTranslator. calls, chars and memory_hits accumulate
+    over the translator's lifetime.
+    """
+
+    def __init__(self, translators, max_chars=MAX_REQUEST_CHARS, delay=0):
+        self.translators = translators
+        self.max_chars = max_chars
+        self.delay = delay
+        self.calls = 0
+        self.chars = 0
+        self.memory_hits = 0
+
+    def translate_documents(self, sources, language, html=False):
+        """Translated documents, in order; None for a document some sentence of which could not be translated."""
+        documents = [_Document(source, html) for source in sources]
+        wanted = set().union(*(document.segments() for document in documents)) if documents else set()
+        translations = self.recall(wanted, language)
+        self.memory_hits += len(translations)
+
+        missing = sorted(wanted - set(translations))
+        if missing:
+            learned = self.request(missing, language)
+            self.remember(learned, language)
+            translations.update(learned)
+
+        return [
+            document.render(translations) if document.segments() <= translations.keys() else None
+            for document in documents
+        ]
+
+    def translate(self, source, language, html=False):
+        return self.translate_documents([source], language, html=html)[0]
+
+    def recall(self, segments, language):
+        by_hash = {segment_hash(segment): segment for segment in segments}
+        hashes = list(by_hash)
+        found = {}
+        for start in range(0, len(hashes), LOOKUP_CHUNK):
+            for digest, translation in TranslationMemory.objects.filter(
+                language=language, source_hash__in=hashes[start:start + LOOKUP_CHUNK]
+            ).values_list("source_hash", "translation"):
+                found[by_hash[digest]] = translation
+        return found
+
+    def remember(self, translations, language):
+        TranslationMemory.objects.bulk_create(
+            [
+                TranslationMemory(language=language, source_hash=segment_hash(source), source=source, translation=text)
+                for source, text in translations.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+    def request(self, segments, language):
+        """Translate segments in as few requests as fit max_chars; failed segments are left out."""
+        learned = {}
+        for batch in self.batches(segments):
+            if len(batch) == 1:
+                text = self.call(batch[0], language)
+                if text:
+                    learned[batch[0]] = text
+                continue
+            result = self.call(SEPARATOR.join(batch), language)
+            lines = result.split(SEPARATOR) if result else []
+            if len(lines) == len(batch) and all(line.strip() for line in lines):
+                learned.update(zip(batch, (line.strip() for line in lines)))
+                continue
+            # The provider merged or dropped a line break; fall back to one request per sentence
+            log.debug(f"Batch of {len(batch)} segments came back as {len(lines)} lines, retrying one by one")
+            for segment in batch:
+                text = self.call(segment, language)
+                if text:
+                    learned[segment] = text
+        return learned
+
+    def batches(self, segments):
+        batch, size = [], 0
+        for segment in segments:
+            if len(segment) > self.max_chars:
+                # Only a huge block of text without sentence breaks gets here
+                log.warning(f"⚠️ Sentence of {len(segment)} characters exceeds the request limit; left untranslated")
+                continue
+            if batch and size + len(segment) + len(SEPARATOR) > self.max_chars:
+                yield batch
+                batch, size = [], 0
+            batch.append(segment)
+            size += len(segment) + len(SEPARATOR)
+        if batch:
+            yield batch
+
+    def call(self, text, language):
+        self.calls += 1
+        self.chars += len(text)
+        try:
+            return self.translators[language].translate(text)
+        except Exception as e:
+            log.error(f"❌ Translation to {language} failed for {len(text)} characters: {e}")
+            return None
+        finally:
+            if self.delay:
+                time.sleep(self.delay)
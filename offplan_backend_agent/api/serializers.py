@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import AgentDetails, BlogPost, Property, PropertyUnit
 from api.models import Property, City, District, DeveloperCompany, Consultation, Subscription, Contact, ReserveNow, RequestCallBack, AgentDetailsAdmin
 from django.db.models import Sum
+from api.image_derivatives import ImageVariantMixin, ImageVariantListSerializer
 
 
 # class CitySerializer(serializers.ModelSerializer):
@@ -78,23 +79,35 @@ class DeveloperCompanySerializer(serializers.ModelSerializer):
         model = DeveloperCompany
         fields = ["id", "name"]
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(ImageVariantMixin, serializers.ModelSerializer):
     city = CitySerializer()
     district = DistrictSerializer()
     # print(district)
     developer = DeveloperCompanySerializer()
     subunit_count = serializers.SerializerMethodField()
     title = serializers.SerializerMethodField()
+    cover = serializers.SerializerMethodField()
+    cover_webp = serializers.SerializerMethodField()
 
     class Meta:
         model = Property
+        list_serializer_class = ImageVariantListSerializer
         fields = [
-            "id", "title", "cover", "address", "address_text",
+            "id", "title", "cover", "cover_webp", "address", "address_text",
             "delivery_date", "min_area", "low_price",
             "property_type", "property_status", "sales_status",
             "updated_at", "city", "district", "developer","subunit_count",
            
         ]
+    def image_source_urls(self, obj):
+        return [obj.cover]
+
+    def get_cover(self, obj):
+        return self.variant(obj.cover, "card")
+
+    def get_cover_webp(self, obj):
+        return self.variant(obj.cover, "card", "webp")
+
     def get_title(self, obj):
         return {
             "en": obj.title or "",
@@ -227,6 +240,42 @@ class BlogPostSerializer(serializers.ModelSerializer):
             return obj.image.url
         return None
 
+class BlogPostListSerializer(serializers.ModelSerializer):
+    """Lightweight list item: no content columns, text in the requested language."""
+    title = serializers.SerializerMethodField()
+    excerpt = serializers.SerializerMethodField()
+    image_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BlogPost
+        fields = ['slug', 'title', 'excerpt', 'image_url', 'created_at']
+
+    def _lang(self):
+        lang = self.context.get('lang', 'en')
+        return lang if lang in ('ar', 'fa') else 'en'
+
+    def _localized(self, obj, field):
+        lang = self._lang()
+        if lang != 'en':
+            value = getattr(obj, f"{field}_{lang}")
+            if value:
+                return value
+        return getattr(obj, field)
+
+    def get_title(self, obj):
+        return self._localized(obj, 'title')
+
+    def get_excerpt(self, obj):
+        return self._localized(obj, 'excerpt')
+
+    def get_image_url(self, obj):
+        if obj.image:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.image.url)
+            return obj.image.url
+        return None
+
 class AgentDetailsFrontendSerializer(serializers.ModelSerializer):
     avatar = serializers.SerializerMethodField()
     nationality = serializers.CharField(default="")
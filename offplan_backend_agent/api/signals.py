@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from api.agent_directory import rebuild_agent_directory
+from api.cache import AGENTS
+from api.changefeed import DETAILS, REMOVED, record_changes
+from api.home import warm_home
+from api.models import AgentDetails, Property
+
+
+@receiver(post_save, sender=AgentDetails)
+@receiver(post_delete, sender=AgentDetails)
+def refresh_agent_directory(sender, instance, **kwargs):
+    # Covers AgentRegisterView, AgentUpdateView, AgentDeleteView and the admin
+    transaction.on_commit(refresh_agents)
+
+
+def refresh_agents():
+    rebuild_agent_directory()
+    warm_home(AGENTS)
+
+
+@receiver(post_save, sender=Property)
+def record_property_save(sender, instance, raw=False, **kwargs):
+    # Admin edits and single-row saves; the sync writes bulk and records its own changes
+    if not raw:
+        record_changes({instance.id: {DETAILS}}, source="save")
+
+
+@receiver(post_delete, sender=Property)
+def record_property_delete(sender, instance, **kwargs):
+    record_changes({instance.id: {REMOVED}}, source="delete")
@@ -1,9 +1,54 @@
+import json
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth.models import User
 from .models import AgentDetails  # adjust as needed
-from django.test import TestCase
+from django.test import TestCase, SimpleTestCase, RequestFactory, override_settings
+from django.core.cache import cache
+from .middleware.crawler_detection import CrawlerDetectionMiddleware, is_crawler_user_agent
+from .blog.slugs import BASE_SLUG_MAX_LENGTH, SlugAllocator, next_free_slug
+from .image_derivatives import _store_variants, render_variants, variant_url
+from .estaty.normalize import legacy_delivery_date, normalize_property, parse_unix_date
+from .estaty.streaming import iter_json_array
+from .estaty.lookups import LookupCache
+from .estaty.pipeline import EstatyPipeline, PipelineMetrics
+from .estaty import client as estaty_client
+from .estaty.fixtures import RECORD, REPLAY, FixtureMissing, FixtureStore, ReplayAdapter, fixture_session
+from requests.adapters import HTTPAdapter
+from .estaty.http_cache import ResponseCache
+from .estaty.statuses import listing_statuses
+from . import changefeed
+from .changefeed import coalesce
+from .cache import BLOGS, LRU, Namespace
+from .agent_directory import etag_matches
+from .views.blogs import BlogPostList
+from .views.properties_list import CustomPagination
+from .views.developer_summary import DeveloperSummaryPagination
+from rest_framework.request import Request
+from . import home
+from .rails import KINDS, hydrate, load_rails, ranked, rebuild_rails, refresh_rails
+from .models import PropertyRail
+from .serializers import PropertySerializer
+from .cache import PROPERTIES
+from .views.developer_summary import developer_summaries
+from .segment_translator import SegmentTranslator, split_pieces
+from .models import PropertyChange
+from .models import BlogPost, JobRun, TranslationSource
+from .translation import TRANSLATABLE, prune_hashes, source_hash, translate_field
+from . import scheduler
+from .models import City, DeveloperCompany, Property, PropertyStatus
+from io import BytesIO
+from unittest.mock import Mock, patch
+import threading
+from decimal import Decimal
+from contextlib import contextmanager
+from datetime import timedelta
+from django.utils import timezone
+import time
+import tempfile
+import requests
+from PIL import Image
 
 class AgentViewTests(TestCase):
     def setUp(self):
@@ -78,3 +123,926 @@ class AgentViewTests(TestCase):
         response = self.client.delete(url)
         self.assertIn(response.status_code, [200, 204])
         self.assertFalse(AgentDetails.objects.filter(id=self.agent.id).exists())
+
+    def test_agent_directory_card_fields_and_etag(self):
+        cache.clear()
+        url = reverse('agent-list-frontend')
+        response = self.client.get(url, {"fields": "card"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {"id", "name", "username", "avatar", "rating", "badge", "color"})
+
+        cached = self.client.get(url, {"fields": "card"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+
+class CrawlerDetectionTests(SimpleTestCase):
+    def test_known_crawlers_are_detected(self):
+        self.assertTrue(is_crawler_user_agent("Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"))
+        self.assertTrue(is_crawler_user_agent("facebookexternalhit/1.1"))
+        self.assertTrue(is_crawler_user_agent("Quora Link Preview/1.0"))
+
+    def test_browsers_are_not_crawlers(self):
+        self.assertFalse(is_crawler_user_agent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/124.0.0.0 Safari/537.36"))
+        self.assertFalse(is_crawler_user_agent(""))
+
+    def test_middleware_tags_request(self):
+        request = RequestFactory().get("/", HTTP_USER_AGENT="WhatsApp/2.23.20.0")
+        CrawlerDetectionMiddleware(lambda req: None)(request)
+        self.assertTrue(request.is_crawler)
+
+
+class AgentDirectoryETagTests(SimpleTestCase):
+    def test_if_none_match_is_compared_tag_by_tag(self):
+        etag = '"abc123"'
+        self.assertTrue(etag_matches('"abc123"', etag))
+        self.assertTrue(etag_matches('"zzz", W/"abc123"', etag))
+        self.assertTrue(etag_matches("*", etag))
+        self.assertFalse(etag_matches('"abc123456"', etag))
+        self.assertFalse(etag_matches('"xabc123"', etag))
+        self.assertFalse(etag_matches("abc123", etag))
+        self.assertFalse(etag_matches(None, etag))
+
+
+class BlogSlugTests(SimpleTestCase):
+    def test_next_free_slug_fills_first_gap(self):
+        taken = ["market-update", "market-update-1", "market-update-3", "market-updates"]
+        self.assertEqual(next_free_slug("market-update", taken), "market-update-2")
+        self.assertEqual(next_free_slug("new-launch", taken), "new-launch")
+
+    def test_allocator_hands_out_unique_slugs(self):
+        allocator = SlugAllocator(["dubai-guide"])
+        slugs = [allocator.allocate("Dubai Guide") for _ in range(3)]
+        self.assertEqual(slugs, ["dubai-guide-1", "dubai-guide-2", "dubai-guide-3"])
+
+    def test_preferred_slugs_are_normalized_like_titles(self):
+        allocator = SlugAllocator(["dubai-guide"])
+        self.assertEqual(allocator.allocate("Anything", preferred="Off Plan / 2026!"), "off-plan-2026")
+        self.assertEqual(allocator.allocate("Dubai Guide", preferred="Dubai Guide"), "dubai-guide-1")
+        self.assertEqual(allocator.allocate("Fallback", preferred="!!!"), "fallback")
+        long_slug = allocator.allocate("Long", preferred="a" * 400)
+        self.assertEqual(long_slug, "a" * BASE_SLUG_MAX_LENGTH)
+
+
+class ImageDerivativeTests(SimpleTestCase):
+    def test_render_variants_sizes(self):
+        buffer = BytesIO()
+        Image.new("RGB", (2400, 1600), "white").save(buffer, "JPEG")
+        rendered = render_variants(buffer.getvalue())
+
+        self.assertEqual((rendered["card"]["width"], rendered["card"]["height"]), (640, 427))
+        self.assertEqual((rendered["og"]["width"], rendered["og"]["height"]), (1200, 630))
+        self.assertTrue(rendered["gallery"]["webp"].startswith(b"RIFF"))
+
+    def test_variant_url_falls_back_to_original(self):
+        variants = {"https://cdn/a.jpg": {"card": {"jpeg": "https://s3/card.jpg", "webp": "https://s3/card.webp"}}}
+        self.assertEqual(variant_url(variants, "https://cdn/a.jpg", "card", "webp"), "https://s3/card.webp")
+        self.assertEqual(variant_url(variants, "https://cdn/a.jpg", "og"), "https://cdn/a.jpg")
+        self.assertEqual(variant_url(variants, "https://cdn/b.jpg", "card"), "https://cdn/b.jpg")
+
+    def test_stored_variant_names_change_with_their_content(self):
+        class Storage:
+            def save(self, name, content):
+                return name
+
+            def url(self, name):
+                return f"https://s3/{name}"
+
+        def store(jpeg):
+            rendered = {"card": {"width": 640, "height": 480, "jpeg": jpeg, "webp": b"webp"}}
+            return _store_variants(Storage(), "https://cdn/a.jpg", rendered)["card"]
+
+        self.assertEqual(store(b"old")["webp"], store(b"new")["webp"])
+        self.assertNotEqual(store(b"old")["jpeg"], store(b"new")["jpeg"])
+
+
+class EstatyNormalizeTests(SimpleTestCase):
+    def test_delivery_date_is_always_a_unix_timestamp(self):
+        self.assertEqual(parse_unix_date("12/2027"), parse_unix_date("2027-12-01"))
+        self.assertEqual(parse_unix_date(1827619200), 1827619200)
+        self.assertIsNone(parse_unix_date("soon"))
+
+    def test_legacy_yyyymm_delivery_dates_convert_to_timestamps(self):
+        self.assertEqual(legacy_delivery_date(202706), parse_unix_date("06/2027"))
+        self.assertIsNone(legacy_delivery_date(202713))
+        self.assertIsNone(legacy_delivery_date(parse_unix_date("06/2027")))
+        self.assertIsNone(legacy_delivery_date(None))
+
+    def test_normalize_property(self):
+        record = normalize_property({
+            "id": 7,
+            "title": "Marina Heights",
+            "delivery_date": "06/2026",
+            "post_delivery": 1,
+            "city": {"id": 1, "name": "Dubai"},
+            "district": {"id": 3, "name": "Marina"},
+            "developer_company": 12,
+            "grouped_apartments": [{"Unit_Type": "Apartment", "Rooms": "2 BR", "min_price": 1500000}],
+            "apartment": [
+                {"id": 70, "floor_plan_image": '["https:\\/\\/cdn\\/plan.jpg"]', "updated_at": "2025-01-01 10:00:00"},
+                {"apt_no": "no id"},
+            ],
+        })
+
+        self.assertEqual(record["fields"]["delivery_date"], parse_unix_date("06/2026"))
+        self.assertTrue(record["fields"]["post_delivery"])
+        self.assertEqual(record["lookups"]["district"], {"id": 3, "name": "Marina", "city_id": 1})
+        self.assertEqual(record["lookups"]["developer"], {"id": 12})
+        self.assertEqual(record["grouped_apartments"][0]["unit_type"], "Apartment")
+        self.assertEqual([unit["id"] for unit in record["units"]], [70])
+        self.assertEqual(record["units"][0]["floor_plan_image"], "https://cdn/plan.jpg")
+        self.assertIsNone(normalize_property({"id": 8})["units"])
+
+
+class StreamingJsonTests(SimpleTestCase):
+    def test_items_split_across_chunks(self):
+        payload = json.dumps({
+            "status": "ok",
+            "properties": [
+                {"id": 1, "title": "Burj Vista ] [", "apartment": [{"id": 10}]},
+                {"id": 2, "title": "دبي مارينا", "apartment": []},
+            ],
+        }, ensure_ascii=False).encode("utf-8")
+
+        for size in (1, 3, 7, len(payload)):
+            chunks = [payload[i:i + size] for i in range(0, len(payload), size)]
+            items = list(iter_json_array(chunks, "properties"))
+            self.assertEqual([item["id"] for item in items], [1, 2])
+            self.assertEqual(items[1]["title"], "دبي مارينا")
+
+    def test_truncated_payload_raises(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"properties": [{"id": 1}, {"id"'], "properties"))
+
+
+class LookupCacheTests(SimpleTestCase):
+    def test_resolve_queues_only_new_and_renamed_rows(self):
+        metrics = PipelineMetrics()
+        lookups = LookupCache(metrics)
+        lookups.rows[City] = {1: ("Dubai", None), 2: ("Abu Dhabi", None)}  # preloaded table
+
+        self.assertEqual(lookups.resolve(City, {"id": 1, "name": "Dubai"}), 1)
+        self.assertEqual(lookups.resolve(City, {"id": 2}), 2)
+        self.assertEqual(lookups.resolve(City, {"id": 2, "name": "Abu Dhabi City"}), 2)
+        self.assertEqual(lookups.resolve(City, {"id": 3, "name": "Sharjah"}), 3)
+        self.assertIsNone(lookups.resolve(City, {"id": 4}))
+
+        self.assertEqual(lookups.pending[City], {2: ("Abu Dhabi City", None), 3: ("Sharjah", None)})
+        self.assertEqual((metrics.counts["lookups.hit"], metrics.counts["lookups.miss"]), (3, 2))
+        self.assertAlmostEqual(lookups.hit_rate(), 0.6)
+
+
+class EstatyClientRetryTests(SimpleTestCase):
+    class FakeSession:
+        def __init__(self, statuses):
+            self.statuses = list(statuses)
+            self.headers = {}
+
+        def post(self, url, **kwargs):
+            response = requests.Response()
+            response.status_code = self.statuses.pop(0)
+            response._content = b'{"properties": []}'
+            return response
+
+    def test_gateway_errors_are_retried_and_counted(self):
+        metrics = PipelineMetrics()
+        session = self.FakeSession([503, 502, 200])
+        client = estaty_client.EstatyClient(api_key="k", base_url="https://estaty", session=session, metrics=metrics)
+        with patch.object(estaty_client.time, "sleep"):
+            self.assertEqual(client.filter_properties(), [])
+        self.assertEqual((metrics.counts["http.requests"], metrics.counts["http.retries"]), (3, 2))
+
+        client.session = self.FakeSession([503, 503, 503])
+        with patch.object(estaty_client.time, "sleep"), self.assertRaises(requests.HTTPError):
+            client.filter_properties()
+
+
+class ChangeFeedTests(SimpleTestCase):
+    def test_coalesce_merges_rows_per_property_and_filters_sections(self):
+        rows = [
+            PropertyChange(id=1, property_id=7, sections=["details", "images"]),
+            PropertyChange(id=2, property_id=8, sections=["units"]),
+            PropertyChange(id=3, property_id=7, sections=["status"]),
+        ]
+        self.assertEqual(coalesce(rows), {7: {"details", "images", "status"}, 8: {"units"}})
+        self.assertEqual(coalesce(rows, frozenset({"images", "status"})), {7: {"images", "status"}})
+
+    def test_consume_skips_when_another_process_holds_the_consumer(self):
+        @contextmanager
+        def held(name):
+            self.assertEqual(name, "changefeed:rails")
+            yield False
+
+        handler = Mock()
+        with patch.object(changefeed, "advisory_lock", held):
+            self.assertEqual(changefeed.consume(changefeed.Consumer("rails", handler)), 0)
+        handler.assert_not_called()
+
+
+class SegmentTranslatorTests(SimpleTestCase):
+    class UpperTranslator:
+        def __init__(self):
+            self.requests = []
+
+        def translate(self, text):
+            self.requests.append(text)
+            return text.upper()
+
+    def test_pieces_join_back_to_source(self):
+        text = "  Sea views. Payment plan 60/40!  AED 1,200 \n"
+        pieces = split_pieces(text)
+        self.assertEqual("".join(part for _, part in pieces), text)
+        self.assertEqual([part for is_sentence, part in pieces if is_sentence],
+                         ["Sea views.", "Payment plan 60/40!", "AED 1,200"])
+
+    def test_html_is_translated_in_place_with_shared_sentences_sent_once(self):
+        fake = self.UpperTranslator()
+        translator = SegmentTranslator({"ar": fake}, max_chars=30)
+        docs = ["<p>Sea views. <b>Gym</b></p><script>var x;</script>", "<ul><li>Sea views.</li><li>Gym</li></ul>"]
+        with patch.object(translator, "recall", return_value={}), patch.object(translator, "remember"):
+            result = translator.translate_documents(docs, "ar", html=True)
+
+        self.assertEqual(result, [
+            "<p>SEA VIEWS. <b>GYM</b></p><script>var x;</script>",
+            "<ul><li>SEA VIEWS.</li><li>GYM</li></ul>",
+        ])
+        self.assertEqual(fake.requests, ["Gym\nSea views."])
+
+
+class PropertyQuerySetTests(SimpleTestCase):
+    def test_filters_and_counts_without_joining_children(self):
+        queryset = Property.objects.live().with_subunit_count().matching_rooms(unit_type="Villa", rooms="3")
+        sql = str(queryset.query)
+        outer = sql.split(" FROM ")[-1]
+        self.assertIn("EXISTS(SELECT", sql)
+        self.assertNotIn("JOIN", sql)
+        self.assertNotIn("DISTINCT", sql)
+        self.assertNotIn("GROUP BY", outer)
+        # unit type and rooms have to match on the same apartment
+        self.assertEqual(sql.count('"api_groupedapartment"'), 1)
+
+    def test_rails_are_ranked_per_group_in_one_window_query(self):
+        sql = str(ranked(KINDS["district"], group_ids=[4, 9]).query)
+        self.assertIn('ROW_NUMBER() OVER (PARTITION BY "api_property"."district_id" ORDER BY "api_property"."low_price" ASC', sql)
+        self.assertIn('"api_property"."low_price" > 0', sql)
+        self.assertIn('"api_property"."district_id" IN (4, 9)', sql)
+        self.assertIn("<= 50", sql)
+
+    def test_developer_summary_is_one_grouped_query(self):
+        statuses = [PropertyStatus(id=1, name="Ready"), PropertyStatus(id=2, name="Off Plan")]
+        sql = str(developer_summaries(statuses, prefix="Em").query)
+        self.assertEqual(sql.count("GROUP BY"), 1)
+        self.assertIn('FILTER (WHERE ("api_property"."removed_at" IS NULL AND "api_property"."property_status_id" = 2)) AS "status_2"', sql)
+        self.assertIn('LIKE UPPER(Em%)', sql)
+
+
+class PrefetchingPipelineTests(SimpleTestCase):
+    class Double:
+        name = "double"
+
+        def __call__(self, batch, pipeline):
+            return [item * 2 for item in batch]
+
+    class Collect:
+        name = "collect"
+        uses_db = True
+
+        def __init__(self):
+            self.items, self.threads = [], set()
+
+        def __call__(self, batch, pipeline):
+            self.threads.add(threading.current_thread().name)
+            self.items.extend(batch)
+            return batch
+
+    def test_network_stages_run_ahead_of_the_writer(self):
+        collect = self.Collect()
+        source = lambda pipeline: ([i, i + 1] for i in range(0, 20, 2))
+        EstatyPipeline(source, [self.Double(), collect], prefetch=2).run()
+        self.assertEqual(collect.items, [i * 2 for i in range(20)])
+        self.assertEqual(collect.threads, {threading.current_thread().name})
+
+    def test_producer_errors_reach_the_caller(self):
+        def source(pipeline):
+            yield [1]
+            raise ValueError("listing broke")
+
+        with self.assertRaises(ValueError):
+            EstatyPipeline(source, [self.Double(), self.Collect()], prefetch=1).run()
+
+
+class EstatyFixtureTests(SimpleTestCase):
+    def test_recorded_responses_replay_by_request_body(self):
+        with tempfile.TemporaryDirectory() as root:
+            store = FixtureStore(root)
+            payload = {"properties": [{"id": 1, "apartment": []}, {"id": 2, "apartment": [{"id": 9}]}]}
+            request = requests.Request("POST", "https://estaty/api/v1/filter", json={}).prepare()
+            recorded = requests.Response()
+            recorded.status_code = 200
+            recorded._content = json.dumps(payload).encode("utf-8")
+            store.save(request, recorded)
+
+            session = requests.Session()
+            session.mount("https://", ReplayAdapter(store))
+            client = estaty_client.EstatyClient(api_key="k", base_url="https://estaty/api/v1", session=session)
+            self.assertEqual([p["id"] for p in client.iter_filter_properties({}, chunk_size=7)], [1, 2])
+            self.assertEqual(client.filter_properties(), payload["properties"])
+            with self.assertRaises(FixtureMissing):
+                client.get_property(1)
+
+    def test_recording_with_a_warm_cache_still_replays_with_an_empty_one(self):
+        body = b'{"property": {"id": 7, "title": "Marina"}}'
+
+        def estaty(adapter, request, **kwargs):
+            response = requests.Response()
+            if request.headers.get("If-None-Match"):
+                response.status_code, response._content = 304, b""
+            else:
+                response.status_code, response._content = 200, body
+                response.headers["ETag"] = '"v1"'
+            return response
+
+        with tempfile.TemporaryDirectory() as root:
+            with override_settings(ESTATY_FIXTURES=RECORD, ESTATY_FIXTURES_DIR=f"{root}/fixtures"), \
+                    patch.object(HTTPAdapter, "send", estaty):
+                for _ in range(2):  # the second run has a cache entry to validate against
+                    client = estaty_client.EstatyClient(
+                        api_key="k", base_url="https://estaty", session=fixture_session(),
+                        cache=ResponseCache(f"{root}/warm"),
+                    )
+                    client.fetch_property(7)
+
+            with override_settings(ESTATY_FIXTURES=REPLAY, ESTATY_FIXTURES_DIR=f"{root}/fixtures"):
+                client = estaty_client.EstatyClient(
+                    api_key="k", base_url="https://estaty", session=fixture_session(),
+                    cache=ResponseCache(f"{root}/empty"),
+                )
+                self.assertEqual(client.fetch_property(7), ({"id": 7, "title": "Marina"}, False))
+
+
+class EstatyHttpCacheTests(SimpleTestCase):
+    class FakeSession:
+        def __init__(self, responses):
+            self.responses = list(responses)
+            self.headers = {}
+            self.sent = []
+
+        def post(self, url, headers=None, **kwargs):
+            self.sent.append(headers or {})
+            status_code, body, response_headers = self.responses.pop(0)
+            response = requests.Response()
+            response.status_code = status_code
+            response._content = body
+            response.headers.update(response_headers)
+            return response
+
+    def test_validators_are_sent_and_unchanged_bodies_reported(self):
+        body = b'{"property": {"id": 7, "title": "Marina"}}'
+        session = self.FakeSession([
+            (200, body, {"ETag": '"v1"'}),
+            (304, b"", {}),
+            (200, body, {}),
+            (200, b'{"property": {"id": 7, "title": "Marina Gate"}}', {}),
+        ])
+        metrics = PipelineMetrics()
+        with tempfile.TemporaryDirectory() as root:
+            client = estaty_client.EstatyClient(
+                api_key="k", base_url="https://estaty", session=session, metrics=metrics, cache=ResponseCache(root)
+            )
+            self.assertEqual(client.fetch_property(7), ({"id": 7, "title": "Marina"}, False))
+            self.assertEqual(client.fetch_property(7), ({"id": 7, "title": "Marina"}, True))
+            self.assertEqual(client.fetch_property(7), ({"id": 7, "title": "Marina"}, True))
+            self.assertEqual(client.fetch_property(7)[1], False)
+        self.assertEqual(session.sent[0], {})
+        self.assertEqual(session.sent[1], {"If-None-Match": '"v1"'})
+        self.assertEqual((metrics.counts["http.not_modified"], metrics.counts["http.unchanged"]), (1, 1))
+
+    def test_not_modified_without_a_cached_entry_is_refetched(self):
+        body = b'{"property": {"id": 7}}'
+        session = self.FakeSession([(304, b"", {}), (200, body, {}), (304, b"", {}), (304, b"", {})])
+        with tempfile.TemporaryDirectory() as root:
+            def client(cache_dir):
+                return estaty_client.EstatyClient(
+                    api_key="k", base_url="https://estaty", session=session, cache=ResponseCache(cache_dir)
+                )
+
+            self.assertEqual(client(root).fetch_property(7), ({"id": 7}, False))
+            self.assertEqual(session.sent[1], {"Cache-Control": "no-cache"})
+            with self.assertRaises(requests.HTTPError):
+                client(f"{root}/empty").fetch_property(7)
+
+
+class StatusListingTests(SimpleTestCase):
+    class FakeClient:
+        pages = {
+            1: {"data": [{"id": 1, "property_status": {"id": 3, "name": "Off Plan"}}, {"id": 2}], "next_page_url": "p2"},
+            2: {"data": [{"id": 4, "property_status_id": "5"}], "next_page_url": None},
+        }
+
+        def get_properties_page(self, page):
+            return self.pages[page]
+
+    def test_statuses_are_read_from_every_listing_page(self):
+        metrics = PipelineMetrics()
+        statuses, complete = listing_statuses(self.FakeClient(), metrics)
+        self.assertTrue(complete)
+        self.assertEqual(statuses, {1: {"id": 3, "name": "Off Plan"}, 2: None, 4: {"id": 5}})
+        self.assertEqual(metrics.counts["listing.pages"], 2)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tiered"}})
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        namespace = Namespace("test", ttl=60)
+        calls, started = [], threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return {"n": len(calls)}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(namespace.get_or_set("k", compute))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"n": 1}] * 5)
+
+    def test_stale_values_are_served_while_refreshing_and_bump_invalidates(self):
+        namespace = Namespace("test", ttl=60, stale=60, l1=LRU(size=0))
+        namespace.get_or_set("k", lambda: "old")
+        entry = cache.get(namespace.full_key("k"))
+        cache.set(namespace.full_key("k"), {**entry, "fresh_until": time.time() - 1})
+
+        with patch("api.cache.connection"):
+            self.assertEqual(namespace.get_or_set("k", lambda: "new"), "old")
+            for _ in range(100):
+                if cache.get(namespace.full_key("k"))["value"] == "new":
+                    break
+                time.sleep(0.01)
+        self.assertEqual(namespace.get_or_set("k", lambda: "newer"), "new")
+
+        namespace.bump()
+        self.assertEqual(namespace.get_or_set("k", lambda: "newest"), "newest")
+
+    def test_versions_never_move_backwards_when_the_counter_is_lost(self):
+        namespace = Namespace("test", ttl=60, l1=LRU(size=0))
+        namespace.get_or_set("k", lambda: "before")
+        bumped = namespace.bump()
+        namespace.get_or_set("k", lambda: "after")
+
+        cache.delete(namespace.version_key())  # e.g. culled by FileBasedCache
+        self.assertGreater(namespace.version(), bumped)
+        self.assertEqual(namespace.get_or_set("k", lambda: "fresh"), "fresh")
+
+        cache.delete(namespace.version_key())
+        self.assertGreater(namespace.bump(), bumped)
+
+    def test_timed_out_wait_leaves_the_other_process_lock_alone(self):
+        namespace = Namespace("test", ttl=60)
+        lock_key = f"{namespace.full_key('k')}:lock"
+        cache.add(lock_key, 1)
+        with patch("api.cache.WAIT_TIMEOUT", 0.01):
+            self.assertEqual(namespace.get_or_set("k", lambda: "computed"), "computed")
+        self.assertEqual(cache.get(lock_key), 1)
+
+    def test_page_links_keep_only_the_parameters_the_view_reads(self):
+        def links(pagination, url):
+            paginator = pagination()
+            paginator.paginate_queryset(list(range(100)), Request(RequestFactory().get(url)))
+            return paginator.get_previous_link(), paginator.get_next_link()
+
+        self.assertEqual(
+            links(CustomPagination, "/api/properties/?page=2&junk=1"),
+            ("http://testserver/api/properties/", "http://testserver/api/properties/?page=3"),
+        )
+        self.assertEqual(
+            links(DeveloperSummaryPagination, "/api/developers/summary/?page=3&page_size=10&search=em&x=1"),
+            (
+                "http://testserver/api/developers/summary/?page=2&page_size=10&search=em",
+                "http://testserver/api/developers/summary/?page=4&page_size=10&search=em",
+            ),
+        )
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "home"}})
+class HomeBundleTests(SimpleTestCase):
+    def test_sections_are_built_once_and_spliced_in_order(self):
+        cache.clear()
+        namespace = Namespace("home-test", ttl=60)
+        builds = []
+        sections = {
+            "counts": home.Section(namespace, lambda: builds.append("counts") or {"ready": 2}),
+            "cities": home.Section(namespace, lambda: builds.append("cities") or [{"name": "Dubai"}]),
+        }
+        with patch.dict(home.SECTIONS, sections, clear=True):
+            self.assertEqual(home.resolve_sections("cities,nope"), (["cities", "nope"], ["nope"]))
+            self.assertEqual(json.loads(home.home_bundle(["cities", "counts"])),
+                             {"cities": [{"name": "Dubai"}], "counts": {"ready": 2}})
+            home.warm_home(namespace)
+            self.assertEqual(home.home_bundle(["counts"]), '{"counts":{"ready": 2}}')
+        self.assertEqual(builds, ["cities", "counts"])
+
+    def test_view_splices_sections_into_the_envelope(self):
+        cache.clear()
+        namespace = Namespace("home-view-test", ttl=60)
+        sections = {
+            "counts": home.Section(namespace, lambda: {"ready": 2}),
+            "cities": home.Section(namespace, lambda: [{"name": "Dubai"}]),
+        }
+        with patch.dict(home.SECTIONS, sections, clear=True):
+            self.assertEqual(home.resolve_sections("cities, counts,cities"), (["cities", "counts"], []))
+
+            response = self.client.get("/api/home/", {"sections": "cities,cities"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content.count(b'"cities"'), 1)
+            self.assertEqual(response.json(), {
+                "status": True, "message": "Home page data fetched successfully",
+                "data": {"cities": [{"name": "Dubai"}]}, "errors": None,
+            })
+
+            response = self.client.get("/api/home/", {"sections": "cities,nope"})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {
+                "status": False, "message": "Unknown sections requested",
+                "data": None, "errors": {"sections": ["Unknown section 'nope'."]},
+            })
+
+
+class SchedulerDueJobsTests(SimpleTestCase):
+    jobs = {
+        "daily": scheduler.Job("daily", "purge_removed_properties", every=scheduler.DAY),
+        "often": scheduler.Job("often", "incremental_estaty_check", every=10 * scheduler.MINUTE),
+    }
+
+    def due(self, history, minutes_later):
+        now = timezone.now()
+        history = {name: (now, skipped) for name, skipped in history.items()}
+        with patch.object(scheduler, "last_started", return_value=history):
+            return [job.name for job in scheduler.due_jobs(self.jobs, now=now + timedelta(minutes=minutes_later))]
+
+    def test_jobs_never_run_are_due(self):
+        self.assertEqual(self.due({}, 0), ["daily", "often"])
+
+    def test_runs_wait_a_full_interval(self):
+        self.assertEqual(self.due({"daily": False, "often": False}, 11), ["often"])
+
+    def test_skipped_attempts_back_off_instead_of_retrying_every_tick(self):
+        self.assertEqual(self.due({"daily": True, "often": True}, 1), [])
+        self.assertEqual(self.due({"daily": True, "often": True}, 6), ["daily", "often"])
+        self.assertEqual(self.due({"daily": True, "often": False}, 6), ["daily"])
+
+
+class SchedulerRunTests(TestCase):
+    job = scheduler.Job("purge", "purge_removed_properties", every=scheduler.DAY, lock="estaty-sync")
+
+    @contextmanager
+    def lock(self, acquired):
+        @contextmanager
+        def advisory_lock(name):
+            self.assertEqual(name, "estaty-sync")
+            yield acquired
+        # run_job closes its connection for worker threads; keep the test transaction open
+        with patch.object(scheduler, "advisory_lock", advisory_lock), \
+                patch.object(scheduler, "connection"), patch.object(scheduler, "close_old_connections"), \
+                patch.object(scheduler, "call_command") as call:
+            yield call
+
+    def test_held_lock_records_a_skip_without_running(self):
+        with self.lock(False) as call:
+            run = scheduler.run_job(self.job)
+        call.assert_not_called()
+        self.assertEqual(run.status, "skipped")
+
+    def test_acquired_lock_runs_the_command(self):
+        with self.lock(True) as call:
+            run = scheduler.run_job(self.job)
+        call.assert_called_once_with("purge_removed_properties")
+        self.assertEqual(run.status, "success")
+
+    def test_last_started_counts_skips_and_flags_them(self):
+        now = timezone.now()
+        JobRun.objects.create(job="purge", status="success", started_at=now - timedelta(hours=2))
+        JobRun.objects.create(job="purge", status="skipped", started_at=now - timedelta(minutes=1))
+        JobRun.objects.create(job="other", status="success", started_at=now - timedelta(minutes=3))
+        history = scheduler.last_started(["purge", "other"])
+        self.assertEqual(history["purge"], (now - timedelta(minutes=1), True))
+        self.assertEqual(history["other"], (now - timedelta(minutes=3), False))
+
+
+class IncrementalTranslationTests(TestCase):
+    spec = next(spec for spec in TRANSLATABLE if spec.model is City)
+
+    class FakeTranslator:
+        """Stands in for SegmentTranslator: one call per translate_documents, None for sources in fail."""
+
+        def __init__(self, fail=()):
+            self.fail = set(fail)
+            self.calls = 0
+            self.requests = []
+
+        def translate_documents(self, sources, language, html=False):
+            self.calls += 1
+            self.requests.extend(sources)
+            return [None if source in self.fail else f"{language}:{source}" for source in sources]
+
+    def translate(self, **kwargs):
+        translator = self.FakeTranslator(kwargs.pop("fail", ()))
+        return translate_field(self.spec, translator, **kwargs), translator
+
+    def test_edited_source_is_retranslated_and_unchanged_one_skipped(self):
+        city = City.objects.create(name="Dubai")
+        self.assertEqual(self.translate()[0], 2)
+
+        written, translator = self.translate()
+        self.assertEqual((written, translator.calls), (0, 0))
+
+        City.objects.filter(id=city.id).update(name="Dubai Marina")
+        written, translator = self.translate()
+        self.assertEqual(written, 2)
+        self.assertEqual(translator.requests, ["Dubai Marina", "Dubai Marina"])
+        city.refresh_from_db()
+        self.assertEqual((city.arabic_city_name, city.farsi_city_name), ("ar:Dubai Marina", "fa:Dubai Marina"))
+        self.assertEqual(
+            set(TranslationSource.objects.filter(object_id=city.id).values_list("source_hash", flat=True)),
+            {source_hash("Dubai Marina")},
+        )
+
+    def test_translations_without_a_hash_are_adopted(self):
+        city = City.objects.create(name="Abu Dhabi", arabic_city_name="أبو ظبي", farsi_city_name="ابوظبی")
+        written, translator = self.translate()
+        self.assertEqual((written, translator.calls), (0, 0))
+        self.assertEqual(TranslationSource.objects.filter(object_id=city.id, source_hash=source_hash("Abu Dhabi")).count(), 2)
+        city.refresh_from_db()
+        self.assertEqual(city.arabic_city_name, "أبو ظبي")
+
+    def test_limit_stops_between_batches(self):
+        for name in ("Dubai", "Sharjah", "Ajman"):
+            City.objects.create(name=name)
+        # Each single-row batch costs one call per language
+        written, translator = self.translate(limit=2, rows_per_batch=1)
+        self.assertEqual((written, translator.calls), (2, 2))
+        self.assertEqual(City.objects.filter(arabic_city_name__isnull=False).count(), 1)
+
+    def test_failed_translation_is_retried_next_run(self):
+        city = City.objects.create(name="Sharjah")
+        self.assertEqual(self.translate(fail={"Sharjah"})[0], 0)
+        self.assertFalse(TranslationSource.objects.filter(object_id=city.id).exists())
+
+        self.assertEqual(self.translate()[0], 2)
+        city.refresh_from_db()
+        self.assertEqual(city.arabic_city_name, "ar:Sharjah")
+
+    def test_removed_properties_are_not_translated(self):
+        live = Property.objects.create(title="Marina Views")
+        Property.objects.create(title="Old Tower", removed_at=timezone.now())
+        spec = next(spec for spec in TRANSLATABLE if spec.model is Property and spec.source == "title")
+        translator = self.FakeTranslator()
+        self.assertEqual(translate_field(spec, translator), 2)
+        self.assertEqual(translator.requests, ["Marina Views", "Marina Views"])
+        live.refresh_from_db()
+        self.assertEqual(live.arabic_title, "ar:Marina Views")
+
+    def test_prune_drops_hashes_of_deleted_rows(self):
+        city = City.objects.create(name="Dubai")
+        self.translate()
+        city.delete()
+        self.assertEqual(prune_hashes(), 2)
+
+
+class AgentSearchViewTests(TestCase):
+    def setUp(self):
+        self.url = reverse("agent-search")
+        self.agents = {
+            username: AgentDetails.objects.create(username=username, name=username, **fields)
+            for username, fields in {
+                "layla": dict(languages=["ar", "en"], specialties=["Luxury Villas", "Off-Plan Sales"],
+                              nationality="https://flagcdn.com/w40/ae.png", rating=Decimal("4.8"),
+                              total_business_deals="150+"),
+                "omid": dict(languages=["fa", "en"], specialties=["Off-Plan Sales"], nationality="ir",
+                             rating=Decimal("4.2"), total_business_deals="1,200"),
+                "sam": dict(languages=["en"], specialties=[], rating=None, total_business_deals=""),
+            }.items()
+        }
+
+    def search(self, **params):
+        response = self.client.get(self.url, {"fields": "username", **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [agent["username"] for agent in response.json()["data"]["results"]]
+
+    def test_array_filters_require_every_value(self):
+        self.assertEqual(self.search(languages="en,AR"), ["layla"])
+        self.assertEqual(self.search(specialty="Off-Plan Sales"), ["layla", "omid"])
+        self.assertEqual(self.client.get(self.url, {"specialty": ["Off-Plan Sales", "Luxury Villas"],
+                                                    "fields": "username"}).json()["data"]["results"],
+                         [{"username": "layla"}])
+
+    def test_nationality_matches_codes_and_flag_urls(self):
+        self.assertEqual(self.search(nationality="AE"), ["layla"])
+        self.assertEqual(self.search(nationality="ir"), ["omid"])
+
+    def test_min_rating_and_ordering(self):
+        self.assertEqual(self.search(), ["layla", "omid", "sam"])
+        self.assertEqual(self.search(ordering="rating"), ["omid", "layla", "sam"])
+        self.assertEqual(self.search(ordering="-deals"), ["omid", "layla", "sam"])
+        self.assertEqual(self.search(min_rating="4.5"), ["layla"])
+
+    def test_bad_parameters_are_rejected_together(self):
+        for min_rating in ("abc", "nan", "Infinity", "1e999999", "-1", "5.5"):
+            response = self.client.get(self.url, {"min_rating": min_rating, "ordering": "name", "fields": "nope"})
+            self.assertEqual(response.status_code, 400)
+            body = response.json()
+            self.assertFalse(body["status"])
+            self.assertEqual(set(body["errors"]), {"min_rating", "ordering", "fields"})
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "blogs"}})
+class BlogListTests(TestCase):
+    url = "/api/blogs/"
+
+    def setUp(self):
+        cache.clear()
+        BLOGS.l1.clear()
+        # auto_translate_blog runs on create; echo the text back instead of calling Google
+        translator = patch("api.blog.signals.GoogleTranslator")
+        translator.start().return_value.translate.side_effect = lambda text: f"translated {text}"
+        self.addCleanup(translator.stop)
+
+    def create_post(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BlogPost.objects.create(title=title, excerpt="<p>Short</p>", content="<p>Long</p>", author="Editor")
+
+    def test_list_items_are_a_projection_in_the_requested_language(self):
+        self.create_post("Dubai Marina")
+        item = self.client.get(self.url, {"lang": "ar"}).json()["results"][0]
+        self.assertEqual(set(item), {"slug", "title", "excerpt", "image_url", "created_at"})
+        self.assertEqual(item["title"], "translated Dubai Marina")
+        self.assertIn("content", BlogPostList.queryset.first().get_deferred_fields())
+
+    def test_cursor_pages_past_the_first(self):
+        for n in range(14):
+            self.create_post(f"Post {n}")
+        first = self.client.get(self.url).json()
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(len(first["results"]), 12)
+        self.assertEqual([item["title"] for item in second["results"]], ["Post 1", "Post 0"])
+        self.assertIsNone(second["next"])
+        self.assertFalse({item["slug"] for item in first["results"]} & {item["slug"] for item in second["results"]})
+
+    def test_cached_first_page_is_dropped_when_a_post_is_saved(self):
+        post = self.create_post("Old title")
+        self.assertEqual(self.client.get(self.url).json()["results"][0]["title"], "Old title")
+
+        post.title = "New title"
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertEqual(self.client.get(self.url).json()["results"][0]["title"], "New title")
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "rails"}})
+class PropertyRailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        PROPERTIES.l1.clear()
+        now = timezone.now()
+        self.off_plan = PropertyStatus.objects.create(name="Off Plan")
+        self.ready = PropertyStatus.objects.create(name="Ready")
+        self.dubai = City.objects.create(name="Dubai")
+        self.sharjah = City.objects.create(name="Sharjah")
+
+        def create(hours_ago, status, city, **fields):
+            return Property.objects.create(
+                title=f"Project {hours_ago}", property_status=status, city=city,
+                updated_at=now - timedelta(hours=hours_ago), **fields,
+            ).id
+
+        self.p1 = create(1, self.off_plan, self.dubai)
+        self.p2 = create(2, self.off_plan, self.dubai)
+        self.p3 = create(3, self.ready, self.sharjah)
+        self.removed = create(0, self.off_plan, self.dubai, removed_at=now)
+        rebuild_rails(["status", "city"])
+
+    def rail(self, kind, group):
+        return f"{kind}:{group.id}"
+
+    def test_rebuild_ranks_live_properties_per_group(self):
+        self.assertEqual(load_rails([
+            self.rail("status", self.off_plan), self.rail("status", self.ready),
+            self.rail("city", self.dubai), self.rail("city", self.sharjah),
+        ]), {
+            self.rail("status", self.off_plan): [self.p1, self.p2],
+            self.rail("status", self.ready): [self.p3],
+            self.rail("city", self.dubai): [self.p1, self.p2],
+            self.rail("city", self.sharjah): [self.p3],
+        })
+
+    def test_refresh_reranks_only_the_old_and_new_groups(self):
+        # Unaffected rails are left alone, so a marker survives the refresh
+        PropertyRail.objects.filter(key=self.rail("city", self.dubai)).update(property_ids=[999])
+        Property.objects.filter(id=self.p3).update(property_status=self.off_plan)
+
+        refresh_rails([self.p3])
+
+        rails = dict(PropertyRail.objects.values_list("key", "property_ids"))
+        self.assertEqual(rails[self.rail("status", self.off_plan)], [self.p1, self.p2, self.p3])
+        # the old group was found through the stored rail and, now empty, dropped
+        self.assertNotIn(self.rail("status", self.ready), rails)
+        self.assertEqual(rails[self.rail("city", self.dubai)], [999])
+        self.assertEqual(rails[self.rail("city", self.sharjah)], [self.p3])
+
+    def test_hydrate_keeps_rail_order_and_drops_removed_properties(self):
+        hydrated = hydrate({"mixed": [self.p2, self.removed, self.p1, self.p3]}, 3, PropertySerializer)
+        self.assertEqual([prop["id"] for prop in hydrated["mixed"]], [self.p2, self.p1])
+
+    def test_view_serves_requested_rails_up_to_limit(self):
+        url = reverse("property-rails")
+        key = self.rail("status", self.off_plan)
+        data = self.client.get(url, {"rails": key, "limit": 1}).json()["data"]
+        self.assertEqual({name: [prop["id"] for prop in props] for name, props in data.items()}, {key: [self.p1]})
+
+        default = self.client.get(url).json()["data"]
+        self.assertEqual(set(default), {key, self.rail("status", self.ready)})
+
+    def test_view_rejects_bad_limit_and_unknown_rails(self):
+        url = reverse("property-rails")
+        response = self.client.get(url, {"limit": "many"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], {"limit": "integer"})
+
+        response = self.client.get(url, {"rails": "status:1,color:2,city:x"})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["status"])
+        self.assertEqual(response.json()["errors"]["rails"], ["Unknown rail 'city:x'.", "Unknown rail 'color:2'."])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "developers"}})
+class DeveloperSummaryViewTests(TestCase):
+    url = "/api/developers/summary/"
+
+    def setUp(self):
+        cache.clear()
+        PROPERTIES.l1.clear()
+        now = int(time.time())
+        self.soon, self.later = now + 86400 * 30, now + 86400 * 400
+        off_plan = PropertyStatus.objects.create(name="Off Plan")
+        ready = PropertyStatus.objects.create(name="Ready")
+
+        def developer(name, *projects):
+            company = DeveloperCompany.objects.create(name=name)
+            for status, low_price, delivery_date, removed in projects:
+                Property.objects.create(
+                    title=f"{name} project", developer=company, property_status=status, low_price=low_price,
+                    delivery_date=delivery_date, removed_at=timezone.now() if removed else None,
+                )
+            return company
+
+        self.emaar = developer(
+            "Emaar",
+            (off_plan, 0, now - 86400, False),
+            (ready, 2_000_000, self.later, False),
+            (off_plan, None, self.soon + 86400, False),
+            (off_plan, 500, self.soon, True),  # removed: counted nowhere
+        )
+        developer("Emirates Living", (ready, 900_000, None, False))
+        developer("Nakheel", (off_plan, 1_500_000, None, False), (ready, 1_200_000, None, False))
+        developer("Damac", (off_plan, 100, self.soon, True))
+
+    def summary(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["data"]
+
+    def test_counts_prices_and_deliveries_ignore_removed_and_empty_values(self):
+        results = self.summary()["results"]
+        self.assertEqual([row["name"] for row in results], ["Emaar", "Emirates Living", "Nakheel"])
+        emaar = results[0]
+        self.assertEqual(emaar["id"], self.emaar.id)
+        self.assertEqual(emaar["project_count"], 3)
+        self.assertEqual(emaar["status_counts"], {"Off Plan": 2, "Ready": 1})
+        self.assertEqual(emaar["min_price"], 2_000_000)
+        self.assertEqual(emaar["next_delivery"], self.soon + 86400)
+
+    def test_search_is_a_prefix_match_and_projects_ordering(self):
+        self.assertEqual([row["name"] for row in self.summary(search="EM")["results"]], ["Emaar", "Emirates Living"])
+        self.assertEqual(self.summary(search="mar")["results"], [])
+        self.assertEqual(
+            [row["project_count"] for row in self.summary(ordering="projects")["results"]], [3, 2, 1]
+        )
+
+    def test_page_size_is_capped(self):
+        companies = DeveloperCompany.objects.bulk_create(DeveloperCompany(name=f"Dev {n:03d}") for n in range(101))
+        Property.objects.bulk_create(Property(title="Tower", developer=company) for company in companies)
+        data = self.summary(page_size=500)
+        self.assertEqual(data["count"], 104)
+        self.assertEqual(len(data["results"]), 100)
+
+    def test_unknown_ordering_is_rejected(self):
+        response = self.client.get(self.url, {"ordering": "bogus"})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["status"])
+        self.assertEqual(response.json()["errors"], {"ordering": ["name", "projects"]})
@@ -0,0 +1,204 @@
+"""
+Incremental Arabic/Farsi translation of property content.
+
+Every translated field has a TranslationSource row holding the hash of the
+English text it was produced from. A field is (re)translated only when its
+source text is new or its hash no longer matches, so a run costs one request
+per edited field instead of one per field in the database. Fields are sent
+through SegmentTranslator in batches of rows, so sentences shared across rows
+are translated once and HTML descriptions keep their markup. Work is taken
+newest off-plan first, then ready, then everything else, so a run cut short
+by --limit or a rate limit has covered the pages visitors see most.
+"""
+import hashlib
+import html
+import logging
+from dataclasses import dataclass
+
+from bs4 import BeautifulSoup
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from api.changefeed import TRANSLATIONS, record_changes
+from api.segment_translator import SegmentTranslator
+from api.models import (
+    City, District, Facility, GroupedApartment, PaymentPlan, PaymentPlanValue, Property, PropertyStatus,
+    SalesStatus, TranslationSource,
+)
+
+log = logging.getLogger(__name__)
+
+LANGUAGES = ("ar", "fa")
+REQUEST_DELAY = 1.2  # seconds between translator calls, to stay under the free-tier rate limit
+ROWS_PER_BATCH = 50
+
+
+def clean_text(text):
+    """Visible text of an HTML fragment, entities unescaped and whitespace collapsed."""
+    stripped = BeautifulSoup(text, "html.parser").get_text(separator=" ", strip=True)
+    return " ".join(html.unescape(stripped).split())
+
+
+def source_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def listing_priority(prefix=""):
+    """Newest off-plan first, then ready, then the rest."""
+    status = f"{prefix}property_status__name__iexact"
+    return [
+        Case(
+            When(**{status: "Off Plan"}, then=Value(0)),
+            When(**{status: "Ready"}, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        ),
+        f"-{prefix}updated_at",
+        "id",
+    ]
+
+
+@dataclass(frozen=True)
+class TranslatableField:
+    model: type
+    source: str
+    targets: dict  # language -> translated field
+    ordering: tuple = ("id",)
+    html: bool = False  # translate text nodes in place instead of stripping the markup
+
+    def queryset(self):
+        # Tombstoned properties are no longer served, so they are not worth a translation
+        return Property.objects.live() if self.model is Property else self.model.objects.all()
+
+    def source_text(self, source):
+        if not source:
+            return ""
+        return source.strip() if self.html else clean_text(source)
+
+
+TRANSLATABLE = [
+    TranslatableField(Property, "title", {"ar": "arabic_title", "fa": "farsi_title"}, tuple(listing_priority())),
+    TranslatableField(Property, "description", {"ar": "arabic_desc", "fa": "farsi_desc"}, tuple(listing_priority()),
+                      html=True),
+    TranslatableField(GroupedApartment, "unit_type", {"ar": "ar_unit_type", "fa": "fa_unit_type"},
+                      tuple(listing_priority("property__"))),
+    TranslatableField(GroupedApartment, "rooms", {"ar": "ar_rooms", "fa": "fa_rooms"},
+                      tuple(listing_priority("property__"))),
+    TranslatableField(PaymentPlan, "name", {"ar": "ar_plan_name", "fa": "fa_plan_name"},
+                      tuple(listing_priority("property__"))),
+    TranslatableField(PaymentPlan, "description", {"ar": "ar_plan_desc", "fa": "fa_plan_desc"},
+                      tuple(listing_priority("property__"))),
+    TranslatableField(PaymentPlanValue, "name", {"ar": "ar_value_name", "fa": "fa_value_name"},
+                      tuple(listing_priority("property_payment_plan__property__"))),
+    TranslatableField(City, "name", {"ar": "arabic_city_name", "fa": "farsi_city_name"}),
+    TranslatableField(District, "name", {"ar": "arabic_dist_name", "fa": "farsi_dist_name"}),
+    TranslatableField(Facility, "name", {"ar": "ar_facility", "fa": "fa_facility"}),
+    TranslatableField(PropertyStatus, "name", {"ar": "ar_prop_status", "fa": "fa_prop_status"}),
+    TranslatableField(SalesStatus, "name", {"ar": "ar_sales_status", "fa": "fa_sales_status"}),
+]
+
+
+def stored_hashes(spec):
+    """{(object_id, field): hash} for every translated field of spec."""
+    return {
+        (object_id, field): digest
+        for object_id, field, digest in TranslationSource.objects.filter(
+            model=spec.model.__name__, field__in=list(spec.targets.values())
+        ).values_list("object_id", "field", "source_hash")
+    }
+
+
+def pending_translations(spec):
+    """
+    [(object_id, text, digest, [(language, field), ...])] in priority order.
+
+    Fields translated before hashes were tracked (target filled, no hash) are
+    adopted: their current hash is stored and they are not re-translated.
+    """
+    hashes = stored_hashes(spec)
+    targets = list(spec.targets.items())
+    pending, adopted = [], []
+    rows = spec.queryset().order_by(*spec.ordering).values_list(
+        "id", spec.source, *[field for _, field in targets]
+    )
+    for object_id, source, *translated in rows.iterator(chunk_size=2000):
+        text = spec.source_text(source)
+        if not text:
+            continue
+        digest = source_hash(text)
+        todo = []
+        for (language, field), current in zip(targets, translated):
+            known = hashes.get((object_id, field))
+            if known == digest:
+                continue
+            if known is None and current:
+                adopted.append((object_id, field, digest))
+            else:
+                todo.append((language, field))
+        if todo:
+            pending.append((object_id, text, digest, todo))
+
+    if adopted:
+        save_hashes(spec, adopted)
+        log.info(f"📌 Adopted {len(adopted)} existing {spec.model.__name__} translations")
+    return pending
+
+
+def save_hashes(spec, entries):
+    """Upsert (object_id, field, digest) entries."""
+    TranslationSource.objects.bulk_create(
+        [TranslationSource(model=spec.model.__name__, object_id=object_id, field=field, source_hash=digest)
+         for object_id, field, digest in entries],
+        update_conflicts=True, unique_fields=["model", "object_id", "field"],
+        update_fields=["source_hash", "translated_at"],
+    )
+
+
+def translate_field(spec, translator, limit=None, rows_per_batch=ROWS_PER_BATCH):
+    """
+    Translate the pending fields of spec with a SegmentTranslator.
+
+    Stops once translator.calls reaches limit, checked between batches.
+    Returns the number of fields written.
+    """
+    written = 0
+    pending = pending_translations(spec)
+    for start in range(0, len(pending), rows_per_batch):
+        if limit is not None and translator.calls >= limit:
+            break
+        batch = pending[start:start + rows_per_batch]
+        values = {object_id: {} for object_id, *_ in batch}
+        for language, field in spec.targets.items():
+            rows = [(object_id, text) for object_id, text, _, todo in batch if (language, field) in todo]
+            if not rows:
+                continue
+            translated = translator.translate_documents([text for _, text in rows], language, html=spec.html)
+            max_length = spec.model._meta.get_field(field).max_length
+            for (object_id, _), text in zip(rows, translated):
+                if text:
+                    values[object_id][field] = text[:max_length] if max_length else text
+
+        digests = {object_id: digest for object_id, _, digest, _ in batch}
+        with transaction.atomic():
+            for object_id, fields in values.items():
+                if fields:
+                    spec.model.objects.filter(id=object_id).update(**fields)
+            save_hashes(spec, [
+                (object_id, field, digests[object_id]) for object_id, fields in values.items() for field in fields
+            ])
+            if spec.model is Property:
+                record_changes({object_id: {TRANSLATIONS} for object_id, fields in values.items() if fields},
+                               source="translate")
+        written += sum(len(fields) for fields in values.values())
+        log.info(f"✅ Translated {spec.model.__name__}.{spec.source}: {written}/{sum(len(p[3]) for p in pending)} fields")
+    return written
+
+
+def prune_hashes():
+    """Drop hashes of rows that no longer exist, e.g. plans the sync recreated under new ids."""
+    deleted = 0
+    for model in {spec.model for spec in TRANSLATABLE}:
+        deleted += TranslationSource.objects.filter(model=model.__name__).exclude(
+            object_id__in=model.objects.values("id")
+        ).delete()[0]
+    return deleted
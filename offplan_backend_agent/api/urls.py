@@ -13,11 +13,16 @@ from api.views.property_city_count import PropertyByStatusView
 from api.views.consultation import ConsultationView
 from api.views.subscription import SubscribeView
 from api.views.developers_list import DeveloperListView
+from api.views.developer_summary import DeveloperSummaryView
 from api.views import AgentListView
 from api.views.contact_enquiry import ContactEnquiryView
 from api.views.reserve_now import ReserveNowView
 from api.views.blogs import BlogPostDetail, BlogPostList
 from api.views.agent_list_frontend import AgentListFrontendView
+from api.views.agent_search import AgentSearchView
+from api.views.property_changes import PropertyChangeFeedView
+from api.views.home import HomeBundleView
+from api.views.property_rails import PropertyRailsView
 
 
 # router = DefaultRouter()
@@ -27,9 +32,13 @@ urlpatterns = [
     # path('', include(router.urls)),
     # path('agent/<str:username>/', AgentDetailByUsernameView.as_view(), name='agent-detail-by-username'),
     path("agents/frontend/", AgentListFrontendView.as_view(), name="agent-list-frontend"),
+    path("agents/search/", AgentSearchView.as_view(), name="agent-search"),
     path("properties/filter/", FilterPropertiesView.as_view(), name="property-filter"),
     path("properties/", PropertyListView.as_view(), name="property-list"),
+    path("properties/rails/", PropertyRailsView.as_view(), name="property-rails"),
     path("property/<int:id>/", PropertyDetailView.as_view(), name="property-detail"),
+    path("property-changes/", PropertyChangeFeedView.as_view(), name="property-changes"),
+    path("home/", HomeBundleView.as_view(), name="home-bundle"),
     path("cities/", CityListView.as_view(), name="city-list"),
     path('register/', AgentRegisterView.as_view(), name='register-agent'),
     path('agent/update/<int:id>/', AgentUpdateView.as_view(), name='agent-update'),
@@ -40,6 +49,7 @@ urlpatterns = [
     path('consultation', ConsultationView.as_view(), name='consultation_details'),
     path('subscribe/', SubscribeView.as_view(), name='subscribe'),
     path('developers/', DeveloperListView.as_view(), name='developer-list'),
+    path('developers/summary/', DeveloperSummaryView.as_view(), name='developer-summary'),
     path('contact/', ContactEnquiryView.as_view(), name='contact-enquiry'),
     path('reserve-now/<int:id>/',ReserveNowView.as_view(),name='reserve-now'),
     path('api/blogs/', BlogPostList.as_view()),
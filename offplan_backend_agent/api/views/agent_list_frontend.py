@@ -2,18 +2,43 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from api.models import AgentDetails
-from api.serializers import AgentDetailsFrontendSerializer
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from api.agent_directory import get_agent_directory, resolve_fields, project, etag_for, etag_matches, DIRECTORY_FIELDS
+
+fields_param = openapi.Parameter(
+    'fields',
+    openapi.IN_QUERY,
+    description=f"Comma separated subset of {', '.join(DIRECTORY_FIELDS)}, or 'card' for the card fields only",
+    type=openapi.TYPE_STRING,
+    required=False,
+)
 
 class AgentListFrontendView(APIView):
+    @swagger_auto_schema(manual_parameters=[fields_param])
     def get(self, request):
-        agents = AgentDetails.objects.all()
-        serializer = AgentDetailsFrontendSerializer(agents, many=True)
-        
+        fields, invalid = resolve_fields(request.query_params.get("fields"))
+        if invalid:
+            return Response({
+                "status": "error",
+                "message": "Unknown fields requested",
+                "errors": {"fields": [f"Unknown field '{name}'." for name in invalid]}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        directory = get_agent_directory()
+        etag = etag_for(directory, fields)
+
+        if etag_matches(request.headers.get("If-None-Match"), etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response["ETag"] = etag
+            return response
+
         response_data = {
             "status": "success",
             "message": "Agents fetched successfully",
-            "results": serializer.data
+            "results": project(directory["results"], fields)
         }
-        
-        return Response(response_data, status=status.HTTP_200_OK)
+
+        response = Response(response_data, status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        return response
@@ -0,0 +1,124 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import BigIntegerField, F, Func, Q, TextField, Value
+from django.db.models.functions import Cast, NullIf
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import AllowAny
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from api.agent_directory import resolve_fields, project
+from api.models import AgentDetails
+from api.serializers import AgentDetailsFrontendSerializer
+
+MAX_RATING = 5
+
+ORDERING_CHOICES = {
+    "rating": (F("rating").asc(nulls_last=True), "id"),
+    "-rating": (F("rating").desc(nulls_last=True), "id"),
+    "deals": (F("deals").asc(nulls_last=True), "id"),
+    "-deals": (F("deals").desc(nulls_last=True), "id"),
+}
+
+search_params = [
+    openapi.Parameter('languages', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Comma separated language codes the agent must speak, e.g. ar,en"),
+    openapi.Parameter('specialty', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Specialty the agent must have (repeatable)"),
+    openapi.Parameter('nationality', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Two letter country code, e.g. ae"),
+    openapi.Parameter('min_rating', openapi.IN_QUERY, type=openapi.TYPE_NUMBER, description=f"0 to {MAX_RATING}"),
+    openapi.Parameter('ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      enum=list(ORDERING_CHOICES), description="Defaults to -rating"),
+    openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Comma separated field subset, or 'card'"),
+]
+
+
+def _deals_as_number():
+    # total_business_deals is free text ("150+", "1,200"); keep the digits only
+    digits = Func(
+        F("total_business_deals"), Value(r"[^0-9]"), Value(""), Value("g"),
+        function="REGEXP_REPLACE", output_field=TextField(),
+    )
+    return Cast(NullIf(digits, Value("")), BigIntegerField())
+
+
+class AgentSearchView(APIView):
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(manual_parameters=search_params)
+    def get(self, request):
+        params = request.query_params
+        errors = {}
+
+        fields, invalid_fields = resolve_fields(params.get("fields"))
+        if invalid_fields:
+            errors["fields"] = [f"Unknown field '{name}'." for name in invalid_fields]
+
+        ordering = params.get("ordering", "-rating")
+        if ordering not in ORDERING_CHOICES:
+            errors["ordering"] = [f"Must be one of: {', '.join(ORDERING_CHOICES)}."]
+
+        min_rating = None
+        if params.get("min_rating"):
+            try:
+                min_rating = Decimal(params["min_rating"])
+                if not min_rating.is_finite():
+                    raise InvalidOperation
+            except InvalidOperation:
+                min_rating = None
+                errors["min_rating"] = ["A valid number is required."]
+            else:
+                # Ratings are 0-5; a huge value like 1e999999 would overflow Postgres numeric
+                if not 0 <= min_rating <= MAX_RATING:
+                    min_rating = None
+                    errors["min_rating"] = [f"Must be between 0 and {MAX_RATING}."]
+
+        if errors:
+            return Response({
+                "status": False,
+                "message": "Invalid search parameters",
+                "data": None,
+                "errors": errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        agents = AgentDetails.objects.all()
+
+        if languages := params.get("languages"):
+            codes = [code.strip().lower() for code in languages.split(",") if code.strip()]
+            agents = agents.filter(languages__contains=codes)
+
+        for specialty in params.getlist("specialty"):
+            agents = agents.filter(specialties__contains=[specialty])
+
+        if nationality := params.get("nationality"):
+            code = nationality.strip().lower()
+            # The admin stores nationality as a flagcdn URL, older rows as a plain code
+            agents = agents.filter(Q(nationality__iexact=code) | Q(nationality__iendswith=f"/{code}.png"))
+
+        if min_rating is not None:
+            agents = agents.filter(rating__gte=min_rating)
+
+        if ordering in ("deals", "-deals"):
+            agents = agents.annotate(deals=_deals_as_number())
+        agents = agents.order_by(*ORDERING_CHOICES[ordering])
+
+        paginator = PageNumberPagination()
+        paginated_agents = paginator.paginate_queryset(agents, request)
+        serializer = AgentDetailsFrontendSerializer(paginated_agents, many=True)
+
+        return Response({
+            "status": True,
+            "message": "Agents fetched successfully",
+            "data": {
+                "count": paginator.page.paginator.count,
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "results": project(serializer.data, fields)
+            },
+            "errors": None
+        }, status=status.HTTP_200_OK)
@@ -1,11 +1,54 @@
 # views.py
 from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
 
+from api.blog.cache import first_page_key
+from api.cache import BLOGS
 from api.models import BlogPost
-from api.serializers import BlogPostSerializer
+from api.serializers import BlogPostSerializer, BlogPostListSerializer
+
+LIST_FIELDS = (
+    'id', 'slug', 'image', 'created_at',
+    'title', 'title_ar', 'title_fa',
+    'excerpt', 'excerpt_ar', 'excerpt_fa',
+)
+
+lang_param = openapi.Parameter(
+    'lang', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['en', 'ar', 'fa'],
+    description="Language of title and excerpt (defaults to en)",
+)
+
+
+class BlogPostCursorPagination(CursorPagination):
+    page_size = 12
+    ordering = '-created_at'
+
+
 class BlogPostList(ListAPIView):
-    queryset = BlogPost.objects.all().order_by('-created_at')
-    serializer_class = BlogPostSerializer
+    # Full content is only served by BlogPostDetail
+    queryset = BlogPost.objects.only(*LIST_FIELDS)
+    serializer_class = BlogPostListSerializer
+    pagination_class = BlogPostCursorPagination
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        lang = self.request.query_params.get('lang', 'en')
+        context['lang'] = lang if lang in ('en', 'ar', 'fa') else 'en'
+        return context
+
+    @swagger_auto_schema(manual_parameters=[lang_param])
+    def get(self, request, *args, **kwargs):
+        paginator = self.paginator
+        if request.query_params.get(paginator.cursor_query_param):
+            return self.list(request, *args, **kwargs)
+
+        # First page is what every visitor sees; cache it until a post changes
+        lang = self.get_serializer_context()['lang']
+        key = first_page_key(lang, paginator.get_page_size(request))
+        return Response(BLOGS.get_or_set(key, lambda: self.list(request, *args, **kwargs).data))
 
 class BlogPostDetail(RetrieveAPIView):
     queryset = BlogPost.objects.all()
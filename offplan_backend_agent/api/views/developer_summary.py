@@ -0,0 +1,121 @@
+import time
+
+from django.db.models import Count, Min, Q
+from django.utils.http import urlencode
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import AllowAny
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from api.cache import PROPERTIES
+from api.models import DeveloperCompany, PropertyStatus
+from api.views.properties_list import CanonicalLinksMixin
+
+ORDERINGS = {
+    "name": ("name", "id"),
+    "projects": ("-project_count", "name", "id"),
+}
+
+summary_params = [
+    openapi.Parameter('search', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Developer name prefix (case-insensitive)"),
+    openapi.Parameter('ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(ORDERINGS),
+                      description="Sort by name (default) or by project count"),
+    openapi.Parameter('page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description="Max 100"),
+]
+
+
+def developer_summaries(statuses, prefix=None, ordering="name"):
+    """
+    Developers with live projects, annotated in one grouped query: project_count,
+    a status_<id> count per status, min_price and next_delivery (the nearest
+    upcoming delivery_date, a UNIX timestamp).
+    """
+    live = Q(properties__removed_at__isnull=True)
+    annotations = {
+        "project_count": Count("properties", filter=live),
+        "min_price": Min("properties__low_price", filter=live & Q(properties__low_price__gt=0)),
+        "next_delivery": Min(
+            "properties__delivery_date", filter=live & Q(properties__delivery_date__gte=int(time.time()))
+        ),
+    }
+    for property_status in statuses:
+        annotations[f"status_{property_status.id}"] = Count(
+            "properties", filter=live & Q(properties__property_status_id=property_status.id)
+        )
+    queryset = DeveloperCompany.objects.all()
+    if prefix:
+        queryset = queryset.filter(name__istartswith=prefix)
+    return queryset.annotate(**annotations).filter(project_count__gt=0).order_by(*ORDERINGS[ordering])
+
+
+class DeveloperSummaryPagination(CanonicalLinksMixin, PageNumberPagination):
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    link_params = ("search", "ordering", "page_size")
+
+    def get_paginated_response(self, data):
+        return Response({
+            "status": True,
+            "message": "Developers fetched successfully",
+            "data": {
+                "count": self.page.paginator.count,
+                "current_page": self.page.number,
+                "next_page_url": self.get_next_link(),
+                "previous_page_url": self.get_previous_link(),
+                "results": data
+            },
+            "errors": None
+        })
+
+
+class DeveloperSummaryView(APIView):
+    """Developer cards: project counts, counts by status, lowest price and next delivery per developer."""
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(manual_parameters=summary_params)
+    def get(self, request):
+        ordering = request.GET.get("ordering", "name")
+        if ordering not in ORDERINGS:
+            return Response({
+                "status": False,
+                "message": f"ordering must be one of {', '.join(ORDERINGS)}",
+                "data": None,
+                "errors": {"ordering": list(ORDERINGS)}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Keyed on the parameters the page is built from, normalized, so junk query strings share entries
+        params = urlencode([
+            ("page", request.query_params.get("page", "1")),
+            ("page_size", DeveloperSummaryPagination().get_page_size(request)),
+            ("search", request.query_params.get("search", "").strip().lower()),
+            ("ordering", ordering),
+        ])
+        data = PROPERTIES.get_or_set(f"developers:{params}", lambda: self.page(request, ordering))
+        return Response(data)
+
+    def page(self, request, ordering):
+        statuses = list(PropertyStatus.objects.order_by("id"))
+        developers = developer_summaries(statuses, request.GET.get("search", "").strip(), ordering)
+        paginator = DeveloperSummaryPagination()
+        page = paginator.paginate_queryset(developers, request, view=self)
+        results = [
+            {
+                "id": developer.id,
+                "name": developer.name,
+                "project_count": developer.project_count,
+                "status_counts": {
+                    property_status.name: getattr(developer, f"status_{property_status.id}")
+                    for property_status in statuses
+                },
+                "min_price": developer.min_price,
+                "next_delivery": developer.next_delivery,
+            }
+            for developer in page
+        ]
+        return paginator.get_paginated_response(results).data
@@ -0,0 +1,37 @@
+from django.http import HttpResponse
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from api.home import SECTIONS, home_bundle, resolve_sections
+
+sections_param = openapi.Parameter(
+    'sections', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description=f"Comma separated sections to include (default all): {', '.join(SECTIONS)}",
+)
+
+
+class HomeBundleView(APIView):
+    """Everything the landing page needs in one response, served from precomputed blobs."""
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(manual_parameters=[sections_param])
+    def get(self, request):
+        names, invalid = resolve_sections(request.GET.get("sections"))
+        if invalid:
+            return Response({
+                "status": False,
+                "message": "Unknown sections requested",
+                "data": None,
+                "errors": {"sections": [f"Unknown section '{name}'." for name in invalid]}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # The sections are already JSON, so the envelope is assembled as text instead of re-rendering them
+        body = (
+            '{"status":true,"message":"Home page data fetched successfully",'
+            f'"data":{home_bundle(names)},"errors":null}}'
+        )
+        return HttpResponse(body, content_type="application/json")
@@ -1,75 +1,69 @@
-import re
-from django.core.cache import cache
 from django.shortcuts import render
 from django.http import HttpResponseRedirect
 import requests
 import json
 
-CRAWLER_USER_AGENTS = re.compile(
-    r"googlebot|bingbot|yandex|duckduckbot|baiduspider|facebook|twitterbot|linkedinbot|whatsapp|telegrambot|slackbot|redditbot|quora link preview|pinterest|tumblr|vkbot",
-    re.I
-)
+from api.cache import AGENTS
+
+# request.is_crawler is set by api.middleware.crawler_detection.CrawlerDetectionMiddleware
+
+def fetch_agent_meta(username):
+    """Title, description and image for an agent's share card, from the public agent API."""
+    api_url = f"https://offplan.market/api/agent/{username}/"
+    response = requests.get(api_url, timeout=5)
+    if response.status_code != 200 or not response.json().get("status"):
+        raise Exception("Agent not found")
+    agent = response.json()["data"]
+
+    # Handle multilingual name properly
+    agent_name = agent.get('name', '')
+    if isinstance(agent_name, dict):
+        # Extract English name from multilingual dict
+        agent_name = agent_name.get('en', agent_name.get('english', ''))
+        if not agent_name and agent_name != '':
+            # Fallback to first available language
+            agent_name = list(agent_name.values())[0] if agent_name else 'Agent'
+    elif isinstance(agent_name, str):
+        # If it's already a string, use it as is
+        pass
+    else:
+        # Fallback if name is neither dict nor string
+        agent_name = 'Agent'
+
+    profile_image = agent.get('profile_image_url')
+    if not profile_image:
+        profile_image = "https://offplan.market/static/default-agent.jpg"
+
+    # Handle multilingual bio if needed
+    agent_bio = agent.get('bio', '')
+    if isinstance(agent_bio, dict):
+        agent_bio = agent_bio.get('en', agent_bio.get('english', ''))
+        if not agent_bio and agent_bio != '':
+            agent_bio = list(agent_bio.values())[0] if agent_bio else ''
+
+    if not agent_bio:
+        agent_bio = f"Explore premium off-plan projects with {agent_name}. Click to view listings & contact now."
+
+    return {
+        "title": f"{agent_name} | Offplan Expert – Offplan.Market",
+        "description": agent_bio,
+        "image": profile_image,
+    }
+
 
 def agent_meta_view(request, username):
-    user_agent = request.META.get('HTTP_USER_AGENT', '')
-
-    if CRAWLER_USER_AGENTS.search(user_agent):
-        cache_key = f"agent_meta:{username}"
-        meta_data = cache.get(cache_key)
-
-        if not meta_data:
-            api_url = f"https://offplan.market/api/agent/{username}/"
-            try:
-                response = requests.get(api_url, timeout=5)
-                if response.status_code == 200 and response.json().get("status"):
-                    agent = response.json()["data"]
-                    
-                    # Handle multilingual name properly
-                    agent_name = agent.get('name', '')
-                    if isinstance(agent_name, dict):
-                        # Extract English name from multilingual dict
-                        agent_name = agent_name.get('en', agent_name.get('english', ''))
-                        if not agent_name and agent_name != '':
-                            # Fallback to first available language
-                            agent_name = list(agent_name.values())[0] if agent_name else 'Agent'
-                    elif isinstance(agent_name, str):
-                        # If it's already a string, use it as is
-                        pass
-                    else:
-                        # Fallback if name is neither dict nor string
-                        agent_name = 'Agent'
-                    
-                    profile_image = agent.get('profile_image_url')
-                    if not profile_image:
-                        profile_image = "https://offplan.market/static/default-agent.jpg"
-
-                    # Handle multilingual bio if needed
-                    agent_bio = agent.get('bio', '')
-                    if isinstance(agent_bio, dict):
-                        agent_bio = agent_bio.get('en', agent_bio.get('english', ''))
-                        if not agent_bio and agent_bio != '':
-                            agent_bio = list(agent_bio.values())[0] if agent_bio else ''
-                    
-                    if not agent_bio:
-                        agent_bio = f"Explore premium off-plan projects with {agent_name}. Click to view listings & contact now."
-
-                    meta_data = {
-                        "title": f"{agent_name} | Offplan Expert – Offplan.Market",
-                        "description": agent_bio,
-                        "image": profile_image,
-                        "url": request.build_absolute_uri(),
-                    }
-                    cache.set(cache_key, meta_data, timeout=300)
-                else:
-                    raise Exception("Agent not found")
-            except Exception as e:
-                print(f"Error fetching agent data: {e}")
-                meta_data = {
-                    "title": "Agent Not Found",
-                    "description": "This agent profile does not exist.",
-                    "image": "https://offplan.market/static/default-agent.jpg",
-                    "url": request.build_absolute_uri(),
-                }
+    if request.is_crawler:
+        try:
+            # Shared across workers and coalesced, so a crawler burst makes one call to the agent API
+            meta_data = dict(AGENTS.get_or_set(f"meta:{username}", lambda: fetch_agent_meta(username)))
+        except Exception as e:
+            print(f"Error fetching agent data: {e}")
+            meta_data = {
+                "title": "Agent Not Found",
+                "description": "This agent profile does not exist.",
+                "image": "https://offplan.market/static/default-agent.jpg",
+            }
+        meta_data["url"] = request.build_absolute_uri()
 
         return render(request, "agent_meta_template.html", meta_data)
 
@@ -77,8 +71,7 @@ def agent_meta_view(request, username):
     return HttpResponseRedirect(react_url)
 
 def blogs_listing_meta_view(request):
-    user_agent = request.META.get("HTTP_USER_AGENT", "")
-    if CRAWLER_USER_AGENTS.search(user_agent):
+    if request.is_crawler:
         meta_data = {
             "title": "Latest Real Estate Insights | Blog",
             "description": "Stay updated with the latest trends, tips, and insights in Dubai real estate market.",
@@ -92,8 +85,7 @@ def blogs_listing_meta_view(request):
 from api.models import BlogPost
 
 def blog_detail_meta_view(request, slug):
-    user_agent = request.META.get("HTTP_USER_AGENT", "")
-    if CRAWLER_USER_AGENTS.search(user_agent):
+    if request.is_crawler:
         try:
             post = BlogPost.objects.get(slug=slug)
             
@@ -123,8 +115,7 @@ def blog_detail_meta_view(request, slug):
     return HttpResponseRedirect(f"https://offplan.market/blog/{slug}/")
 
 def contact_meta_view(request, username):
-    user_agent = request.META.get("HTTP_USER_AGENT", "")
-    if CRAWLER_USER_AGENTS.search(user_agent):
+    if request.is_crawler:
         meta_data = {
             "title": f"Contact {username.title()} - Senior Property Consultant | OFFPLAN.MARKET",
             "description": f"Get in touch with {username.title()} for expert property consultation in Dubai. Call +971 52 952 9687 or send a message for personalized real estate advice.",
@@ -136,8 +127,7 @@ def contact_meta_view(request, username):
     return HttpResponseRedirect(f"https://offplan.market/{username}/contact")
 
 def about_meta_view(request, username):
-    user_agent = request.META.get("HTTP_USER_AGENT", "")
-    if CRAWLER_USER_AGENTS.search(user_agent):
+    if request.is_crawler:
         meta_data = {
             "title": f"About {username.title()} - Senior Property Consultant | OFFPLAN.MARKET",
             "description": f"Meet {username.title()}, your trusted Senior Property Consultant specializing in Dubai's off-plan real estate market. 6+ years experience, 150+ successful deals.",
@@ -4,12 +4,39 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny
 from rest_framework.request import Request
 from django.urls import reverse
+from django.utils.http import urlencode
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from api.cache import PROPERTIES
 from api.models import Property
 from api.serializers import PropertySerializer
-from django.db.models import Sum
 
 
-class CustomPagination(PageNumberPagination):
+class CanonicalLinksMixin:
+    """
+    Page links built from only the query parameters in link_params, so a cached
+    page never hands one visitor's extra parameters to the next.
+    """
+    link_params = ()
+
+    def link_base(self):
+        params = [(name, self.request.query_params[name]) for name in self.link_params if self.request.query_params.get(name)]
+        return self.request.build_absolute_uri(f"{self.request.path}?{urlencode(params)}" if params else self.request.path)
+
+    def get_next_link(self):
+        if not self.page.has_next():
+            return None
+        return replace_query_param(self.link_base(), self.page_query_param, self.page.next_page_number())
+
+    def get_previous_link(self):
+        if not self.page.has_previous():
+            return None
+        page_number = self.page.previous_page_number()
+        if page_number == 1:
+            return remove_query_param(self.link_base(), self.page_query_param)
+        return replace_query_param(self.link_base(), self.page_query_param, page_number)
+
+
+class CustomPagination(CanonicalLinksMixin, PageNumberPagination):
     page_size = 12
 
     def get_paginated_response(self, data):
@@ -34,12 +61,15 @@ class PropertyListView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request: Request):
+        # Keyed on the page alone: other query parameters don't change the response
+        data = PROPERTIES.get_or_set(f"list:{request.query_params.get('page', '1')}", lambda: self.page(request))
+        return Response(data)
+
+    def page(self, request):
         # Annotate each property with total unit count
-        properties = Property.objects.annotate(
-            subunit_count=Sum('property_units__unit_count')
-        )
+        properties = Property.objects.live().with_subunit_count()
         paginator = CustomPagination()
         paginator.request = request
         paginated_qs = paginator.paginate_queryset(properties, request)
         serializer = PropertySerializer(paginated_qs, many=True, context={'request': request})
-        return paginator.get_paginated_response(serializer.data)
\ No newline at end of file
+        return paginator.get_paginated_response(serializer.data).data
\ No newline at end of file
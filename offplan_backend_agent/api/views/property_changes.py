@@ -0,0 +1,66 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from api.changefeed import DEFAULT_BATCH_SIZE, SECTIONS, read_changes
+
+MAX_LIMIT = 1000
+
+change_params = [
+    openapi.Parameter('after', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description="Cursor: return changes with a larger id. Pass back next_after from the previous page."),
+    openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description=f"Changes per page (max {MAX_LIMIT})"),
+    openapi.Parameter('sections', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description=f"Comma separated sections to include: {', '.join(SECTIONS)}"),
+]
+
+
+class PropertyChangeFeedView(APIView):
+    """Pull the property change feed from a client-held cursor."""
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(manual_parameters=change_params)
+    def get(self, request):
+        try:
+            after = int(request.GET.get("after", 0))
+            limit = min(int(request.GET.get("limit", DEFAULT_BATCH_SIZE)), MAX_LIMIT)
+        except ValueError:
+            return Response({
+                "status": False,
+                "message": "after and limit must be integers",
+                "data": None,
+                "errors": {"after": "integer", "limit": "integer"}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        sections = [s for s in request.GET.get("sections", "").split(",") if s]
+        unknown = set(sections) - set(SECTIONS)
+        if unknown:
+            return Response({
+                "status": False,
+                "message": f"Unknown sections: {', '.join(sorted(unknown))}",
+                "data": None,
+                "errors": {"sections": list(SECTIONS)}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        changes = read_changes(after=after, limit=max(limit, 1), sections=sections)
+        return Response({
+            "status": True,
+            "message": "Property changes fetched successfully",
+            "data": {
+                "changes": [
+                    {
+                        "id": change.id,
+                        "property_id": change.property_id,
+                        "sections": change.sections,
+                        "created_at": change.created_at,
+                    }
+                    for change in changes
+                ],
+                "next_after": changes[-1].id if changes else after,
+            },
+            "errors": None
+        }, status=status.HTTP_200_OK)
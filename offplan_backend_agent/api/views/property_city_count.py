@@ -16,6 +16,27 @@ status_param = openapi.Parameter(
     enum=["Ready", "Off Plan", "Sold Out", "Total"],  # ✅ Added Total
 )
 
+def city_counts(property_status=None):
+    """Live properties per city, most first; all statuses when property_status is None."""
+    properties = Property.objects.live()
+    if property_status is not None:
+        properties = properties.filter(property_status=property_status)
+    city_data = (
+        properties.values('city__id', 'city__name')
+        .annotate(property_count=Count('id'))
+        .order_by('-property_count')
+    )
+    return [
+        {
+            "city_id": city['city__id'],
+            "city_name": city['city__name'],
+            "property_count": city['property_count'],
+            "filter_status": property_status.name if property_status else "Total",
+        }
+        for city in city_data
+    ]
+
+
 class PropertyByStatusView(APIView):
     permission_classes = [AllowAny]
 
@@ -32,26 +53,10 @@ class PropertyByStatusView(APIView):
 
         # Handle Total separately
         if status_name.lower() == "total":
-            city_data = (
-                Property.objects
-                .values('city__id', 'city__name')
-                .annotate(property_count=Count('id'))
-                .order_by('-property_count')
-            )
-
-            results = []
-            for city in city_data:
-                results.append({
-                    "city_id": city['city__id'],
-                    "city_name": city['city__name'],
-                    "property_count": city['property_count'],
-                    "filter_status": "Total"
-                })
-
             return Response({
                 "status": True,
                 "message": "All properties grouped by city (Total)",
-                "data": results,
+                "data": city_counts(),
                 "errors": None
             }, status=status.HTTP_200_OK)
 
@@ -65,25 +70,9 @@ class PropertyByStatusView(APIView):
                 "errors": None
             }, status=status.HTTP_404_NOT_FOUND)
 
-        properties = Property.objects.filter(property_status=property_status)
-        city_data = (
-            properties.values('city__id', 'city__name')
-            .annotate(property_count=Count('id'))
-            .order_by('-property_count')
-        )
-
-        results = []
-        for city in city_data:
-            results.append({
-                "city_id": city['city__id'],
-                "city_name": city['city__name'],
-                "property_count": city['property_count'],
-                "filter_status": property_status.name
-            })
-
         return Response({
             "status": True,
             "message": f"Properties filtered by status '{status_name}'",
-            "data": results,
+            "data": city_counts(property_status),
             "errors": None
         }, status=status.HTTP_200_OK)
@@ -2,6 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
+from api.cache import PROPERTIES
 from api.models import Property
 from api.property_serializers import PropertyDetailSerializer
 
@@ -11,13 +12,14 @@ class PropertyDetailView(APIView):
 
     def get(self, request, id):
         try:
-            prop = Property.objects.get(id=id)
-            serializer = PropertyDetailSerializer(prop)
+            data = PROPERTIES.get_or_set(
+                f"detail:{id}", lambda: PropertyDetailSerializer(Property.objects.live().get(id=id)).data
+            )
 
             return Response({
                 "status": True,
                 "message": "Property retrieved successfully.",
-                "data": serializer.data,
+                "data": data,
                 "error": None
             }, status=status.HTTP_200_OK)
 
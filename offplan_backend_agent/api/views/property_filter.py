@@ -12,7 +12,7 @@ from .properties_list import CustomPagination
 
 import calendar
 from datetime import datetime
-from django.db.models import Case, When, Value, IntegerField, Q, Sum
+from django.db.models import Case, When, Value, IntegerField, Q
 
 @method_decorator(csrf_exempt, name='dispatch')
 class FilterPropertiesView(APIView):
@@ -43,9 +43,7 @@ class FilterPropertiesView(APIView):
         data = request.data
         
         # Start with base queryset including subunit_count annotation
-        queryset = Property.objects.annotate(
-            subunit_count=Sum('property_units__unit_count')
-        ).order_by('-updated_at')
+        queryset = Property.objects.live().with_subunit_count().order_by('-updated_at')
 
         # Apply filters
         queryset = self._apply_filters(queryset, data)
@@ -56,7 +54,7 @@ class FilterPropertiesView(APIView):
         # Paginate results
         paginator = CustomPagination()
         paginator.request = request
-        paginated_qs = paginator.paginate_queryset(queryset.distinct(), request)
+        paginated_qs = paginator.paginate_queryset(queryset, request)
         serializer = PropertySerializer(paginated_qs, many=True)
         
         return paginator.get_paginated_response(serializer.data)
@@ -75,11 +73,10 @@ class FilterPropertiesView(APIView):
         if prop_type := data.get("property_type"):
             queryset = queryset.filter(property_type__name__icontains=prop_type)
 
-        if unit_type := data.get("unit_type"):
-            queryset = queryset.filter(grouped_apartments__unit_type__icontains=unit_type)
-
-        if rooms := data.get("rooms"):
-            queryset = queryset.filter(grouped_apartments__rooms=rooms)
+        # EXISTS on grouped apartments, so no join multiplies rows and no DISTINCT is needed
+        unit_type, rooms = data.get("unit_type"), data.get("rooms")
+        if unit_type or rooms:
+            queryset = queryset.matching_rooms(unit_type=unit_type, rooms=rooms)
 
         # Delivery year filter
         if delivery_year := data.get("delivery_year"):
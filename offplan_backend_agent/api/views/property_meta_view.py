@@ -2,6 +2,7 @@ from django.shortcuts import render
 from django.http import HttpResponse
 from django.utils.html import strip_tags
 from api.models import Property
+from api.image_derivatives import load_variants, variant_url
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,7 +19,7 @@ def property_meta_view(request, username):
         return HttpResponse("Property ID missing", status=400)
 
     try:
-        property_obj = Property.objects.select_related(
+        property_obj = Property.objects.live().select_related(
             'city', 'district', 'developer', 'property_status'
         ).prefetch_related('property_images').get(id=property_id)
         
@@ -39,6 +40,10 @@ def property_meta_view(request, username):
     # Fallback to cover image
     elif property_obj.cover:
         image_url = property_obj.cover
+
+    # Prefer the pre-cropped 1200x630 derivative when one has been generated
+    if image_url:
+        image_url = variant_url(load_variants([image_url]), image_url, "og")
     
     # Ensure HTTPS and absolute URL
     if image_url:
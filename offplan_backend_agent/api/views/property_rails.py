@@ -0,0 +1,64 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import AllowAny
+from rest_framework import status
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from api.cache import PROPERTIES
+from api.models import PropertyRail
+from api.rails import KINDS, RAIL_SIZE, hydrate, load_rails
+from api.serializers import PropertySerializer
+
+DEFAULT_LIMIT = 12
+
+rail_params = [
+    openapi.Parameter('rails', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description=f"Comma separated rail keys <kind>:<id>, kind one of {', '.join(KINDS)} "
+                                  "(e.g. status:2,city:5). Defaults to every status rail."),
+    openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                      description=f"Properties per rail (max {RAIL_SIZE})"),
+]
+
+
+class PropertyRailsView(APIView):
+    """Latest/cheapest property rails, precomputed as id lists and loaded in one query."""
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(manual_parameters=rail_params)
+    def get(self, request):
+        try:
+            limit = min(max(int(request.GET.get("limit", DEFAULT_LIMIT)), 1), RAIL_SIZE)
+        except ValueError:
+            return Response({
+                "status": False,
+                "message": "limit must be an integer",
+                "data": None,
+                "errors": {"limit": "integer"}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        keys = sorted({key.strip() for key in request.GET.get("rails", "").split(",") if key.strip()})
+        invalid = [key for key in keys if key.partition(":")[0] not in KINDS or not key.partition(":")[2].isdigit()]
+        if invalid:
+            return Response({
+                "status": False,
+                "message": "Unknown rails requested",
+                "data": None,
+                "errors": {"rails": [f"Unknown rail '{key}'." for key in invalid]}
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        data = PROPERTIES.get_or_set(f"rails:{','.join(keys)}:{limit}", lambda: self.build(keys, limit))
+        return Response({
+            "status": True,
+            "message": "Property rails fetched successfully",
+            "data": data,
+            "errors": None
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def build(keys, limit):
+        if keys:
+            rails = load_rails(keys)
+        else:
+            rails = dict(PropertyRail.objects.filter(kind="status").values_list("key", "property_ids"))
+        return hydrate(rails, limit, PropertySerializer)
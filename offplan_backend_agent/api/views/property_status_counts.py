@@ -1,6 +1,7 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from api.cache import PROPERTIES
 from api.models import Property
 
 class PropertyStatusCountView(APIView):
@@ -8,18 +9,10 @@ class PropertyStatusCountView(APIView):
 
     def get(self, request):
         try:
-            ready_count = Property.objects.filter(property_status_id=1).count()
-            offplan_count = Property.objects.filter(property_status_id=2).count()
-            # sold_count = Property.objects.filter(sales_status_id=3).count()
-
             return Response({
                 "status": True,
                 "message": "Property status counts fetched successfully",
-                "data": {
-                    "ready": ready_count,
-                    "offplan": offplan_count
-                    # "sold": sold_count
-                }
+                "data": PROPERTIES.get_or_set("status_counts", self.counts),
             })
         except Exception as e:
             return Response({
@@ -27,3 +20,11 @@ class PropertyStatusCountView(APIView):
                 "message": f"Failed to fetch counts: {str(e)}",
                 "data": {}
             }, status=500)
+
+    @staticmethod
+    def counts():
+        return {
+            "ready": Property.objects.live().filter(property_status_id=1).count(),
+            "offplan": Property.objects.live().filter(property_status_id=2).count(),
+            # "sold": Property.objects.live().filter(sales_status_id=3).count(),
+        }
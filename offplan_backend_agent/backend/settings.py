@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -81,6 +82,11 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'DEBUG',
         },
+        # Sync pipeline; the sync commands raise this to DEBUG with -v 2
+        'api.estaty': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
     },
 }
 
@@ -221,6 +227,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.crawler_detection.CrawlerDetectionMiddleware',
 ]
 
 REST_FRAMEWORK = {
@@ -266,6 +273,25 @@ DATABASES = {
     }
 }
 
+# Shared L2 behind the per-process L1 in api/cache.py. Redis (needs the redis package) when
+# REDIS_URL is set, otherwise a file cache that every worker on the host shares.
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "offplan_cache")),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
 
 
 SWAGGER_SETTINGS = {
@@ -314,3 +340,16 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Estaty property feed, used by api/estaty and the sync commands
+ESTATY_BASE_URL = os.getenv("ESTATY_BASE_URL", "https://panel.estaty.app/api/v1")
+# No default: EstatyClient refuses to start without a key from the environment
+ESTATY_API_KEY = os.getenv("ESTATY_API_KEY", "")
+# "record" stores every Estaty response under ESTATY_FIXTURES_DIR, "replay" serves them offline
+ESTATY_FIXTURES = os.getenv("ESTATY_FIXTURES", "")
+ESTATY_FIXTURES_DIR = os.getenv("ESTATY_FIXTURES_DIR", os.path.join(tempfile.gettempdir(), "offplan_estaty_fixtures"))
+ESTATY_REPLAY_LATENCY_MS = int(os.getenv("ESTATY_REPLAY_LATENCY_MS", "0"))
+ESTATY_REPLAY_JITTER_MS = int(os.getenv("ESTATY_REPLAY_JITTER_MS", "0"))
+# Conditional requests against stored Estaty responses, so unchanged properties are not re-normalized
+ESTATY_HTTP_CACHE = os.getenv("ESTATY_HTTP_CACHE", "1") == "1"
+ESTATY_HTTP_CACHE_DIR = os.getenv("ESTATY_HTTP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "offplan_estaty_cache"))
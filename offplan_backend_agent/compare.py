@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 django.setup()
 
+from api.estaty.fixtures import fixture_session
 from api.models import Property
 
 API_KEY = os.environ.get("ESTATY_API_KEY")
@@ -14,11 +15,13 @@ HEADERS = {
     "App-key": API_KEY,
     "Content-Type": "application/json",
 }
+# Records or replays Estaty responses when ESTATY_FIXTURES is set
+session = fixture_session()
 EXTERNAL_API_URL = "https://panel.estaty.app/api/v1/latestUpdatedProperties"
 
 def fetch_latest_external():
     try:
-        response = requests.post(EXTERNAL_API_URL, headers=HEADERS)
+        response = session.post(EXTERNAL_API_URL, headers=HEADERS)
         response.raise_for_status()
         data = response.json()
         if isinstance(data, dict) and isinstance(data.get("properties"), list):